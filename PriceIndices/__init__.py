@@ -1,6 +1,47 @@
-from importlib.metadata import version
+"""
+PriceIndices: historical market data of cryptocurrencies, and price
+technical indicators.
 
-__version__ = version("PriceIndices")
+Submodules are imported on first use of the names below, so
+`from PriceIndices import Indices` doesn't pull in matplotlib or the network
+stack.
+"""
 
-from .crypto_history import MarketHistory
-from .price_indicators import Indices
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "AsyncMarketHistory": "async_history",
+    "Backtest": "backtest",
+    "BatchRunner": "batch",
+    "ChunkedIndices": "chunked",
+    "MarketHistory": "crypto_history",
+    "IndicatorCache": "indicator_cache",
+    "PanelIndices": "panel",
+    "Indices": "price_indicators",
+    "PriceStore": "store",
+    "Resampler": "resample",
+    "Screener": "screener",
+    "IndicatorStream": "streaming",
+}
+
+__all__ = ["__version__"] + list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name == "__version__":
+        from importlib.metadata import version
+
+        value = version("PriceIndices")
+    elif name in _EXPORTS:
+        value = getattr(import_module("." + _EXPORTS[name], __name__), name)
+    else:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
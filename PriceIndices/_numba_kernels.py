@@ -0,0 +1,151 @@
+"""
+Numba compiled kernels of the numba backend. Every kernel loops once over
+each column of a 2-D float64 array and writes into preallocated outputs.
+Compiled kernels are cached on disk, so only the first process compiles
+them, and they release the GIL, so threads run them in parallel.
+"""
+
+import numba
+import numpy as np
+
+
+@numba.njit(error_model="numpy", cache=True, nogil=True)
+def rolling_moments(x, window, mean, std):
+    n, m = x.shape
+    for j in range(m):
+        nobs = 0
+        mu = 0.0
+        ssqdm = 0.0
+        same = 0
+        for i in range(n):
+            if i >= window:
+                old = x[i - window, j]
+                if old == old:
+                    nobs -= 1
+                    if nobs > 0:
+                        delta = old - mu
+                        mu -= delta / nobs
+                        ssqdm -= ((nobs + 1) * delta * delta) / nobs
+                    else:
+                        mu = 0.0
+                        ssqdm = 0.0
+            v = x[i, j]
+            if v == v:
+                nobs += 1
+                delta = v - mu
+                mu += delta / nobs
+                ssqdm += ((nobs - 1) * delta * delta) / nobs
+            same = same + 1 if i > 0 and v == x[i - 1, j] else 1
+            if nobs == window:
+                if same >= window:
+                    # Like pandas, windows of one repeated value are exact.
+                    mean[i, j] = v
+                    std[i, j] = 0.0 if window > 1 else np.nan
+                else:
+                    mean[i, j] = mu
+                    std[i, j] = np.sqrt(max(ssqdm, 0.0) / (window - 1))
+
+
+@numba.njit(error_model="numpy", cache=True, nogil=True)
+def ewm_mean(x, span, out):
+    alpha = 2.0 / (span + 1.0)
+    n, m = x.shape
+    for j in range(m):
+        weighted = x[0, j]
+        old_wt = 1.0
+        out[0, j] = weighted
+        for i in range(1, n):
+            v = x[i, j]
+            if weighted == weighted:
+                old_wt *= 1.0 - alpha
+                if v == v:
+                    if weighted != v:
+                        weighted = (old_wt * weighted + alpha * v) / (
+                            old_wt + alpha
+                        )
+                    old_wt = 1.0
+            elif v == v:
+                weighted = v
+            out[i, j] = weighted
+
+
+@numba.njit(error_model="numpy", cache=True, nogil=True)
+def ewm_means(x, spans, out):
+    # ewm_mean of one series (first column of x) for many spans, one row of
+    # out per span.
+    n = x.shape[0]
+    for k in range(len(spans)):
+        alpha = 2.0 / (spans[k] + 1.0)
+        weighted = x[0, 0]
+        old_wt = 1.0
+        out[k, 0] = weighted
+        for i in range(1, n):
+            v = x[i, 0]
+            if weighted == weighted:
+                old_wt *= 1.0 - alpha
+                if v == v:
+                    if weighted != v:
+                        weighted = (old_wt * weighted + alpha * v) / (
+                            old_wt + alpha
+                        )
+                    old_wt = 1.0
+            elif v == v:
+                weighted = v
+            out[k, i] = weighted
+
+
+@numba.njit(error_model="numpy", cache=True, nogil=True)
+def rsi(x, rsi_1, rs_smooth, rsi_2):
+    n, m = x.shape
+    for j in range(m):
+        nobs = 0
+        gain_mu = 0.0
+        loss_mu = 0.0
+        gain_previous = np.nan
+        loss_previous = np.nan
+        gain_last = np.nan
+        loss_last = np.nan
+        gain_same = 0
+        loss_same = 0
+        for i in range(1, n):
+            if i > 14:
+                old = x[i - 14, j] - x[i - 15, j]
+                if old == old:
+                    nobs -= 1
+                    if nobs > 0:
+                        gain_mu -= (max(old, 0.0) - gain_mu) / nobs
+                        loss_mu -= (abs(min(old, 0.0)) - loss_mu) / nobs
+                    else:
+                        gain_mu = 0.0
+                        loss_mu = 0.0
+            change = x[i, j] - x[i - 1, j]
+            if change != change:
+                gain_previous = np.nan
+                loss_previous = np.nan
+                gain_last = np.nan
+                loss_last = np.nan
+                continue
+            gain = max(change, 0.0)
+            loss = abs(min(change, 0.0))
+            nobs += 1
+            gain_mu += (gain - gain_mu) / nobs
+            loss_mu += (loss - loss_mu) / nobs
+            gain_same = gain_same + 1 if gain == gain_last else 1
+            loss_same = loss_same + 1 if loss == loss_last else 1
+            gain_last = gain
+            loss_last = loss
+            if nobs == 14:
+                gain_average = gain if gain_same >= 14 else gain_mu
+                loss_average = loss if loss_same >= 14 else loss_mu
+            else:
+                gain_average = np.nan
+                loss_average = np.nan
+            rs = gain_average / loss_average
+            smooth = (gain_previous * 13 + gain) / (loss_previous * 13 + loss)
+            value = 100 * (1 - (1 / (1 + rs)))
+            rsi_1[i, j] = value if value == value else 0.0
+            rs_smooth[i, j] = smooth if smooth == smooth else 0.0
+            value = 100 * (1 - (1 / (1 + smooth)))
+            rsi_2[i, j] = value if value == value else 0.0
+            gain_previous = gain_average
+            loss_previous = loss_average
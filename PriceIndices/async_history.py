@@ -0,0 +1,290 @@
+import asyncio
+from typing import Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from . import instrumentation
+from .crypto_history import HistoryBatch, _windows, parse_quotes
+from .formats import check_options, format_frame
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore
+
+
+class AsyncMarketHistory(object):
+    """
+    asyncio version of MarketHistory on a pooled httpx client, with
+    keep-alive connections and optional HTTP/2. Requests are capped by a
+    semaphore and retried like the Retry config of MarketHistory. Cancelling
+    a call cancels its requests.
+
+    The semaphore and the client are created on first use, inside the
+    running event loop. Use it as an async context manager, or call aclose
+    when done:
+
+        async with AsyncMarketHistory() as history:
+            df = await history.get_price("bitcoin", "2021-01-01", "2021-03-01")
+    """
+
+    __Crypto_Market_Base_URL = "https://web-api.coinmarketcap.com/v1/cryptocurrency/ohlcv/historical?convert=USD&slug="  # noqa
+
+    def __init__(
+        self,
+        base_url: Optional[str] = __Crypto_Market_Base_URL,
+        max_connections: int = 10,
+        max_concurrency: int = 8,
+        http2: bool = False,
+        retries: int = 5,
+        backoff_factor: float = 0.5,
+        status_forcelist: Iterable[int] = (502, 503, 504),
+        string_dates: bool = False,
+        float_dtype: str = "float64",
+        date_dtype: Optional[str] = None,
+        dtype_backend: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            base_url (str): CoinMarketCap OHLCV historical endpoint.
+            max_connections (int): Number of pooled connections.
+            max_concurrency (int): Maximum number of requests in flight.
+            http2 (bool): Use HTTP/2 when the server supports it (needs the
+                          h2 package).
+            retries (int): Number of retries of a failed request.
+            backoff_factor (float): Retries sleep backoff_factor * 2 ** (n - 1)
+                                    seconds before the n-th retry, from the
+                                    second one on.
+            status_forcelist (list): HTTP status codes to retry.
+            string_dates (bool): See MarketHistory.
+            float_dtype (str): See MarketHistory.
+            date_dtype (str): See MarketHistory.
+            dtype_backend (str): See MarketHistory.
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncMarketHistory needs httpx, install it with "
+                "`pip install PriceIndices[httpx]`."
+            )
+        check_options(float_dtype, date_dtype, dtype_backend)
+        self.base_url = base_url
+        self.request_timeout = 120
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = 120.0
+        self.status_forcelist = set(status_forcelist)
+        self.string_dates = string_dates
+        self.float_dtype = float_dtype
+        self.date_dtype = date_dtype
+        self.dtype_backend = dtype_backend
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.http2 = http2
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncMarketHistory":
+        self.__open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections.
+        """
+        if self.client is not None:
+            await self.client.aclose()
+        self.semaphore = None
+        self.client = None
+
+    def __open(self) -> Tuple[asyncio.Semaphore, "httpx.AsyncClient"]:
+        # Python < 3.10 binds asyncio primitives to the event loop current
+        # at creation, so they are only created from a coroutine.
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self.semaphore, self.client
+
+    def __url(self, coin_id: str, start_date: str, end_date: str) -> str:
+        return "{0}{1}&time_end={2}&time_start={3}".format(
+            self.base_url, coin_id, end_date, start_date
+        )
+
+    def __backoff(self, retry: int, response=None) -> float:
+        if response is not None and response.status_code in (413, 429, 503):
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        if retry <= 1:
+            return 0.0
+        return float(
+            min(self.backoff_factor * 2 ** (retry - 1), self.backoff_max)
+        )
+
+    async def __request(self, url: str) -> pd.DataFrame:
+        semaphore, client = self.__open()
+        retry = 0
+        while True:
+            response = None
+            async with semaphore:
+                try:
+                    with instrumentation.timer("http.request") as timer:
+                        response = await client.get(url)
+                        timer.attrs["status"] = response.status_code
+                except httpx.TransportError:
+                    if retry >= self.retries:
+                        raise
+            if response is not None and (
+                response.status_code not in self.status_forcelist
+                or retry >= self.retries
+            ):
+                response.raise_for_status()
+                instrumentation.count("http.bytes", len(response.content))
+                return parse_quotes(response.content, self.string_dates)
+            retry += 1
+            instrumentation.count(
+                "http.retry",
+                status=response.status_code if response is not None else None,
+            )
+            await asyncio.sleep(self.__backoff(retry, response))
+
+    async def __fetch(
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+    ) -> pd.DataFrame:
+        windows: List[Tuple[str, str]] = [(start_date, end_date)]
+        if chunk_days:
+            windows = _windows(start_date, end_date, chunk_days)
+        frames = await asyncio.gather(
+            *[self.__request(self.__url(coin_id, *w)) for w in windows]
+        )
+        if len(frames) == 1:
+            df = frames[0]
+        else:
+            df = pd.concat(frames, ignore_index=True)
+            df = df.drop_duplicates("date", keep="last")
+            df = df.sort_values("date", ascending=False, ignore_index=True)
+        return format_frame(
+            df,
+            [c for c in df.columns if c != "date"],
+            "date",
+            self.float_dtype,
+            self.date_dtype,
+            self.dtype_backend,
+        )
+
+    async def get_history(
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Get historical market data of a cryptocurrency from CoinMarketCap.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            chunk_days (int): Split the range into windows of this many days
+                              which are fetched concurrently. Default to None
+                              (one request).
+        Returns:
+            pd.DataFrame: Pandas Dataframe or print error message
+
+        """
+        try:
+            return await self.__fetch(coin_id, start_date, end_date, chunk_days)
+        except Exception as e:
+            instrumentation.count("history.error", error=type(e).__name__)
+            print(e)
+            print(
+                "Please, check inputs. Coin id, and dates are strings. Date "
+                'format is "YYYY-MM-DD"'
+            )
+            return None
+
+    async def get_price(
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Get historical market price data (closing price) of a cryptocurrency
+        from CoinMarketCap.
+        Args:
+            coin_id (str): coin name
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            chunk_days (int): See get_history.
+
+        Returns:
+            pd.DataFrame: Pandas Dataframe or print error message
+
+        """
+        try:
+            df = await self.__fetch(coin_id, start_date, end_date, chunk_days)
+            df = df[["date", "close"]]
+            df.columns = ["date", "price"]
+            return df
+        except Exception as e:
+            instrumentation.count("history.error", error=type(e).__name__)
+            print(
+                e,
+                "Please, check inputs Coin id, and dates are strings. Date "
+                'format is "YYYY-MM-DD"',
+            )
+            return None
+
+    async def get_histories(
+        self,
+        coin_ids: Iterable[str],
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+    ) -> HistoryBatch:
+        """
+        Get historical market data of many cryptocurrencies concurrently,
+        up to max_concurrency requests at a time.
+        Args:
+            coin_ids (list): coin names. E.g., ["bitcoin", "ethereum"]
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            chunk_days (int): See get_history.
+
+        Returns:
+            HistoryBatch: dict of coin id to Pandas DataFrame. Coins which
+                          could not be fetched are reported in `errors`.
+        """
+        coin_ids = list(dict.fromkeys(coin_ids))
+        results = await asyncio.gather(
+            *[
+                self.__fetch(coin_id, start_date, end_date, chunk_days)
+                for coin_id in coin_ids
+            ],
+            return_exceptions=True,
+        )
+        batch = HistoryBatch()
+        for coin_id, result in zip(coin_ids, results):
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                batch.errors[coin_id] = result  # type: ignore
+            else:
+                batch[coin_id] = result
+        return batch
@@ -0,0 +1,344 @@
+"""
+Compute backends for the price indicators.
+
+Every indicator is one kernel over a contiguous float64 array of prices in
+date order, either one series or a dates x coins matrix, and returns only
+its output arrays. The NumPy backend is always available, the Numba backend
+is used by default when numba is installed. numba is only imported, and its
+kernels loaded, once the Numba backend is first used.
+"""
+
+from importlib.util import find_spec
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+Outputs = Dict[str, np.ndarray]
+
+
+def _as_2d(x: np.ndarray) -> Tuple[np.ndarray, bool]:
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    return (x[:, None], True) if x.ndim == 1 else (x, False)
+
+
+def _shift(x: np.ndarray) -> np.ndarray:
+    return np.concatenate([np.full((1,) + x.shape[1:], np.nan), x[:-1]])
+
+
+def _prefix_sums(
+    segment: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Sums of values and squares, centered on the segment mean, and valid
+    # counts, each with a leading row of zeros.
+    valid = ~np.isnan(segment)
+    count = valid.sum(axis=0)
+    ref = np.where(valid, segment, 0).sum(axis=0) / np.maximum(count, 1)
+    d = np.where(valid, segment - ref, 0)
+    zero = np.zeros((1,) + segment.shape[1:])
+    c1 = np.concatenate([zero, np.cumsum(d, axis=0)])
+    c2 = np.concatenate([zero, np.cumsum(d * d, axis=0)])
+    cn = np.concatenate([zero, np.cumsum(valid, axis=0)])
+    return ref, c1, c2, cn
+
+
+class NumpyBackend(object):
+    """
+    Vectorized NumPy kernels. Rolling windows are built from prefix sums
+    which restart every `block` rows, so their rounding error stays bounded
+    on long series, and windows of one repeated value are exact. EMA
+    recursions use the compiled pandas EWM.
+    """
+
+    name = "numpy"
+    block = 1 << 16
+
+    def rolling_moments(
+        self, x: np.ndarray, window: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rolling mean and sample standard deviation along the first axis.
+        Windows holding a NaN are NaN.
+        """
+        x, squeeze = _as_2d(x)
+        n = len(x)
+        mean = np.full(x.shape, np.nan)
+        std = np.full(x.shape, np.nan)
+        for start in range(window - 1, n, self.block):
+            stop = min(start + self.block, n)
+            ref, c1, c2, cn = _prefix_sums(x[start - window + 1 : stop])
+            s1 = c1[window:] - c1[:-window]
+            s2 = c2[window:] - c2[:-window]
+            full = (cn[window:] - cn[:-window]) == window
+            with np.errstate(divide="ignore", invalid="ignore"):
+                var = np.maximum(s2 - s1 * s1 / window, 0) / (window - 1)
+            mean[start:stop] = np.where(full, ref + s1 / window, np.nan)
+            std[start:stop] = np.where(full, np.sqrt(var), np.nan)
+        # Like pandas, windows of one repeated value are exact.
+        rows = np.arange(n)[:, None]
+        run_start = np.where(np.diff(x, axis=0, prepend=np.nan) == 0, 0, rows)
+        constant = rows - np.maximum.accumulate(run_start, axis=0) >= window - 1
+        mean = np.where(constant, x, mean)
+        if window > 1:
+            std = np.where(constant, 0.0, std)
+        if squeeze:
+            return mean[:, 0], std[:, 0]
+        return mean, std
+
+    def ewm_mean(self, x: np.ndarray, span: int) -> np.ndarray:
+        """
+        Exponentially weighted mean along the first axis, adjust=False.
+        """
+        x, squeeze = _as_2d(x)
+        ewm = pd.DataFrame(x).ewm(span=span, adjust=False).mean()
+        out: np.ndarray = ewm.to_numpy()
+        return out[:, 0] if squeeze else out
+
+    def rolling_moments_sweep(
+        self, x: np.ndarray, windows: Iterable[int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rolling mean and sample standard deviation of one series for many
+        windows. Every block of rows takes all windows from one set of
+        prefix sums, restarted like in rolling_moments. Same NaN and
+        repeated value rules as rolling_moments.
+
+        Returns:
+            tuple: mean and std, windows x len(x) arrays.
+        """
+        x = np.ascontiguousarray(x, dtype=np.float64).ravel()
+        windows = list(windows)
+        n = len(x)
+        mean = np.full((len(windows), n), np.nan)
+        std = np.full((len(windows), n), np.nan)
+        if not windows:
+            return mean, std
+        longest = max(windows)
+        for start in range(min(windows) - 1, n, self.block):
+            stop = min(start + self.block, n)
+            low = max(start - longest + 1, 0)
+            ref, c1, c2, cn = _prefix_sums(x[low:stop])
+            for k, window in enumerate(windows):
+                first = max(start, window - 1)
+                if first >= stop:
+                    continue
+                # Prefix sum rows of the windows ending at first..stop - 1.
+                hi = slice(first + 1 - low, stop + 1 - low)
+                lo = slice(first + 1 - low - window, stop + 1 - low - window)
+                s1 = c1[hi] - c1[lo]
+                s2 = c2[hi] - c2[lo]
+                full = (cn[hi] - cn[lo]) == window
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    var = np.maximum(s2 - s1 * s1 / window, 0) / (window - 1)
+                mean[k, first:stop] = np.where(full, ref + s1 / window, np.nan)
+                std[k, first:stop] = np.where(full, np.sqrt(var), np.nan)
+        # Like pandas, windows of one repeated value are exact.
+        rows = np.arange(n)
+        run_start = np.where(np.diff(x, prepend=np.nan) == 0, 0, rows)
+        run = rows - np.maximum.accumulate(run_start)
+        for k, window in enumerate(windows):
+            constant = run >= window - 1
+            mean[k] = np.where(constant, x, mean[k])
+            if window > 1:
+                std[k] = np.where(constant, 0.0, std[k])
+        return mean, std
+
+    def ewm_means(self, x: np.ndarray, spans: Iterable[int]) -> np.ndarray:
+        """
+        ewm_mean of one series for many spans.
+
+        Returns:
+            np.ndarray: spans x len(x) array.
+        """
+        x = np.ascontiguousarray(x, dtype=np.float64).ravel()
+        spans = list(spans)
+        if not spans:
+            return np.empty((0, len(x)))
+        return np.stack([self.ewm_mean(x, span) for span in spans])
+
+    def sweep(
+        self, name: str, prices: np.ndarray, days: Iterable[int]
+    ) -> Outputs:
+        """
+        One indicator of one price series for many window lengths.
+        Args:
+            name (str): "vola_index", "bollinger_bands", "sma" or "ema".
+            prices (np.ndarray): Prices in date order.
+            days (list): Window lengths (volatile_period, days or EMA
+                         period).
+
+        Returns:
+            dict: Output column name to a days x len(prices) array.
+        """
+        if name == "vola_index":
+            log_prices = np.log(np.asarray(prices, dtype=np.float64))
+            returns = log_prices - _shift(log_prices)
+            _, std = self.rolling_moments_sweep(returns, days)
+            return {"BVOL_Index": std * np.sqrt(365)}
+        if name in ("bollinger_bands", "sma"):
+            sma, sd = self.rolling_moments_sweep(prices, days)
+            if name == "sma":
+                return {"SMA": sma}
+            return {"BB_upper": sma + sd * 2, "BB_lower": sma - sma * 2}
+        if name == "ema":
+            return {"EMA": self.ewm_means(prices, days)}
+        raise ValueError(
+            "Indicator {!r} can't be swept, choose from vola_index, "
+            "bollinger_bands, sma, ema".format(name)
+        )
+
+    def vola_index(
+        self, prices: np.ndarray, volatile_period: int = 30
+    ) -> Outputs:
+        log_prices = np.log(prices)
+        returns = log_prices - _shift(log_prices)
+        _, std = self.rolling_moments(returns, volatile_period)
+        return {"BVOL_Index": std * np.sqrt(365)}
+
+    def rsi(self, prices: np.ndarray) -> Outputs:
+        change = np.diff(prices, axis=0)
+        gain = np.maximum(change, 0)
+        loss = np.abs(np.minimum(change, 0))
+        gain_average, _ = self.rolling_moments(gain, 14)
+        loss_average, _ = self.rolling_moments(loss, 14)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = gain_average / loss_average
+            rs_smooth = (_shift(gain_average) * 13 + gain) / (
+                _shift(loss_average) * 13 + loss
+            )
+        columns = {
+            "RSI_1": 100 * (1 - (1 / (1 + rs))),
+            "RS_Smooth": rs_smooth,
+            "RSI_2": 100 * (1 - (1 / (1 + rs_smooth))),
+        }
+        # Prices without a change are NaN, other undefined values are zeros.
+        undefined = np.isnan(change)
+        first = np.full((min(len(prices), 1),) + prices.shape[1:], np.nan)
+        return {
+            name: np.concatenate(
+                [
+                    first,
+                    np.where(undefined, np.nan, np.where(np.isnan(v), 0, v)),
+                ]
+            )
+            for name, v in columns.items()
+        }
+
+    def bollinger_bands(self, prices: np.ndarray, days: int = 20) -> Outputs:
+        sma, sd = self.rolling_moments(prices, days)
+        return {"BB_upper": sma + sd * 2, "BB_lower": sma - sma * 2}
+
+    def macd(self, prices: np.ndarray) -> Outputs:
+        return {"MACD": self.ewm_mean(prices, 12) - self.ewm_mean(prices, 26)}
+
+    def sma(self, prices: np.ndarray, days: int = 15) -> Outputs:
+        return {"SMA": self.rolling_moments(prices, days)[0]}
+
+    def ema(
+        self, prices: np.ndarray, periods: Iterable[int] = (20,)
+    ) -> Outputs:
+        return {
+            "EMA_{}".format(period): self.ewm_mean(prices, period)
+            for period in periods
+        }
+
+
+class NumbaBackend(NumpyBackend):
+    """
+    Numba compiled kernels. Each indicator is a single loop over the prices
+    which writes only its output arrays.
+    """
+
+    name = "numba"
+
+    def __init__(self) -> None:
+        if find_spec("numba") is None:
+            raise ImportError(
+                "The numba backend needs numba, install it with "
+                "`pip install PriceIndices[numba]`."
+            )
+        from . import _numba_kernels
+
+        # numba Dispatchers are typed loosely, the kernels are checked by
+        # numba itself.
+        self.kernels: Any = _numba_kernels
+
+    def rolling_moments(
+        self, x: np.ndarray, window: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        x, squeeze = _as_2d(x)
+        mean = np.full(x.shape, np.nan)
+        std = np.full(x.shape, np.nan)
+        self.kernels.rolling_moments(x, window, mean, std)
+        if squeeze:
+            return mean[:, 0], std[:, 0]
+        return mean, std
+
+    def ewm_mean(self, x: np.ndarray, span: int) -> np.ndarray:
+        x, squeeze = _as_2d(x)
+        out = np.empty(x.shape)
+        if len(x):
+            self.kernels.ewm_mean(x, span, out)
+        return out[:, 0] if squeeze else out
+
+    def ewm_means(self, x: np.ndarray, spans: Iterable[int]) -> np.ndarray:
+        x = np.ascontiguousarray(x, dtype=np.float64).reshape(-1, 1)
+        spans = np.asarray(list(spans), dtype=np.float64)
+        out = np.empty((len(spans), len(x)))
+        if len(x):
+            self.kernels.ewm_means(x, spans, out)
+        return out
+
+    def rsi(self, prices: np.ndarray) -> Outputs:
+        x, squeeze = _as_2d(prices)
+        outputs = {
+            name: np.full(x.shape, np.nan)
+            for name in ["RSI_1", "RS_Smooth", "RSI_2"]
+        }
+        self.kernels.rsi(x, *outputs.values())
+        if squeeze:
+            return {name: v[:, 0] for name, v in outputs.items()}
+        return outputs
+
+
+BACKENDS = {"numpy": NumpyBackend, "numba": NumbaBackend}
+_default_backend: Optional[str] = None
+_instances: Dict[str, NumpyBackend] = {}
+
+
+def set_backend(name: Optional[str]) -> None:
+    """
+    Set the backend used when none is given.
+    Args:
+        name (str): "numpy", "numba", or None to pick numba when installed.
+    """
+    global _default_backend
+    if name is not None:
+        get_backend(name)
+    _default_backend = name
+
+
+def get_backend(name: Optional[str] = None) -> NumpyBackend:
+    """
+    Get a compute backend.
+    Args:
+        name (str): "numpy" or "numba". Default to the backend given to
+                    set_backend, else numba when installed, else numpy.
+
+    Returns:
+        NumpyBackend: Backend instance
+    """
+    name = (
+        name
+        or _default_backend
+        or ("numpy" if find_spec("numba") is None else "numba")
+    )
+    if name not in BACKENDS:
+        raise ValueError(
+            "Unknown backend {!r}, choose from {}".format(
+                name, ", ".join(BACKENDS)
+            )
+        )
+    if name not in _instances:
+        _instances[name] = BACKENDS[name]()
+    return _instances[name]
@@ -0,0 +1,383 @@
+"""
+Vectorized backtests of indicator strategies.
+
+Signals turn indicator columns into position arrays (1 long, -1 short, 0
+flat) with array operations only, and evaluate computes PnL, drawdown and
+turnover along the date axis of any (..., dates, coins) stack of positions.
+Backtest runs whole grids of strategy params over many coins at once: the
+indicators are calculated once per distinct window and every param set is
+one more slice of the same arrays.
+
+A position decided on the close of a date is held until the next close.
+"""
+
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+from .backends import get_backend
+from .panel import PanelIndices
+
+ArrayLike = Union[np.ndarray, pd.Series, pd.DataFrame, float]
+
+METRICS = ["total_return", "sharpe", "max_drawdown", "turnover"]
+
+
+def _array(x: ArrayLike) -> np.ndarray:
+    return np.asarray(x, dtype=np.float64)
+
+
+def hold(
+    entries: np.ndarray,
+    exits: np.ndarray,
+    short_entries: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Positions held from entry signals until an exit signal, along the date
+    axis (-2 for 2-D and deeper arrays, else 0). Entries win over exits on
+    the same date.
+    Args:
+        entries (np.ndarray): True where a long position is opened.
+        exits (np.ndarray): True where the position is closed.
+        short_entries (np.ndarray): True where a short position is opened.
+
+    Returns:
+        np.ndarray: Positions of the same shape.
+    """
+    entries, exits = np.broadcast_arrays(entries, exits)
+    state = np.full(entries.shape, np.nan)
+    state[exits] = 0.0
+    if short_entries is not None:
+        state[np.broadcast_to(short_entries, state.shape)] = -1.0
+    state[entries] = 1.0
+    axis = -2 if state.ndim > 1 else 0
+    shape = [1] * state.ndim
+    shape[axis] = state.shape[axis]
+    rows = np.arange(state.shape[axis]).reshape(shape)
+    last = np.maximum.accumulate(np.where(np.isnan(state), 0, rows), axis=axis)
+    positions = np.take_along_axis(state, last, axis=axis)
+    return np.nan_to_num(positions, nan=0.0)
+
+
+def crossover(
+    fast: ArrayLike, slow: ArrayLike, short: bool = False
+) -> np.ndarray:
+    """
+    Long while fast is above slow, e.g. EMA_20 over EMA_70 or MACD over 0.
+    Args:
+        fast (array): Fast line.
+        slow (array): Slow line or a level.
+        short (bool): Short while fast is below slow instead of flat.
+
+    Returns:
+        np.ndarray: Positions
+    """
+    with np.errstate(invalid="ignore"):
+        diff = _array(fast) - _array(slow)
+    positions: np.ndarray = (diff > 0).astype(float)
+    if short:
+        positions -= diff < 0
+    return positions
+
+
+def thresholds(
+    values: ArrayLike,
+    lower: ArrayLike = 30.0,
+    upper: ArrayLike = 70.0,
+    short: bool = False,
+) -> np.ndarray:
+    """
+    Mean reversion on an oscillator such as RSI_2: long when it falls below
+    lower, until it rises above upper (then short when short is set, until
+    it falls below lower again).
+    Args:
+        values (array): Oscillator values.
+        lower (float): Oversold level.
+        upper (float): Overbought level.
+        short (bool): Also go short above upper.
+
+    Returns:
+        np.ndarray: Positions
+    """
+    values = _array(values)
+    with np.errstate(invalid="ignore"):
+        below = values < _array(lower)
+        above = values > _array(upper)
+    if short:
+        return hold(below, np.zeros_like(below), above)
+    return hold(below, above)
+
+
+def band_reversion(
+    price: ArrayLike,
+    upper: ArrayLike,
+    lower: ArrayLike,
+    mid: ArrayLike,
+    short: bool = False,
+) -> np.ndarray:
+    """
+    Mean reversion on bands such as Bollinger Bands: long below lower (short
+    above upper when short is set), closed when the price crosses mid.
+    Args:
+        price (array): Prices.
+        upper (array): Upper band.
+        lower (array): Lower band.
+        mid (array): Exit level, e.g. the moving average.
+        short (bool): Also go short above upper.
+
+    Returns:
+        np.ndarray: Positions
+    """
+    price = _array(price)
+    with np.errstate(invalid="ignore"):
+        below = price < _array(lower)
+        above = price > _array(upper)
+        diff = price - _array(mid)
+    axis = -2 if diff.ndim > 1 else 0
+    first = np.full_like(np.take(diff, [0], axis=axis), np.nan)
+    previous = np.concatenate(
+        [first, np.delete(diff, -1, axis=axis)], axis=axis
+    )
+    with np.errstate(invalid="ignore"):
+        crossed = np.sign(diff) * np.sign(previous) <= 0
+    if short:
+        return hold(below, crossed & ~below & ~above, above)
+    return hold(below, crossed & ~below)
+
+
+class BacktestResult(object):
+    """
+    Arrays of an evaluated backtest, all shaped like the positions.
+    """
+
+    def __init__(
+        self,
+        positions: np.ndarray,
+        pnl: np.ndarray,
+        equity: np.ndarray,
+        drawdown: np.ndarray,
+        turnover: np.ndarray,
+        periods_per_year: int,
+        axis: int = -2,
+    ) -> None:
+        self.positions = positions
+        self.pnl = pnl
+        self.equity = equity
+        self.drawdown = drawdown
+        self.turnover = turnover
+        self.periods_per_year = periods_per_year
+        self.axis = axis
+
+    def metrics(self) -> Dict[str, np.ndarray]:
+        """
+        Summary of every (param set, coin) series along the date axis.
+
+        Returns:
+            dict: METRICS name to an array of the positions shape without
+                  the date axis.
+        """
+        axis = self.axis
+        mean = self.pnl.mean(axis=axis)
+        std = self.pnl.std(axis=axis, ddof=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sharpe = mean / std * np.sqrt(self.periods_per_year)
+        return {
+            "total_return": np.take(self.equity, -1, axis=axis) - 1,
+            "sharpe": np.where(std > 0, sharpe, np.nan),
+            "max_drawdown": self.drawdown.min(axis=axis),
+            "turnover": self.turnover.sum(axis=axis),
+        }
+
+
+def evaluate(
+    prices: ArrayLike,
+    positions: ArrayLike,
+    cost: float = 0.0,
+    periods_per_year: int = 365,
+) -> BacktestResult:
+    """
+    PnL, equity, drawdown and turnover of positions.
+    Args:
+        prices (array): Prices in date order, (dates,) or (dates, coins).
+        positions (array): Positions of the same shape, or stacked in front
+                           of it, e.g. (param sets, dates, coins). Positions
+                           of a date earn the return to the next date.
+        cost (float): Cost per unit of turnover, e.g. 0.001 for 10 bps.
+        periods_per_year (int): Dates per year, for the Sharpe ratio.
+
+    Returns:
+        BacktestResult: Arrays shaped like positions.
+    """
+    prices = _array(prices)
+    positions = _array(positions)
+    axis = -2 if prices.ndim > 1 else -1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = np.diff(prices, axis=0) / np.delete(prices, -1, axis=0)
+    first = np.zeros((1,) + prices.shape[1:])
+    returns = np.nan_to_num(np.concatenate([first, returns]), nan=0.0)
+
+    first = np.zeros_like(np.take(positions, [0], axis=axis))
+    held = np.concatenate(
+        [first, np.delete(positions, -1, axis=axis)], axis=axis
+    )
+    turnover = np.abs(positions - held)
+    pnl = held * returns - cost * turnover
+    equity = np.cumprod(1 + pnl, axis=axis)
+    peak = np.maximum(np.maximum.accumulate(equity, axis=axis), 1)
+    drawdown = equity / peak - 1
+    return BacktestResult(
+        positions, pnl, equity, drawdown, turnover, periods_per_year, axis
+    )
+
+
+class Backtest(object):
+    """
+    Grid backtests of EMA crossover, RSI threshold and Bollinger Bands
+    mean reversion strategies over many coins.
+
+        backtest = Backtest(panel, cost=0.001)
+        backtest.ema_crossover([(10, 30), (20, 70), (50, 200)])
+    """
+
+    def __init__(
+        self,
+        prices: Union[PanelIndices, pd.DataFrame],
+        cost: float = 0.0,
+        periods_per_year: int = 365,
+        backend: Optional[str] = None,
+        max_cells: int = 1 << 25,
+    ) -> None:
+        """
+        Args:
+            prices (PanelIndices): Prices of all coins, or a wide DataFrame
+                                   of prices, one column per coin.
+            cost (float): Cost per unit of turnover.
+            periods_per_year (int): Dates per year, for the Sharpe ratio.
+            backend (str): Compute backend, see Indices.
+            max_cells (int): Param sets are evaluated in batches of about
+                             this many param x date x coin cells.
+        """
+        if not isinstance(prices, PanelIndices):
+            prices = PanelIndices(prices)
+        self.prices = prices.prices
+        self.matrix = self.prices.to_numpy()
+        self.cost = cost
+        self.periods_per_year = periods_per_year
+        self.backend = get_backend(backend)
+        self.max_cells = max_cells
+
+    def __run(
+        self,
+        params: Sequence[tuple],
+        names: List[str],
+        positions: Callable[[Sequence[tuple]], np.ndarray],
+    ) -> pd.DataFrame:
+        # positions(batch of params) -> (params, dates, coins) array.
+        size = max(self.matrix.size, 1)
+        step = max(self.max_cells // size, 1)
+        metrics: Dict[str, List[np.ndarray]] = {m: [] for m in METRICS}
+        for start in range(0, len(params), step):
+            batch = params[start : start + step]
+            result = evaluate(
+                self.matrix,
+                positions(batch),
+                self.cost,
+                self.periods_per_year,
+            )
+            for name, values in result.metrics().items():
+                metrics[name].append(values)
+        coins = self.prices.columns
+        index = pd.MultiIndex.from_tuples(
+            [tuple(p) + (coin,) for p in params for coin in coins],
+            names=names + ["coin"],
+        )
+        return pd.DataFrame(
+            {m: np.concatenate(v).ravel() for m, v in metrics.items()},
+            index=index,
+        )
+
+    def ema_crossover(
+        self, params: Iterable[Tuple[int, int]], short: bool = False
+    ) -> pd.DataFrame:
+        """
+        Long while EMA_fast is above EMA_slow.
+        Args:
+            params (list): (fast, slow) period pairs.
+            short (bool): Short while EMA_fast is below EMA_slow.
+
+        Returns:
+            pd.DataFrame: METRICS of every (fast, slow, coin).
+        """
+        params = list(params)
+        spans = {s for pair in params for s in pair}
+        ema = {s: self.backend.ewm_mean(self.matrix, s) for s in spans}
+
+        def positions(batch):
+            fast = np.stack([ema[f] for f, _ in batch])
+            slow = np.stack([ema[s] for _, s in batch])
+            return crossover(fast, slow, short)
+
+        return self.__run(params, ["fast", "slow"], positions)
+
+    def rsi(
+        self, params: Iterable[Tuple[float, float]], short: bool = False
+    ) -> pd.DataFrame:
+        """
+        Long from RSI_2 below lower until it is above upper.
+        Args:
+            params (list): (lower, upper) level pairs.
+            short (bool): Also short above upper.
+
+        Returns:
+            pd.DataFrame: METRICS of every (lower, upper, coin).
+        """
+        params = list(params)
+        rsi = self.backend.rsi(self.matrix)["RSI_2"]
+
+        def positions(batch):
+            levels = np.array(batch, dtype=float)[:, :, None, None]
+            return thresholds(rsi[None], levels[:, 0], levels[:, 1], short)
+
+        return self.__run(params, ["lower", "upper"], positions)
+
+    def bollinger(
+        self, params: Iterable[Tuple[int, float]], short: bool = False
+    ) -> pd.DataFrame:
+        """
+        Long below SMA - width * std, until the price crosses the SMA.
+        Args:
+            params (list): (days, width) pairs. E.g., [(20, 2.0)]
+            short (bool): Also short above SMA + width * std.
+
+        Returns:
+            pd.DataFrame: METRICS of every (days, width, coin).
+        """
+        params = list(params)
+        moments = {
+            d: self.backend.rolling_moments(self.matrix, d)
+            for d in {d for d, _ in params}
+        }
+
+        def positions(batch):
+            sma = np.stack([moments[d][0] for d, _ in batch])
+            sd = np.stack([moments[d][1] for d, _ in batch])
+            width = np.array([w for _, w in batch])[:, None, None]
+            return band_reversion(
+                self.matrix[None],
+                sma + width * sd,
+                sma - width * sd,
+                sma,
+                short,
+            )
+
+        return self.__run(params, ["days", "width"], positions)
@@ -0,0 +1,121 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .price_indicators import IndicatorSpec, _indicator_specs, calculate
+
+BatchResult = Tuple[str, str, dict, pd.DataFrame]
+
+_prices: Optional[np.ndarray] = None
+_shm: Optional[shared_memory.SharedMemory] = None
+
+
+def _attach(name: str, size: int) -> None:
+    global _prices, _shm
+    _shm = shared_memory.SharedMemory(name=name)
+    _prices = np.ndarray((size,), dtype=np.float64, buffer=_shm.buf)
+
+
+def _run_job(
+    job: Tuple[int, int, str, dict, Optional[str]],
+) -> Dict[str, np.ndarray]:
+    start, stop, name, params, backend = job
+    assert _prices is not None
+    return calculate(name, _prices[start:stop], params, backend)
+
+
+class BatchRunner(object):
+    """
+    Run (coin, indicator, params) jobs on a process pool. All prices are
+    copied once into a shared memory block the workers read from, so only
+    job descriptions and indicator outputs cross process boundaries.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        chunksize: int = 16,
+        backend: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            max_workers (int): Number of worker processes. Default to the
+                               number of CPUs.
+            chunksize (int): Number of jobs sent to a worker at a time.
+            backend (str): Compute backend, see Indices.
+        """
+        self.max_workers = max_workers
+        self.chunksize = chunksize
+        self.backend = backend
+
+    def run(
+        self,
+        frames: Dict[str, pd.DataFrame],
+        indicators: Iterable[IndicatorSpec],
+        date_col: str = "date",
+        price_col: str = "price",
+    ) -> List[BatchResult]:
+        """
+        Calculate every indicator for every coin.
+        Args:
+            frames (dict): coin id to DataFrame with date and price columns,
+                           e.g. the result of MarketHistory.get_price calls.
+            indicators (list): Indicator names, or (name, params) tuples, as
+                               taken by Indices.compute. The same indicator
+                               may be given with several parameter sets.
+            date_col (str): Date column name.
+            price_col (str): Price column name.
+
+        Returns:
+            list: (coin id, indicator name, params, DataFrame) tuples ordered
+                  by coin, then by indicator as given. Every DataFrame has
+                  the date, the price and the indicator columns, newest
+                  first.
+        """
+        specs = _indicator_specs(indicators, unique=False)
+        data = {
+            coin_id: df.sort_values(by=date_col).reset_index(drop=True)
+            for coin_id, df in frames.items()
+        }
+        sizes = [len(df) for df in data.values()]
+        offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(int)
+        jobs = [
+            (offsets[i], offsets[i + 1], name, params, self.backend)
+            for i in range(len(data))
+            for name, params in specs
+        ]
+
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(int(offsets[-1]), 1) * 8
+        )
+        try:
+            prices: np.ndarray = np.ndarray(
+                (offsets[-1],), dtype=np.float64, buffer=shm.buf
+            )
+            for i, df in enumerate(data.values()):
+                prices[offsets[i] : offsets[i + 1]] = df[price_col]
+            del prices
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_attach,
+                initargs=(shm.name, int(offsets[-1])),
+            ) as executor:
+                outputs = list(
+                    executor.map(_run_job, jobs, chunksize=self.chunksize)
+                )
+        finally:
+            shm.close()
+            shm.unlink()
+
+        results: List[BatchResult] = []
+        job_outputs = iter(outputs)
+        for coin_id, df in data.items():
+            base = df[[date_col, price_col]]
+            for name, params in specs:
+                out = pd.concat([base, pd.DataFrame(next(job_outputs))], axis=1)
+                out = out.iloc[::-1].reset_index(drop=True)
+                results.append((coin_id, name, params, out))
+        return results
@@ -0,0 +1,244 @@
+import math
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from .backends import get_backend
+from .formats import require_pyarrow
+from .indicator_cache import WARMUP, _spans, bind_params
+from .price_indicators import (
+    INDICATORS,
+    IndicatorSpec,
+    _indicator_specs,
+    calculate,
+)
+
+PathLike = Union[str, Path]
+
+
+class _RollingCarry(object):
+    """
+    Rolling indicator over consecutive chunks. The last `warmup` prices are
+    kept and put in front of the next chunk.
+    """
+
+    def __init__(self, name: str, params: dict, backend: Optional[str]):
+        self.name = name
+        self.params = params
+        self.backend = backend
+        self.warmup = WARMUP[name](params)
+        self.tail = np.empty(0)
+
+    def update(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        extended = np.concatenate([self.tail, prices])
+        outputs = calculate(self.name, extended, self.params, self.backend)
+        self.tail = extended[max(len(extended) - self.warmup, 0) :]
+        skip = len(extended) - len(prices)
+        return {column: v[skip:] for column, v in outputs.items()}
+
+
+class _EmaCarry(object):
+    """
+    EMA based indicator over consecutive chunks. The state of each EMA is its
+    last value and the number of missing prices since its last observation;
+    they are put in front of the next chunk as the value followed by as many
+    NaN, which gives the EMA of the whole series.
+    """
+
+    def __init__(self, name: str, params: dict, backend: Optional[str]):
+        self.spans = _spans(name, params)
+        self.ewm_mean = get_backend(backend).ewm_mean
+        self.state: Dict[int, np.ndarray] = {}
+
+    def update(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        outputs = {}
+        for column, spans in self.spans.items():
+            emas = [self.__ema(span, prices) for span in spans]
+            outputs[column] = emas[0] if len(emas) == 1 else emas[0] - emas[1]
+        return outputs
+
+    def __ema(self, span: int, prices: np.ndarray) -> np.ndarray:
+        prefix = self.state.get(span, np.empty(0))
+        extended = np.concatenate([prefix, prices])
+        ema = self.ewm_mean(extended, span)
+        if len(extended) and not math.isnan(ema[-1]):
+            observed = np.flatnonzero(~np.isnan(extended))
+            missing = len(extended) - 1 - observed[-1]
+            self.state[span] = np.concatenate(
+                [ema[-1:], np.full(missing, np.nan)]
+            )
+        return ema[len(prefix) :]
+
+
+def read_chunks(
+    source: PathLike,
+    columns: Optional[List[str]] = None,
+    chunksize: int = 1_000_000,
+    date_col: Optional[str] = "date",
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV or Parquet file, or a directory of them, in chunks. Files of a
+    directory are read in name order, e.g. part-0000.parquet, part-0001...
+    Args:
+        source (str): File or directory path.
+        columns (list): Columns to read. Default to all columns.
+        chunksize (int): Maximum number of rows per chunk.
+        date_col (str): Column to parse as dates in CSV files.
+
+    Returns:
+        iterator: Pandas DataFrames
+    """
+    source = Path(source)
+    if source.is_dir():
+        paths = sorted(
+            p for p in source.iterdir() if p.suffix in (".csv", ".parquet")
+        )
+    else:
+        paths = [source]
+    for path in paths:
+        if path.suffix == ".parquet":
+            require_pyarrow("Reading Parquet files")
+            import pyarrow.parquet as pq
+
+            parquet = pq.ParquetFile(path)
+            for batch in parquet.iter_batches(chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            parse_dates = [date_col] if date_col else False
+            yield from pd.read_csv(
+                path,
+                usecols=columns,
+                parse_dates=parse_dates,
+                chunksize=chunksize,
+            )
+
+
+class _ChunkWriter(object):
+    def __init__(self, dest: PathLike) -> None:
+        self.dest = Path(dest)
+        self.parquet = self.dest.suffix == ".parquet"
+        if self.parquet:
+            require_pyarrow("Writing Parquet files")
+        self.writer: Any = None
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.dest, table.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(
+                self.dest,
+                mode="a" if self.rows else "w",
+                header=not self.rows,
+                index=False,
+            )
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+
+
+class ChunkedIndices(object):
+    """
+    Out-of-core indicators for series which don't fit in memory. Chunks of a
+    series are processed in date order, carrying the rolling windows and the
+    EMA states across chunk boundaries, so the output is the one
+    Indices.compute would give for the whole series, in date order.
+    """
+
+    def __init__(
+        self,
+        indicators: Iterable[IndicatorSpec] = tuple(INDICATORS),
+        date_col: str = "date",
+        price_col: str = "price",
+        backend: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            indicators (list): Indicator names, or (name, params) tuples, as
+                               taken by Indices.compute.
+            date_col (str): Date column name.
+            price_col (str): Price column name.
+            backend (str): Compute backend, see Indices.
+        """
+        self.specs = _indicator_specs(indicators)
+        self.date_col = date_col
+        self.price_col = price_col
+        self.backend = backend
+
+    def process(self, chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Calculate the indicators chunk by chunk.
+        Args:
+            chunks (iterable): DataFrames with date and price columns, in
+                               ascending date order within and across chunks.
+
+        Returns:
+            iterator: One DataFrame per chunk, with the indicator columns
+                      added. Rows without a value hold NaN.
+        """
+        carries: List[Union[_RollingCarry, _EmaCarry]] = []
+        for name, params in self.specs:
+            params = bind_params(name, params, self.backend)
+            if name in WARMUP:
+                carries.append(_RollingCarry(name, params, self.backend))
+            else:
+                carries.append(_EmaCarry(name, params, self.backend))
+        last = None
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            dates = chunk[self.date_col]
+            if not dates.is_monotonic_increasing or (
+                last is not None and dates.iloc[0] < last
+            ):
+                raise ValueError(
+                    "Chunks must be in ascending {!r} order".format(
+                        self.date_col
+                    )
+                )
+            last = dates.iloc[-1]
+            prices = chunk[self.price_col].to_numpy(dtype=float)
+            data = chunk.copy(deep=False)
+            for carry in carries:
+                for column, values in carry.update(prices).items():
+                    data[column] = values
+            yield data
+
+    def run(
+        self,
+        source: PathLike,
+        dest: PathLike,
+        chunksize: int = 1_000_000,
+    ) -> int:
+        """
+        Calculate the indicators of a CSV or Parquet dataset into a CSV or
+        Parquet file, holding one chunk in memory at a time.
+        Args:
+            source (str): File or directory, see read_chunks.
+            dest (str): Output file, Parquet if it ends with ".parquet",
+                        else CSV.
+            chunksize (int): Maximum number of rows per chunk.
+
+        Returns:
+            int: Number of rows written
+        """
+        chunks = read_chunks(
+            source, [self.date_col, self.price_col], chunksize, self.date_col
+        )
+        writer = _ChunkWriter(dest)
+        try:
+            for data in self.process(chunks):
+                writer.write(data)
+        finally:
+            writer.close()
+        return writer.rows
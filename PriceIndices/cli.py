@@ -0,0 +1,86 @@
+"""
+`priceindices` command: run a Pipeline from a config file and/or options.
+
+    priceindices --config pipeline.json
+    priceindices --coins bitcoin,ethereum --start 2021-01-01 \\
+        --end 2021-06-01 --indicators rsi,macd --plots --output-dir out
+"""
+
+import argparse
+import logging
+import sys
+from typing import List, Optional
+
+from .pipeline import Pipeline, load_config
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="priceindices",
+        description="Fetch prices, calculate indicators and render charts "
+        "of many coins. Reruns only redo failed or stale coins.",
+    )
+    parser.add_argument("--config", help="JSON or TOML pipeline config.")
+    parser.add_argument("--coins", help="Comma separated coin names.")
+    parser.add_argument("--start", dest="start_date", help="YYYY-MM-DD")
+    parser.add_argument("--end", dest="end_date", help="YYYY-MM-DD")
+    parser.add_argument("--indicators", help="Comma separated indicator names.")
+    parser.add_argument(
+        "--plots",
+        action="store_true",
+        default=None,
+        help="Render a chart of every indicator.",
+    )
+    parser.add_argument("--output-dir", dest="output_dir")
+    parser.add_argument("--store", help="PriceStore file to read through.")
+    parser.add_argument(
+        "--base-url", dest="base_url", help="OHLCV historical endpoint."
+    )
+    parser.add_argument("--fetch-workers", dest="fetch_workers", type=int)
+    parser.add_argument("--compute-workers", dest="compute_workers", type=int)
+    parser.add_argument("--queue-size", dest="queue_size", type=int)
+    parser.add_argument(
+        "--max-age",
+        dest="max_age",
+        type=float,
+        help="Seconds after which finished coins are redone.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Entry point of the priceindices command.
+
+    Returns:
+        int: 0 when every coin is done or skipped, 1 when some failed and 2
+             for an invalid config.
+    """
+    args = parse_args(argv)
+    config = load_config(args.config) if args.config else {}
+    options = {k: v for k, v in vars(args).items() if v is not None}
+    options.pop("config", None)
+    for key in ["coins", "indicators"]:
+        if key in options:
+            options[key] = [v.strip() for v in options[key].split(",") if v]
+    config.update(options)
+    missing = [
+        key for key in ["coins", "start_date", "end_date"] if key not in config
+    ]
+    if missing:
+        print("Missing " + ", ".join(missing), file=sys.stderr)
+        return 2
+    try:
+        pipeline = Pipeline(**config)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    status = pipeline.run()
+    counts = {s: list(status.values()).count(s) for s in set(status.values())}
+    print(", ".join(f"{n} {s}" for s, n in sorted(counts.items())))
+    return 0 if "failed" not in counts else 1
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
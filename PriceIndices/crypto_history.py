@@ -1,49 +1,318 @@
 import warnings
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+
+from . import instrumentation
+from .formats import check_options, format_frame
+from .history_cache import HistoryCache
+from .scheduler import BATCH, INTERACTIVE, RequestScheduler
+
+if TYPE_CHECKING:
+    from .store import PriceStore
+
+try:
+    import orjson as json_lib
+except ImportError:  # pragma: no cover
+    import json as json_lib  # type: ignore
 
 warnings.filterwarnings("ignore")
 
+QUOTE_COLUMNS = ["open", "high", "low", "close", "volume", "market_cap"]
+
+
+def parse_quotes(raw: bytes, string_dates: bool = False) -> pd.DataFrame:
+    """
+    Parse a CoinMarketCap OHLCV response into a DataFrame, newest first.
+    Columns are built straight from the decoded JSON and dates are converted
+    in one vectorized pass.
+    Args:
+        raw (bytes): Response body.
+        string_dates (bool): Keep "date" as 'YYYY-MM-DD' strings instead of
+                             datetime64.
+
+    Returns:
+        pd.DataFrame: Pandas DataFrame
+    """
+    with instrumentation.timer("parse.json_decode"):
+        data = json_lib.loads(raw)
+    with instrumentation.timer("parse.frame_build"):
+        quotes = [q["quote"]["USD"] for q in data["data"]["quotes"]]
+        keys = [k for k in quotes[0] if k != "timestamp"] if quotes else []
+        columns = {
+            key: np.array([q.get(key) for q in quotes], dtype=float)
+            for key in keys or QUOTE_COLUMNS
+        }
+        # Timestamps are UTC ISO-8601 strings, the day is their first 10
+        # chars.
+        days = np.array([q["timestamp"][:10] for q in quotes], dtype="M8[D]")
+        order = np.argsort(days, kind="stable")[::-1]
+        days = days[order]
+
+        df = pd.DataFrame(
+            {key: values[order] for key, values in columns.items()}
+        )
+        df["date"] = days.astype(str) if string_dates else days.astype("M8[ns]")
+    return df
+
+
+class HistoryBatch(dict):
+    """
+    Result of MarketHistory.get_histories: a dict of coin id to DataFrame for
+    the coins which were fetched, with per coin failures in `errors`.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.errors: Dict[str, Exception] = {}
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Stack all fetched coins into one long format DataFrame.
+        Returns:
+            pd.DataFrame: Pandas DataFrame with a "coin" column
+        """
+        if not self:
+            return pd.DataFrame(columns=["coin"])
+        frames = [df.assign(coin=coin_id) for coin_id, df in self.items()]
+        return pd.concat(frames, ignore_index=True)
+
 
 class MarketHistory(object):
     __Crypto_Market_Base_URL = "https://web-api.coinmarketcap.com/v1/cryptocurrency/ohlcv/historical?convert=USD&slug="  # noqa
 
     def __init__(
-        self, base_url: Optional[str] = __Crypto_Market_Base_URL
+        self,
+        base_url: Optional[str] = __Crypto_Market_Base_URL,
+        pool_size: int = 10,
+        rate_limit: Optional[float] = None,
+        scheduler: Optional[RequestScheduler] = None,
+        cache: Optional[HistoryCache] = None,
+        store: Optional["PriceStore"] = None,
+        string_dates: bool = False,
+        float_dtype: str = "float64",
+        date_dtype: Optional[str] = None,
+        dtype_backend: Optional[str] = None,
     ) -> None:
+        """
+        Args:
+            base_url (str): CoinMarketCap OHLCV historical endpoint.
+            pool_size (int): Number of kept alive connections per host.
+            rate_limit (float): Maximum requests per second. Default to
+                                None (no limit).
+            scheduler (RequestScheduler): Rate limit, adaptive concurrency
+                                          and priorities of the requests.
+                                          Default to a RequestScheduler
+                                          with rate_limit.
+            cache (HistoryCache): Optional local cache. Only date ranges
+                                  missing from it are downloaded.
+            store (PriceStore): Optional local store to read through, like
+                                cache: only date ranges missing from it are
+                                downloaded, and upserted into it.
+            string_dates (bool): Return "date" as 'YYYY-MM-DD' strings like
+                                 earlier versions instead of datetime64.
+            float_dtype (str): "float64" or "float32" price and volume
+                               columns.
+            date_dtype (str): None, "datetime64" or "category" date column.
+            dtype_backend (str): None for NumPy dtypes, or "pyarrow" for
+                                 Arrow backed DataFrames (needs pyarrow).
+        """
+        check_options(float_dtype, date_dtype, dtype_backend)
         self.base_url = base_url
         self.request_timeout = 120
+        self.chunk_workers = 4
+        self.chunk_retries = 2
+        self.scheduler = scheduler or RequestScheduler(rate=rate_limit)
+        if cache is not None and store is not None:
+            raise ValueError("Pass either cache or store, not both.")
+        self.store = store
+        self.cache = cache if cache is not None else store
+        self.string_dates = string_dates
+        self.float_dtype = float_dtype
+        self.date_dtype = date_dtype
+        self.dtype_backend = dtype_backend
+
+        # The network stack is only imported once a MarketHistory is made.
+        import requests
+        from requests.adapters import HTTPAdapter
+        from requests.packages.urllib3.util.retry import Retry
 
         self.session = requests.Session()
+        # 429 and 503 are left to the scheduler, which backs off and
+        # lowers the concurrency limit.
         retries = Retry(
-            total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504]
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[502, 504],
+            respect_retry_after_header=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retries,
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
         )
-        self.session.mount("http://", HTTPAdapter(max_retries=retries))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-    def __request(self, url: str) -> Optional[pd.DataFrame]:
-        try:
-            response = self.session.get(url, timeout=self.request_timeout)
-            response.raise_for_status()
-            content = response.json()
-
-            d = content["data"]["quotes"]
-            df = pd.DataFrame([v["quote"]["USD"] for v in d])
-            df.sort_values("timestamp", ascending=False, inplace=True)
-            df.reset_index(drop=True, inplace=True)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df["date"] = df["timestamp"].apply(lambda x: x.strftime("%Y-%m-%d"))
-
-            del df["timestamp"]
+    def __url(self, coin_id: str, start_date: str, end_date: str) -> str:
+        return "{0}{1}&time_end={2}&time_start={3}".format(
+            self.base_url, coin_id, end_date, start_date
+        )
+
+    def __fetch(
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+        priority: int = INTERACTIVE,
+    ) -> Optional[pd.DataFrame]:
+        df = self.__download(
+            coin_id, start_date, end_date, chunk_days, priority
+        )
+        if df is None:
             return df
-        except Exception as e:
-            raise e
+        return format_frame(
+            df,
+            [c for c in df.columns if c != "date"],
+            "date",
+            self.float_dtype,
+            self.date_dtype,
+            self.dtype_backend,
+        )
+
+    def __download(
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+        priority: int = INTERACTIVE,
+    ) -> Optional[pd.DataFrame]:
+        if self.cache is None:
+            return self.__download_range(
+                coin_id, start_date, end_date, chunk_days, priority
+            )
+        # The coin stays pinned from the coverage lookup until its candles
+        # are read back, so no other request evicts it in between.
+        with self.cache.pinned(coin_id):
+            ranges = self.cache.missing(coin_id, start_date, end_date)
+            instrumentation.count(
+                "cache.miss" if ranges else "cache.hit", cache="history"
+            )
+            windows = {
+                r: _windows(*r, chunk_days) if chunk_days else [r]
+                for r in ranges
+            }
+            frames = self.__fetch_windows(
+                coin_id, [w for r in ranges for w in windows[r]], priority
+            )
+            # One write per missing range, from this thread, once all of its
+            # windows arrived: its coverage is only recorded with all its
+            # candles.
+            for r in ranges:
+                self.cache.write(
+                    coin_id,
+                    pd.concat([frames[w] for w in windows[r]]),
+                    *r,
+                )
+            df = self.cache.read(coin_id, start_date, end_date)
+        if df is None:
+            # The cache file was removed meanwhile, e.g. by another process.
+            return self.__download_range(
+                coin_id, start_date, end_date, chunk_days, priority
+            )
+        if not self.string_dates:
+            df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def __download_range(
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+        priority: int = INTERACTIVE,
+    ) -> Optional[pd.DataFrame]:
+        windows = [(start_date, end_date)]
+        if chunk_days:
+            windows = _windows(start_date, end_date, chunk_days)
+        if len(windows) == 1:
+            return self.__request(
+                self.__url(coin_id, start_date, end_date), priority
+            )
+        frames = self.__fetch_windows(coin_id, windows, priority)
+        df = pd.concat(frames.values(), ignore_index=True)
+        df = df.drop_duplicates("date", keep="last")
+        df = df.sort_values("date", ascending=False, ignore_index=True)
+        return df
+
+    def __fetch_windows(
+        self, coin_id: str, windows: List[Tuple[str, str]], priority: int
+    ) -> Dict[Tuple[str, str], pd.DataFrame]:
+        # Windows are fetched concurrently and only the failed ones retried.
+        frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        pending = windows
+        with ThreadPoolExecutor(max_workers=self.chunk_workers) as executor:
+            for attempt in range(self.chunk_retries + 1):
+                futures = {
+                    window: executor.submit(
+                        self.__request, self.__url(coin_id, *window), priority
+                    )
+                    for window in pending
+                }
+                pending = []
+                for window, future in futures.items():
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        if attempt == self.chunk_retries:
+                            raise e
+                        pending.append(window)
+                        continue
+                    if df is not None:
+                        frames[window] = df
+                if not pending:
+                    break
+        return {window: frames[window] for window in windows}
+
+    def __request(
+        self, url: str, priority: int = INTERACTIVE
+    ) -> Optional[pd.DataFrame]:
+        for retry in range(self.scheduler.max_retries + 1):
+            self.scheduler.acquire(priority)
+            response = None
+            try:
+                with instrumentation.timer("http.request") as timer:
+                    response = self.session.get(
+                        url, timeout=self.request_timeout
+                    )
+                    timer.attrs["status"] = response.status_code
+            finally:
+                if response is None:
+                    self.scheduler.release()
+                else:
+                    throttled = self.scheduler.release(
+                        response.status_code, response.headers
+                    )
+            if not throttled:
+                break
+            instrumentation.count("http.retry", status=response.status_code)
+        assert response is not None
+        response.raise_for_status()
+        instrumentation.count("http.bytes", len(response.content))
+        return parse_quotes(response.content, self.string_dates)
 
     def get_history(
-        self, coin_id: str, start_date: str, end_date: str
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
+        raise_errors: bool = False,
     ) -> Optional[pd.DataFrame]:
         """
         Get historical market data of a cryptocurrency from CoinMarketCap.
@@ -51,17 +320,22 @@ class MarketHistory(object):
             coin_id (str): coin name. E.g., bitcoin
             start_date (str): Starting date in 'YYYY-MM-DD' format
             end_date (str): End date in 'YYYY-MM-DD' format
+            chunk_days (int): Split the range into windows of this many days
+                              which are fetched concurrently. Failed windows
+                              are retried on their own. Default to None (one
+                              request).
+            raise_errors (bool): Raise errors instead of printing them and
+                                 returning None.
         Returns:
             pd.DataFrame: Pandas Dataframe or print error message
 
         """
-        url = "{0}{1}&time_end={2}&time_start={3}".format(
-            self.base_url, coin_id, end_date, start_date
-        )
-
         try:
-            return self.__request(url)
+            return self.__fetch(coin_id, start_date, end_date, chunk_days)
         except Exception as e:
+            instrumentation.count("history.error", error=type(e).__name__)
+            if raise_errors:
+                raise
             print(e)
             print(
                 "Please, check inputs. Coin id, and dates are strings. Date "
@@ -70,7 +344,11 @@ class MarketHistory(object):
             return None
 
     def get_price(
-        self, coin_id: str, start_date: str, end_date: str
+        self,
+        coin_id: str,
+        start_date: str,
+        end_date: str,
+        chunk_days: Optional[int] = None,
     ) -> Optional[pd.DataFrame]:
         """
         Get historical market price data (closing price) of a cryptocurrency
@@ -79,25 +357,81 @@ class MarketHistory(object):
             coin_id (str): coin name
             start_date (str): Starting date in 'YYYY-MM-DD' format
             end_date (str): End date in 'YYYY-MM-DD' format
+            chunk_days (int): See get_history.
 
         Returns:
             pd.DataFrame: Pandas Dataframe or print error message
 
         """
-        url = "{0}{1}&time_end={2}&time_start={3}".format(
-            self.base_url, coin_id, end_date, start_date
-        )
-
         try:
-            df = self.__request(url)
+            df = self.__fetch(coin_id, start_date, end_date, chunk_days)
             assert type(df) == pd.DataFrame
             df = df[["date", "close"]]
             df.columns = ["date", "price"]
             return df
         except Exception as e:
+            instrumentation.count("history.error", error=type(e).__name__)
             print(
                 e,
                 "Please, check inputs Coin id, and dates are strings. Date "
                 'format is "YYYY-MM-DD"',
             )
             return None
+
+    def get_histories(
+        self,
+        coin_ids: Iterable[str],
+        start_date: str,
+        end_date: str,
+        max_workers: int = 8,
+        chunk_days: Optional[int] = None,
+    ) -> HistoryBatch:
+        """
+        Get historical market data of many cryptocurrencies concurrently.
+        Requests share the connection pool and the scheduler of this
+        MarketHistory, queued behind get_history and get_price requests.
+        Args:
+            coin_ids (list): coin names. E.g., ["bitcoin", "ethereum"]
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            max_workers (int): Maximum number of coins fetched at once.
+            chunk_days (int): See get_history.
+
+        Returns:
+            HistoryBatch: dict of coin id to Pandas DataFrame. Coins which
+                          could not be fetched are reported in `errors`.
+        """
+        coin_ids = list(dict.fromkeys(coin_ids))
+        batch = HistoryBatch()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                coin_id: executor.submit(
+                    self.__fetch,
+                    coin_id,
+                    start_date,
+                    end_date,
+                    chunk_days,
+                    BATCH,
+                )
+                for coin_id in coin_ids
+            }
+            for coin_id, future in futures.items():
+                try:
+                    batch[coin_id] = future.result()
+                except Exception as e:
+                    batch.errors[coin_id] = e
+        return batch
+
+
+def _windows(
+    start_date: str, end_date: str, days: int
+) -> List[Tuple[str, str]]:
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    windows = []
+    while start < end:
+        stop = min(start + timedelta(days=days), end)
+        windows.append((start.strftime("%Y-%m-%d"), stop.strftime("%Y-%m-%d")))
+        start = stop
+    # An empty range is still one (empty) request.
+    return windows or [(start_date, end_date)]
@@ -0,0 +1,89 @@
+"""
+Output dtypes of the DataFrames returned by Indices and MarketHistory.
+"""
+
+from importlib.util import find_spec
+from typing import List, Optional
+
+import pandas as pd
+
+FLOAT_DTYPES = ("float64", "float32")
+DATE_DTYPES = (None, "datetime64", "category")
+DTYPE_BACKENDS = (None, "pyarrow")
+
+
+def check_options(
+    float_dtype: str = "float64",
+    date_dtype: Optional[str] = None,
+    dtype_backend: Optional[str] = None,
+) -> None:
+    """
+    Raise ValueError for an unknown output option.
+    """
+    for name, value, choices in [
+        ("float_dtype", float_dtype, FLOAT_DTYPES),
+        ("date_dtype", date_dtype, DATE_DTYPES),
+        ("dtype_backend", dtype_backend, DTYPE_BACKENDS),
+    ]:
+        if value not in choices:
+            raise ValueError(
+                "Unknown {} {!r}, choose from {}".format(
+                    name, value, ", ".join(map(str, choices))
+                )
+            )
+    if dtype_backend == "pyarrow":
+        require_pyarrow('dtype_backend="pyarrow"')
+
+
+def require_pyarrow(feature: str) -> None:
+    """
+    Raise ImportError naming the pyarrow extra when pyarrow is missing.
+    Args:
+        feature (str): What needs pyarrow, for the message.
+    """
+    if find_spec("pyarrow") is None:
+        raise ImportError(
+            "{} needs pyarrow, install it with "
+            "`pip install PriceIndices[pyarrow]`.".format(feature)
+        )
+
+
+def format_frame(
+    df: pd.DataFrame,
+    float_columns: List[str],
+    date_col: Optional[str] = "date",
+    float_dtype: str = "float64",
+    date_dtype: Optional[str] = None,
+    dtype_backend: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Convert the dtypes of a result DataFrame.
+    Args:
+        df (pd.DataFrame): Result to convert.
+        float_columns (list): Columns to store as float_dtype.
+        date_col (str): Date column name, None if there is none.
+        float_dtype (str): "float64" or "float32".
+        date_dtype (str): None to keep the date column as it is, "datetime64"
+                          or "category".
+        dtype_backend (str): None for NumPy dtypes, or "pyarrow" for Arrow
+                             backed columns (needs pyarrow).
+
+    Returns:
+        pd.DataFrame: Pandas DataFrame
+    """
+    dtypes = {}
+    if float_dtype != "float64":
+        dtypes.update(dict.fromkeys(float_columns, float_dtype))
+    if date_col is not None and date_col in df.columns:
+        if date_dtype == "datetime64":
+            df = df.assign(**{date_col: pd.to_datetime(df[date_col])})
+        elif date_dtype == "category":
+            dtypes[date_col] = "category"
+    if dtypes:
+        df = df.astype(dtypes)
+    if dtype_backend == "pyarrow":
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df)
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
+    return df
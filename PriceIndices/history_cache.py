@@ -0,0 +1,246 @@
+import os
+import sqlite3
+import threading
+from collections import defaultdict
+from contextlib import closing, contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+from pandas.io.sql import DatabaseError
+
+DateRange = Tuple[str, str]
+
+
+class HistoryCache(object):
+    """
+    Local on-disk cache of daily candles, one SQLite file per coin.
+
+    Ranges follow the CoinMarketCap request semantics: a range
+    (start_date, end_date) holds the candles dated after start_date up to and
+    including end_date. The candle of the current (still open) UTC day is
+    never treated as cached and is fetched again on the next request.
+
+    Eviction skips the coins pinned by a request in flight, or locked by a
+    write.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = ".priceindices_cache",
+        max_bytes: Optional[int] = 256 * 1024 * 1024,
+    ) -> None:
+        """
+        Args:
+            cache_dir (str): Directory to keep cache files in.
+            max_bytes (int): Upper bound of total cache size. Least recently
+                             used coins are evicted above it. None disables
+                             eviction.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._coin_locks: Dict[str, threading.RLock] = {}
+        self._pins: Dict[str, int] = defaultdict(int)
+
+    def path(self, coin_id: str) -> Path:
+        return self.cache_dir.joinpath(f"{coin_id}.sqlite")
+
+    def __coin_lock(self, coin_id: str) -> threading.RLock:
+        with self._lock:
+            return self._coin_locks.setdefault(coin_id, threading.RLock())
+
+    @contextmanager
+    def pinned(self, coin_id: str) -> Iterator[None]:
+        """
+        Keep a coin from being evicted, and hold its lock, for the block: a
+        request writing candles in it can read them back in it.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+        """
+        with self._lock:
+            self._pins[coin_id] += 1
+        try:
+            with self.__coin_lock(coin_id):
+                yield
+        finally:
+            with self._lock:
+                self._pins[coin_id] -= 1
+                if not self._pins[coin_id]:
+                    del self._pins[coin_id]
+
+    def __connect(self, coin_id: str) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path(coin_id))
+        con.execute(
+            'CREATE TABLE IF NOT EXISTS coverage ("start" TEXT, "end" TEXT)'
+        )
+        return con
+
+    def covered(self, coin_id: str) -> List[DateRange]:
+        """
+        Merged date ranges already stored for a coin.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+        Returns:
+            list: Sorted, non overlapping (start_date, end_date) tuples
+        """
+        if not self.path(coin_id).exists():
+            return []
+        with closing(self.__connect(coin_id)) as con:
+            rows = con.execute('SELECT "start", "end" FROM coverage').fetchall()
+        return _merge(rows)
+
+    def missing(
+        self, coin_id: str, start_date: str, end_date: str
+    ) -> List[DateRange]:
+        """
+        Date ranges of a request which are not in the cache yet.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+        Returns:
+            list: (start_date, end_date) tuples to fetch
+        """
+        return _gaps(self.covered(coin_id), start_date, end_date)
+
+    def read(
+        self, coin_id: str, start_date: str, end_date: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Cached candles of a coin, newest first.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+        Returns:
+            pd.DataFrame: Pandas DataFrame, or None when the coin's file is
+                          gone, e.g. evicted by another process.
+        """
+        path = self.path(coin_id)
+        try:
+            # mode=rw does not create a file which was removed.
+            con = sqlite3.connect(f"file:{path}?mode=rw", uri=True)
+        except sqlite3.OperationalError:
+            return None
+        with closing(con):
+            try:
+                df = pd.read_sql(
+                    'SELECT * FROM candles WHERE "date" > ? AND "date" <= ? '
+                    'ORDER BY "date" DESC',
+                    con,
+                    params=(start_date, end_date),
+                )
+            except DatabaseError:
+                return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return df
+
+    def write(
+        self, coin_id: str, df: pd.DataFrame, start_date: str, end_date: str
+    ) -> None:
+        """
+        Merge freshly fetched candles of a coin into the cache: candles of
+        the same dates are replaced, in one transaction, and the range is
+        only recorded as covered once they are stored.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+            df (pd.DataFrame): Candles with a "date" column.
+            start_date (str): Starting date of the fetched range
+            end_date (str): End date of the fetched range
+        """
+        dates = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        df = df.assign(date=dates)
+        lock = self.__coin_lock(coin_id)
+        with lock, closing(self.__connect(coin_id)) as con:
+            with con:
+                exists = con.execute(
+                    "SELECT name FROM sqlite_master WHERE name = 'candles'"
+                ).fetchone()
+                if exists:
+                    con.executemany(
+                        'DELETE FROM candles WHERE "date" = ?',
+                        [(d,) for d in df["date"]],
+                    )
+                df.to_sql("candles", con, if_exists="append", index=False)
+
+            end_date = min(end_date, _today(-1))
+            if start_date < end_date:
+                with con:
+                    con.execute(
+                        "INSERT INTO coverage VALUES (?, ?)",
+                        (start_date, end_date),
+                    )
+        self.evict(keep=coin_id)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Remove least recently used coins until the cache fits in max_bytes.
+        Args:
+            keep (str): coin name which must not be evicted.
+        """
+        if self.max_bytes is None:
+            return
+        with self._lock:
+            sizes: Dict[Path, Tuple[float, int]] = {}
+            for f in self.cache_dir.glob("*.sqlite"):
+                try:
+                    stat = f.stat()
+                except FileNotFoundError:
+                    continue
+                sizes[f] = (stat.st_mtime, stat.st_size)
+            total = sum(size for _, size in sizes.values())
+            for f in sorted(sizes, key=lambda f: sizes[f][0]):
+                if total <= self.max_bytes:
+                    break
+                if f.stem == keep or self._pins.get(f.stem):
+                    continue
+                lock = self._coin_locks.get(f.stem)
+                if lock is not None and not lock.acquire(blocking=False):
+                    continue
+                try:
+                    f.unlink()
+                except FileNotFoundError:
+                    pass
+                finally:
+                    if lock is not None:
+                        lock.release()
+                total -= sizes[f][1]
+
+
+def _merge(ranges: List[DateRange]) -> List[DateRange]:
+    merged: List[DateRange] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _gaps(
+    covered: List[DateRange], start_date: str, end_date: str
+) -> List[DateRange]:
+    gaps = []
+    cursor = start_date
+    for start, end in covered:
+        if end <= cursor:
+            continue
+        if start >= end_date:
+            break
+        if start > cursor:
+            gaps.append((cursor, start))
+        cursor = end
+    if cursor < end_date:
+        gaps.append((cursor, end_date))
+    return gaps
+
+
+def _today(offset: int = 0) -> str:
+    day = datetime.now(timezone.utc) + timedelta(days=offset)
+    return day.strftime("%Y-%m-%d")
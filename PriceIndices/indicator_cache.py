@@ -0,0 +1,305 @@
+import hashlib
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import instrumentation
+from .backends import get_backend
+from .price_indicators import calculate
+
+Outputs = Dict[str, np.ndarray]
+
+# Rows of history, before the first new row, which a rolling indicator
+# reads. Recursive indicators (macd, ema) carry their EMA state instead.
+WARMUP = {
+    "vola_index": lambda params: params["volatile_period"],
+    "rsi": lambda params: 15,
+    "bollinger_bands": lambda params: params["days"] - 1,
+    "sma": lambda params: params["days"] - 1,
+}
+
+
+def _spans(name: str, params: dict) -> Dict[str, Tuple[int, ...]]:
+    # Output column to the EMA spans it is made of.
+    if name == "macd":
+        return {"MACD": (12, 26)}
+    return {"EMA_{}".format(p): (p,) for p in params["periods"]}
+
+
+def bind_params(
+    name: str, params: Optional[dict], backend: Optional[str] = None
+) -> dict:
+    """
+    Indicator params with the defaults of the backend kernel filled in.
+    """
+    kernel = getattr(get_backend(backend), name)
+    bound = inspect.signature(kernel).bind(None, **(params or {}))
+    bound.apply_defaults()
+    return {k: v for k, v in bound.arguments.items() if k != "prices"}
+
+
+def fingerprint(prices: np.ndarray) -> str:
+    """
+    Cheap digest of a price array.
+    Args:
+        prices (np.ndarray): Prices in date order.
+
+    Returns:
+        str: Hex digest
+    """
+    data = np.ascontiguousarray(prices, dtype=np.float64)
+    return hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
+
+
+class _Entry(object):
+    def __init__(self, outputs: Outputs, state: Dict[int, float]) -> None:
+        self.outputs = outputs
+        self.state = state
+        self.nbytes = sum(v.nbytes for v in outputs.values())
+
+
+class IndicatorCache(object):
+    """
+    Memoized indicator results, keyed by a fingerprint of the price array,
+    the indicator name, its parameters and the backend. Entries live in
+    memory with least recently used eviction above `max_bytes`, and
+    optionally in a directory shared by several processes.
+
+    When a price array extends a cached one with new rows, only the new rows
+    are calculated, from the last rows of the cached history (rolling
+    indicators) or from the cached EMA state (macd, ema).
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+        cache_dir: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            max_bytes (int): Upper bound of the memory used by results. Least
+                             recently used results are evicted above it.
+                             None disables eviction.
+            cache_dir (str): Directory to also keep results in, so other
+                             processes can reuse them. Default to None
+                             (memory only).
+        """
+        self.max_bytes = max_bytes
+        self.cache_dir = None if cache_dir is None else Path(cache_dir)
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.extends = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lengths: Dict[str, Dict[int, str]] = {}
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def calculate(
+        self,
+        name: str,
+        prices: np.ndarray,
+        params: Optional[dict] = None,
+        backend: Optional[str] = None,
+    ) -> Outputs:
+        """
+        Cached version of price_indicators.calculate, for one price series.
+        Args:
+            name (str): Indicator name, one of INDICATORS.
+            prices (np.ndarray): Prices in date order.
+            params (dict): Keyword arguments of the indicator.
+            backend (str): Compute backend name.
+
+        Returns:
+            dict: Output column name to values, which the caller may modify.
+        """
+        compute = get_backend(backend)
+        params = bind_params(name, params, backend)
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        family = hashlib.blake2b(
+            repr((name, sorted(params.items()), compute.name)).encode(),
+            digest_size=8,
+        ).hexdigest()
+        key = self.__key(family, len(prices), fingerprint(prices))
+
+        entry = self.__get(family, key)
+        if entry is not None:
+            self.hits += 1
+            instrumentation.count("cache.hit", cache="indicator")
+        else:
+            instrumentation.count("cache.miss", cache="indicator")
+            entry = self.__extend(family, name, prices, params, backend)
+            if entry is not None:
+                self.extends += 1
+            else:
+                self.misses += 1
+                entry = self.__compute(name, prices, params, backend)
+            self.__put(family, key, entry)
+        return {column: v.copy() for column, v in entry.outputs.items()}
+
+    def clear(self) -> None:
+        """
+        Drop all results from memory and from cache_dir.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._lengths.clear()
+            self._nbytes = 0
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob("*.npz"):
+                path.unlink()
+
+    @staticmethod
+    def __key(family: str, length: int, digest: str) -> str:
+        return "{}-{}-{}".format(family, length, digest)
+
+    def __compute(
+        self,
+        name: str,
+        prices: np.ndarray,
+        params: dict,
+        backend: Optional[str],
+    ) -> _Entry:
+        state: Dict[int, float] = {}
+        if name in WARMUP:
+            return _Entry(calculate(name, prices, params, backend), state)
+        ewm_mean = get_backend(backend).ewm_mean
+        outputs = {}
+        for column, spans in _spans(name, params).items():
+            emas = [ewm_mean(prices, span) for span in spans]
+            for span, ema in zip(spans, emas):
+                state[span] = float(ema[-1]) if len(ema) else np.nan
+            outputs[column] = emas[0] if len(emas) == 1 else emas[0] - emas[1]
+        return _Entry(outputs, state)
+
+    def __extend(
+        self,
+        family: str,
+        name: str,
+        prices: np.ndarray,
+        params: dict,
+        backend: Optional[str],
+    ) -> Optional[_Entry]:
+        # Longest cached prefix of prices, if any.
+        n = len(prices)
+        for m in sorted(self.__lengths(family), reverse=True):
+            if m >= n or m == 0:
+                continue
+            key = self.__key(family, m, fingerprint(prices[:m]))
+            cached = self.__get(family, key)
+            if cached is None:
+                continue
+            if name in WARMUP:
+                warmup = WARMUP[name](params)
+                if m < warmup:
+                    return None
+                tail = calculate(name, prices[m - warmup :], params, backend)
+                state: Dict[int, float] = {}
+                new = {column: v[warmup:] for column, v in tail.items()}
+            else:
+                new, state = self.__extend_ema(cached, prices, m, name, params)
+                if not new:
+                    return None
+            outputs = {
+                column: np.concatenate([v, new[column]])
+                for column, v in cached.outputs.items()
+            }
+            return _Entry(outputs, state)
+        return None
+
+    @staticmethod
+    def __extend_ema(
+        cached: _Entry, prices: np.ndarray, m: int, name: str, params: dict
+    ) -> Tuple[Outputs, Dict[int, float]]:
+        # EMA with adjust=False only carries its last value when neither the
+        # last cached price nor any new price is missing.
+        tail = prices[m:]
+        values = list(cached.state.values())
+        if np.isnan(prices[m - 1]) or np.isnan(tail).any():
+            return {}, {}
+        if np.isnan(values).any():
+            return {}, {}
+        state = {}
+        outputs = {}
+        for column, spans in _spans(name, params).items():
+            emas = []
+            for span in spans:
+                alpha = 2.0 / (span + 1.0)
+                ema = np.empty(len(tail))
+                value = cached.state[span]
+                for i, x in enumerate(tail):
+                    value = value + alpha * (x - value)
+                    ema[i] = value
+                state[span] = value
+                emas.append(ema)
+            outputs[column] = emas[0] if len(emas) == 1 else emas[0] - emas[1]
+        return outputs, state
+
+    def __lengths(self, family: str) -> List[int]:
+        lengths = set(self._lengths.get(family, {}))
+        if self.cache_dir is not None:
+            for path in self.cache_dir.glob("{}-*.npz".format(family)):
+                lengths.add(int(path.stem.split("-")[1]))
+        return list(lengths)
+
+    def __get(self, family: str, key: str) -> Optional[_Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.cache_dir is None:
+            return None
+        path = self.cache_dir.joinpath(key + ".npz")
+        try:
+            with np.load(path) as npz:
+                outputs = {
+                    k[2:]: npz[k] for k in npz.files if k.startswith("o_")
+                }
+                state = {
+                    int(k[2:]): float(npz[k])
+                    for k in npz.files
+                    if k.startswith("s_")
+                }
+        except (OSError, ValueError):
+            return None
+        entry = _Entry(outputs, state)
+        self.__put(family, key, entry, write=False)
+        return entry
+
+    def __put(
+        self, family: str, key: str, entry: _Entry, write: bool = True
+    ) -> None:
+        with self._lock:
+            if key not in self._entries:
+                self._nbytes += entry.nbytes
+            self._entries[key] = entry
+            self._lengths.setdefault(family, {})[int(key.split("-")[1])] = key
+            self.__evict()
+        if write and self.cache_dir is not None:
+            arrays = {"o_" + k: v for k, v in entry.outputs.items()}
+            for span, value in entry.state.items():
+                arrays["s_{}".format(span)] = np.asarray(value)
+            # Written aside and renamed, so readers never see partial files.
+            path = self.cache_dir.joinpath(key + ".npz")
+            tmp = path.with_name("{}.{}.tmp".format(key, os.getpid()))
+            with open(tmp, "wb") as f:
+                np.savez(f, **arrays)  # type: ignore
+            os.replace(tmp, path)
+
+    def __evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        while self._nbytes > self.max_bytes and len(self._entries) > 1:
+            key, entry = self._entries.popitem(last=False)
+            self._nbytes -= entry.nbytes
+            family, length = key.split("-")[:2]
+            lengths = self._lengths.get(family, {})
+            if lengths.get(int(length)) == key:
+                del lengths[int(length)]
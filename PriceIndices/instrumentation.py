@@ -0,0 +1,272 @@
+"""
+Instrumentation hooks.
+
+MarketHistory, AsyncMarketHistory, Indices and the caches report timings
+(in seconds) and counters to the hooks registered with add_hook. A hook is
+called as hook(kind, name, value, attrs) with kind "timing" or "count":
+
+    timing  http.request        status
+    timing  parse.json_decode
+    timing  parse.frame_build
+    timing  indices.sort
+    timing  indicator.compute   indicator, backend
+    timing  indicator.sweep     indicator, backend
+    count   http.bytes
+    count   http.retry          status
+    count   history.error       error
+    count   cache.hit           cache ("history" or "indicator")
+    count   cache.miss          cache
+
+With no hook registered a probe is a single list check, so leaving this off
+costs next to nothing. PrometheusHook and OpenTelemetryHook export the
+events with prometheus_client and opentelemetry, MetricsRecorder keeps
+totals in memory.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Hook = Callable[[str, str, float, Dict[str, Any]], None]
+
+_hooks: List[Hook] = []
+
+
+def add_hook(hook: Hook) -> None:
+    """
+    Start reporting events to a hook.
+    Args:
+        hook (callable): Called as hook(kind, name, value, attrs).
+    """
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """
+    Stop reporting events to a hook added with add_hook.
+    """
+    _hooks.remove(hook)
+
+
+def enabled() -> bool:
+    """
+    Returns:
+        bool: True when at least one hook is registered.
+    """
+    return bool(_hooks)
+
+
+def emit(kind: str, name: str, value: float = 1.0, **attrs) -> None:
+    """
+    Report one event to all hooks.
+    Args:
+        kind (str): "timing" or "count".
+        name (str): Event name. E.g., "http.request"
+        value (float): Seconds for timings, increment for counts.
+        **attrs: Low cardinality labels of the event.
+    """
+    for hook in list(_hooks):
+        hook(kind, name, value, attrs)
+
+
+def count(name: str, value: float = 1.0, **attrs) -> None:
+    """
+    Report a counter increment, if any hook is registered.
+    """
+    if _hooks:
+        emit("count", name, value, **attrs)
+
+
+class _Timer(object):
+    __slots__ = ("name", "attrs", "start")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        elapsed = time.perf_counter() - self.start
+        emit("timing", self.name, elapsed, **self.attrs)
+
+
+class _NoTimer(object):
+    __slots__ = ("attrs",)
+
+    def __init__(self) -> None:
+        self.attrs: Dict[str, Any] = {}
+
+    def __enter__(self) -> "_NoTimer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+
+def timer(name: str, **attrs):
+    """
+    Context manager reporting the time spent in its block. Attributes may
+    be added to `attrs` of the returned object inside the block, every call
+    gets its own attrs.
+    Args:
+        name (str): Event name. E.g., "indicator.compute"
+        **attrs: Low cardinality labels of the event.
+    """
+    if not _hooks:
+        return _NoTimer()
+    return _Timer(name, attrs)
+
+
+class MetricsRecorder(object):
+    """
+    Hook keeping the number of events and the sum of their values per
+    (name, attrs), e.g. for tests or a quick look at where time goes.
+    """
+
+    def __init__(self) -> None:
+        self.counts: Dict[Tuple[str, tuple], int] = defaultdict(int)
+        self.totals: Dict[Tuple[str, tuple], float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def __call__(
+        self, kind: str, name: str, value: float, attrs: Dict[str, Any]
+    ) -> None:
+        key = (name, tuple(sorted(attrs.items())))
+        with self._lock:
+            self.counts[key] += 1
+            self.totals[key] += value
+
+    def total(self, name: str, **attrs) -> float:
+        """
+        Sum of the values of an event over all attrs matching the given
+        ones.
+        """
+        totals = self.totals.items()
+        return sum(v for key, v in totals if self.__match(key, name, attrs))
+
+    def count(self, name: str, **attrs) -> int:
+        """
+        Number of events with this name and matching attrs.
+        """
+        counts = self.counts.items()
+        return sum(n for key, n in counts if self.__match(key, name, attrs))
+
+    @staticmethod
+    def __match(key: Tuple[str, tuple], name: str, attrs: dict) -> bool:
+        return key[0] == name and attrs.items() <= dict(key[1]).items()
+
+
+def _metric_name(name: str) -> str:
+    return "priceindices_" + name.replace(".", "_")
+
+
+class PrometheusHook(object):
+    """
+    Hook exporting timings as prometheus_client Histograms
+    (priceindices_<name>_seconds) and counts as Counters
+    (priceindices_<name>_total). Needs prometheus_client.
+
+    The label names of a metric are those of the first event of its name.
+    Later events with other attrs fill missing labels with "" and drop the
+    extra ones.
+    """
+
+    def __init__(self, registry: Optional[Any] = None) -> None:
+        """
+        Args:
+            registry (CollectorRegistry): Registry to register the metrics
+                                          in. Default to the global one.
+        """
+        try:
+            import prometheus_client
+        except ImportError:
+            raise ImportError(
+                "PrometheusHook needs prometheus_client, install it with "
+                "`pip install PriceIndices[prometheus]`."
+            )
+        self.prometheus = prometheus_client
+        self.registry = registry or prometheus_client.REGISTRY
+        self._metrics: Dict[str, Tuple[Any, tuple]] = {}
+        self._lock = threading.Lock()
+
+    def __metric(
+        self, kind: str, name: str, labels: tuple
+    ) -> Tuple[Any, tuple]:
+        with self._lock:
+            if name not in self._metrics:
+                cls: Any = self.prometheus.Counter
+                suffix = ""
+                if kind == "timing":
+                    cls, suffix = self.prometheus.Histogram, "_seconds"
+                metric = cls(
+                    _metric_name(name) + suffix,
+                    "PriceIndices " + name,
+                    labels,
+                    registry=self.registry,
+                )
+                self._metrics[name] = (metric, labels)
+            return self._metrics[name]
+
+    def __call__(
+        self, kind: str, name: str, value: float, attrs: Dict[str, Any]
+    ) -> None:
+        metric, labels = self.__metric(kind, name, tuple(sorted(attrs)))
+        if labels:
+            metric = metric.labels(**{k: str(attrs.get(k, "")) for k in labels})
+        if kind == "timing":
+            metric.observe(value)
+        else:
+            metric.inc(value)
+
+
+class OpenTelemetryHook(object):
+    """
+    Hook exporting timings as OpenTelemetry Histograms (unit "s") and
+    counts as Counters. Needs opentelemetry-api and a configured
+    MeterProvider.
+    """
+
+    def __init__(self, meter: Optional[Any] = None) -> None:
+        """
+        Args:
+            meter (Meter): Meter to create instruments with. Default to the
+                           "PriceIndices" meter of the global provider.
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError:
+                raise ImportError(
+                    "OpenTelemetryHook needs opentelemetry-api, install it "
+                    "with `pip install PriceIndices[opentelemetry]`."
+                )
+            meter = metrics.get_meter("PriceIndices")
+        self.meter = meter
+        self._instruments: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def __instrument(self, kind: str, name: str) -> Any:
+        with self._lock:
+            if name not in self._instruments:
+                if kind == "timing":
+                    instrument = self.meter.create_histogram(
+                        _metric_name(name), unit="s"
+                    )
+                else:
+                    instrument = self.meter.create_counter(_metric_name(name))
+                self._instruments[name] = instrument
+            return self._instruments[name]
+
+    def __call__(
+        self, kind: str, name: str, value: float, attrs: Dict[str, Any]
+    ) -> None:
+        instrument = self.__instrument(kind, name)
+        attributes = {k: str(v) for k, v in attrs.items()}
+        if kind == "timing":
+            instrument.record(value, attributes)
+        else:
+            instrument.add(value, attributes)
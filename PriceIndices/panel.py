@@ -0,0 +1,133 @@
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .price_indicators import (
+    INDICATORS,
+    IndicatorSpec,
+    _indicator_specs,
+    calculate,
+)
+
+
+class PanelIndices:
+    """
+    Price Technical Indicators of many coins at once. Every indicator runs
+    as a handful of 2-D array operations over a dates x coins price matrix.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        date_col: str = "date",
+        price_col: str = "price",
+        symbol_col: Optional[str] = None,
+        backend: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            df (pd.DataFrame): Either a wide frame with one price column per
+                               coin (dates in `date_col` or in the index), or
+                               a long frame with `symbol_col`, `date_col` and
+                               `price_col` columns.
+            date_col (str): Date column name.
+            price_col (str): Price column name of a long frame.
+            symbol_col (str): Coin column name of a long frame. None if df is
+                              wide.
+            backend (str): Compute backend, see Indices.
+        """
+        if symbol_col is not None:
+            prices = df.pivot(
+                index=date_col, columns=symbol_col, values=price_col
+            )
+        elif date_col in df.columns:
+            prices = df.set_index(date_col)
+        else:
+            prices = df
+        self.prices = prices.sort_index().astype(float)
+        self.prices.index.name = date_col
+        self.date_col = date_col
+        self.backend = backend
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Dict[str, pd.DataFrame],
+        date_col: str = "date",
+        price_col: str = "price",
+        backend: Optional[str] = None,
+    ) -> "PanelIndices":
+        """
+        Build a panel from per coin DataFrames, e.g. the result of
+        MarketHistory.get_histories.
+        Args:
+            frames (dict): coin id to DataFrame with date and price columns.
+            date_col (str): Date column name.
+            price_col (str): Price column name.
+            backend (str): Compute backend, see Indices.
+
+        Returns:
+            PanelIndices: Panel of all coins.
+        """
+        prices = pd.concat(
+            {
+                coin_id: df.set_index(date_col)[price_col]
+                for coin_id, df in frames.items()
+            },
+            axis=1,
+        )
+        return cls(prices, date_col=date_col, backend=backend)
+
+    def compute(
+        self, indicators: Iterable[IndicatorSpec] = tuple(INDICATORS)
+    ) -> pd.DataFrame:
+        """
+        Calculate indicators for all coins.
+        Args:
+            indicators (list): Indicator names, or (name, params) tuples, as
+                               taken by Indices.compute.
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame indexed by date, newest first,
+                          with (indicator column, coin) MultiIndex columns.
+                          Values are NaN where a coin has no price.
+        """
+        prices = self.prices.to_numpy()
+        missing = np.isnan(prices)
+        columns: Dict[str, np.ndarray] = {}
+        for name, params in _indicator_specs(indicators):
+            outputs = calculate(name, prices, params, self.backend)
+            for column, values in outputs.items():
+                columns[column] = np.where(missing, np.nan, values)
+        data = np.concatenate(list(columns.values()), axis=1)
+        result = pd.DataFrame(
+            data[::-1],
+            index=self.prices.index[::-1],
+            columns=pd.MultiIndex.from_product(
+                [list(columns), self.prices.columns],
+                names=["indicator", "coin"],
+            ),
+        )
+        return result
+
+    def to_long(self, result: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reshape a compute result to one row per (date, coin).
+        Args:
+            result (pd.DataFrame): Output of compute.
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame with (date, coin) MultiIndex.
+        """
+        indicators = list(result.columns.unique("indicator"))
+        coins = result.columns.unique("coin")
+        data = result[indicators].to_numpy()
+        data = data.reshape(len(result), len(indicators), len(coins))
+        return pd.DataFrame(
+            data.transpose(0, 2, 1).reshape(-1, len(indicators)),
+            index=pd.MultiIndex.from_product(
+                [result.index, coins], names=[self.date_col, "coin"]
+            ),
+            columns=indicators,
+        )
@@ -0,0 +1,358 @@
+"""
+Resumable batch pipeline: fetch -> store -> compute -> render.
+
+Stages run concurrently and hand coins over through bounded queues, so
+downloads overlap with indicator calculation and chart rendering while a
+slow stage holds the others back instead of piling up frames in memory.
+Indicators are calculated on a process pool, out of reach of the GIL the
+other stages share. A stage that stops on an unexpected error keeps
+emptying its queue and still tells the next stage it is done, so a run
+always returns.
+Every finished or failed coin gets a checkpoint file; a rerun skips the
+coins whose checkpoint is done and fresh. Progress is logged to the
+"PriceIndices.pipeline" logger.
+"""
+
+import hashlib
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from . import rendering
+from .price_indicators import (
+    INDICATORS,
+    IndicatorSpec,
+    Indices,
+    _indicator_specs,
+)
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Pipeline(object):
+    """
+    Fetch, store, compute and render indicators of many coins.
+
+    Outputs go to output_dir: <coin>.csv with the price and indicator
+    columns, plots/<coin>_<indicator>.png and checkpoints/<coin>.json.
+    """
+
+    def __init__(
+        self,
+        coins: Iterable[str],
+        start_date: str,
+        end_date: str,
+        indicators: Iterable[IndicatorSpec] = tuple(INDICATORS),
+        plots: Union[bool, Iterable[str]] = False,
+        output_dir: str = "priceindices_output",
+        store: Optional[str] = None,
+        base_url: Optional[str] = None,
+        history: Optional[Any] = None,
+        fetch_workers: int = 4,
+        compute_workers: int = 2,
+        queue_size: int = 8,
+        max_age: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            coins (list): coin names. E.g., ["bitcoin", "ethereum"]
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+            indicators (list): Indicator names or (name, params) tuples, as
+                               taken by Indices.compute. Unknown names raise
+                               ValueError before anything is fetched.
+            plots (bool or list): Render a chart of every indicator, or of
+                                  the given ones.
+            output_dir (str): Directory of the outputs and checkpoints.
+            store (str): Optional PriceStore file to read the prices
+                         through.
+            base_url (str): CoinMarketCap OHLCV historical endpoint.
+                            Default to the one of MarketHistory.
+            history (MarketHistory): History client to fetch with. Default
+                                     to a new MarketHistory.
+            fetch_workers (int): Coins downloaded at once.
+            compute_workers (int): Worker processes calculating coins.
+            queue_size (int): Coins waiting between two stages at most.
+            max_age (float): Seconds after which a done checkpoint is stale.
+                             Default to None (never).
+        """
+        self.coins = list(dict.fromkeys(coins))
+        self.start_date = start_date
+        self.end_date = end_date
+        self.indicators = _indicator_specs(indicators)
+        if isinstance(plots, bool):
+            plots = [name for name, _ in self.indicators] if plots else []
+        self.plots = [p for p in plots if p in rendering.TEMPLATES]
+        self.output_dir = Path(output_dir)
+        self.store = store
+        self.base_url = base_url
+        self.history = history
+        self.fetch_workers = fetch_workers
+        self.compute_workers = compute_workers
+        self.queue_size = queue_size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.status: Dict[str, str] = {}
+
+    @property
+    def config_hash(self) -> str:
+        """
+        Digest of everything that makes a coin's outputs, so outputs of
+        another config are stale.
+        """
+        config = [
+            self.start_date,
+            self.end_date,
+            self.indicators,
+            self.plots,
+        ]
+        return hashlib.blake2b(
+            json.dumps(config, sort_keys=True).encode(), digest_size=8
+        ).hexdigest()
+
+    def checkpoint_path(self, coin_id: str) -> Path:
+        return self.output_dir.joinpath("checkpoints", f"{coin_id}.json")
+
+    def is_fresh(self, coin_id: str) -> bool:
+        """
+        True when a coin finished with this config and is not too old.
+        """
+        path = self.checkpoint_path(coin_id)
+        if not path.exists():
+            return False
+        try:
+            checkpoint = json.loads(path.read_text())
+            age = time.time() - float(checkpoint.get("finished_at", 0))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning("%s: unreadable checkpoint (%s)", coin_id, e)
+            return False
+        if checkpoint.get("status") != "done":
+            return False
+        if checkpoint.get("config") != self.config_hash:
+            return False
+        return self.max_age is None or age <= self.max_age
+
+    def __checkpoint(self, coin_id: str, status: str, error: str = "") -> None:
+        path = self.checkpoint_path(coin_id)
+        checkpoint = {
+            "coin": coin_id,
+            "status": status,
+            "config": self.config_hash,
+            "finished_at": time.time(),
+        }
+        if error:
+            checkpoint["error"] = error
+        try:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(checkpoint))
+            tmp.replace(path)
+        except OSError as e:
+            # The outputs can't be resumed from, so the coin is not done.
+            status, error = "failed", f"checkpoint not written: {e}"
+        with self._lock:
+            self.status[coin_id] = status
+        if error:
+            logger.warning("%s: %s (%s)", coin_id, status, error)
+        else:
+            logger.info("%s: %s", coin_id, status)
+
+    def __fail(self, coin_id: str, e: Exception) -> None:
+        self.__checkpoint(coin_id, "failed", f"{type(e).__name__}: {e}")
+
+    def __fetch(self, todo: "queue.Queue", fetched: "queue.Queue") -> None:
+        assert self.history is not None
+        while True:
+            try:
+                coin_id = todo.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                df = self.history.get_history(
+                    coin_id, self.start_date, self.end_date, raise_errors=True
+                )
+                df = df[["date", "close"]]
+            except Exception as e:
+                self.__fail(coin_id, e)
+                continue
+            fetched.put((coin_id, df.rename(columns={"close": "price"})))
+
+    def __compute(
+        self, pool: Executor, fetched: "queue.Queue", computed: "queue.Queue"
+    ) -> None:
+        # Each thread keeps one coin in flight on the pool.
+        try:
+            while True:
+                item = fetched.get()
+                if item is _DONE:
+                    return
+                coin_id, df = item
+                try:
+                    data = pool.submit(
+                        _compute,
+                        df,
+                        self.indicators,
+                        self.output_dir.joinpath(f"{coin_id}.csv"),
+                    ).result()
+                except Exception as e:
+                    self.__fail(coin_id, e)
+                    continue
+                if self.plots:
+                    computed.put((coin_id, data))
+                else:
+                    self.__checkpoint(coin_id, "done")
+        except Exception:
+            logger.exception("Compute stage stopped")
+            _drain(fetched)
+        finally:
+            computed.put(_DONE)
+
+    def __render(self, computed: "queue.Queue", producers: int) -> None:
+        # One thread: the Agg figures of rendering are reused per process.
+        try:
+            while producers:
+                item = computed.get()
+                if item is _DONE:
+                    producers -= 1
+                    continue
+                coin_id, data = item
+                try:
+                    for kind in self.plots:
+                        rendering.render(
+                            kind,
+                            data,
+                            self.output_dir.joinpath(
+                                "plots", f"{coin_id}_{kind}.png"
+                            ),
+                        )
+                except Exception as e:
+                    self.__fail(coin_id, e)
+                    continue
+                self.__checkpoint(coin_id, "done")
+        except Exception:
+            logger.exception("Render stage stopped")
+            _drain(computed, producers)
+
+    def run(self) -> Dict[str, str]:
+        """
+        Run the pipeline for all coins which are not done and fresh.
+
+        Returns:
+            dict: coin id to "done", "failed" or "skipped".
+        """
+        for directory in ["", "checkpoints", "plots"]:
+            self.output_dir.joinpath(directory).mkdir(
+                parents=True, exist_ok=True
+            )
+        if self.history is None:
+            from .crypto_history import MarketHistory
+            from .store import PriceStore
+
+            kwargs: Dict[str, Any] = {}
+            if self.store:
+                kwargs["store"] = PriceStore(self.store)
+            if self.base_url:
+                kwargs["base_url"] = self.base_url
+            self.history = MarketHistory(**kwargs)
+
+        self.status = {}
+        todo: "queue.Queue" = queue.Queue()
+        for coin_id in self.coins:
+            if self.is_fresh(coin_id):
+                self.status[coin_id] = "skipped"
+            else:
+                todo.put(coin_id)
+        fetched: "queue.Queue" = queue.Queue(self.queue_size)
+        computed: "queue.Queue" = queue.Queue(self.queue_size)
+
+        # Spawned, not forked: the fetch threads are already running when
+        # the pool starts its workers.
+        with ProcessPoolExecutor(
+            max(self.compute_workers, 1),
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as pool:
+            fetchers = _start(self.fetch_workers, self.__fetch, todo, fetched)
+            computers = _start(
+                self.compute_workers, self.__compute, pool, fetched, computed
+            )
+            renderers = _start(1, self.__render, computed, len(computers))
+            _join(fetchers)
+            # One end marker per compute thread, each of which passes one on
+            # to the render thread.
+            for _ in computers:
+                fetched.put(_DONE)
+            _join(computers)
+            _join(renderers)
+        return {c: self.status.get(c, "failed") for c in self.coins}
+
+
+def _compute(
+    df: pd.DataFrame, indicators: Iterable[IndicatorSpec], path: Path
+) -> pd.DataFrame:
+    data = Indices(df).compute(indicators)
+    data.to_csv(path, index=False)
+    return data
+
+
+def _drain(inbox: "queue.Queue", producers: int = 1) -> None:
+    # Keep upstream from blocking on a stage that stopped.
+    while producers:
+        if inbox.get() is _DONE:
+            producers -= 1
+
+
+def _start(n: int, target: Callable, *args) -> List[threading.Thread]:
+    threads = [
+        threading.Thread(target=target, args=args, daemon=True)
+        for _ in range(max(n, 1))
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def _join(threads: List[threading.Thread]) -> None:
+    for thread in threads:
+        thread.join()
+
+
+def load_config(path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Read a pipeline config, JSON or TOML, holding the keyword arguments of
+    Pipeline. Indicators are names or
+    {"name": ..., "params": {...}} tables.
+    Args:
+        path (str): Config file path.
+
+    Returns:
+        dict: Keyword arguments of Pipeline.
+    """
+    path = Path(path)
+    config: Dict[str, Any]
+    if path.suffix == ".toml":
+        if sys.version_info >= (3, 11):
+            import tomllib
+        else:
+            import tomli as tomllib
+
+        config = tomllib.loads(path.read_text())
+    else:
+        config = json.loads(path.read_text())
+    indicators: List[IndicatorSpec] = []
+    for spec in config.get("indicators", INDICATORS):
+        if isinstance(spec, dict):
+            indicators.append((spec["name"], spec.get("params", {})))
+        else:
+            indicators.append(spec)
+    config["indicators"] = indicators
+    return config
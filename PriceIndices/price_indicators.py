@@ -1,13 +1,64 @@
 import warnings
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from . import instrumentation, rendering
+from .backends import get_backend
+from .formats import check_options, format_frame
+
+if TYPE_CHECKING:
+    from .indicator_cache import IndicatorCache
+
 warnings.filterwarnings("ignore")
 
+IndicatorSpec = Union[str, Tuple[str, dict]]
+
+INDICATORS = ("vola_index", "rsi", "bollinger_bands", "macd", "sma", "ema")
+
+
+def calculate(
+    name: str,
+    prices: np.ndarray,
+    params: Optional[dict] = None,
+    backend: Optional[str] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate one indicator with a compute backend.
+    Args:
+        name (str): Indicator name, one of INDICATORS.
+        prices (np.ndarray): Prices in date order, one series or a
+                             dates x coins matrix.
+        params (dict): Keyword arguments of the indicator.
+        backend (str): Compute backend name. See backends.get_backend.
+
+    Returns:
+        dict: Output column name to values of the same shape as prices.
+    """
+    kernel = getattr(get_backend(backend), name)
+    outputs: Dict[str, np.ndarray] = kernel(prices, **(params or {}))
+    return outputs
+
+
+def _indicator_specs(
+    indicators: Iterable[IndicatorSpec], unique: bool = True
+) -> List[Tuple[str, dict]]:
+    specs: List[Tuple[str, dict]] = []
+    for spec in indicators:
+        name, params = (spec, {}) if isinstance(spec, str) else spec
+        if name not in INDICATORS:
+            raise ValueError(
+                "Unknown indicator {!r}, choose from {}".format(
+                    name, ", ".join(INDICATORS)
+                )
+            )
+        if unique and name in dict(specs):
+            raise ValueError("Indicator {!r} is given twice".format(name))
+        specs.append((name, dict(params)))
+    return specs
+
 
 class Indices:
     """
@@ -20,11 +71,207 @@ class Indices:
         date_col: str = "date",
         price_col: str = "price",
         plot_dir: Optional[str] = "",
+        backend: Optional[str] = None,
+        cache: Optional["IndicatorCache"] = None,
+        assume_sorted: bool = False,
+        float_dtype: str = "float64",
+        date_dtype: Optional[str] = None,
+        indicators_only: bool = False,
+        dtype_backend: Optional[str] = None,
     ) -> None:
+        """
+        Args:
+            df (pd.DataFrame): Pandas DataFrame with date and price columns.
+            date_col (str): Date column name.
+            price_col (str): Price column name.
+            plot_dir (str): Directory to save plots in.
+            backend (str): Compute backend, "numpy" or "numba". Default to
+                           numba when it is installed.
+            cache (IndicatorCache): Cache to reuse indicator results of the
+                                    same prices from. Default to None (no
+                                    caching).
+            assume_sorted (bool): df is in ascending date order. Checked once
+                                  here; the indicator methods then skip all
+                                  copy and sort work and return the rows in
+                                  df order, oldest first, with leading rows
+                                  sliced off instead of NaN rows dropped.
+            float_dtype (str): "float64" or "float32" indicator columns.
+            date_dtype (str): Date column of the results: None to keep it
+                              as in df, "datetime64" or "category".
+            indicators_only (bool): Return only the date and the indicator
+                                    columns instead of all columns of df.
+            dtype_backend (str): None for NumPy dtypes, or "pyarrow" for
+                                 Arrow backed results (needs pyarrow).
+        """
+        check_options(float_dtype, date_dtype, dtype_backend)
+        if assume_sorted and not df[date_col].is_monotonic_increasing:
+            raise ValueError(
+                "assume_sorted=True needs {!r} in ascending order".format(
+                    date_col
+                )
+            )
         self.df = df
         self.date_col = date_col
         self.price_col = price_col
         self.plot_dir = Path(plot_dir)  # type: ignore
+        self.backend = backend
+        self.cache = cache
+        self.assume_sorted = assume_sorted
+        self.float_dtype = float_dtype
+        self.date_dtype = date_dtype
+        self.indicators_only = indicators_only
+        self.dtype_backend = dtype_backend
+
+    def compute(
+        self, indicators: Iterable[IndicatorSpec] = tuple(INDICATORS)
+    ) -> pd.DataFrame:
+        """
+        Calculate several indicators in a single pass. The data is sorted once
+        and every indicator works on the same price array.
+        Args:
+            indicators (list): Indicator names, or (name, params) tuples with
+                               keyword arguments of the matching get_* method.
+                               Names are "vola_index", "rsi",
+                               "bollinger_bands", "macd", "sma" and "ema".
+                               E.g., ["rsi", ("ema", {"periods": [20, 70]})]
+                               Default to all indicators with default params.
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame with one column per indicator
+                          output, newest date first. Rows which a get_*
+                          method drops hold NaN. Unlike the get_* methods, MACD
+                          and EMA are always computed in date order. With
+                          assume_sorted, rows are in df order, oldest first.
+        """
+        specs = _indicator_specs(indicators)
+        if self.assume_sorted:
+            data = self.df.copy(deep=False)
+            prices = data[self.price_col].to_numpy(dtype=float)
+            for name, params in specs:
+                outputs = self.__calculate_prices(name, prices, params)
+                for column, values in outputs.items():
+                    data[column] = values
+            return self.__output(data)
+        data = self.__ascending()
+        prices = data[self.price_col].to_numpy(dtype=float)
+        columns: Dict[str, np.ndarray] = {}
+        for name, params in specs:
+            columns.update(self.__calculate_prices(name, prices, params))
+        data = pd.concat([data, pd.DataFrame(columns)], axis=1)
+        return self.__output(data.iloc[::-1].reset_index(drop=True))
+
+    def sweep(
+        self, name: str, days: Iterable[int], output: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Calculate one indicator for many window lengths at once. The data is
+        sorted once and all windows come from shared prefix sums (SMA,
+        Bollinger Bands, volatility index) or one batched EMA call.
+        Args:
+            name (str): "vola_index", "bollinger_bands", "sma" or "ema".
+            days (list): Window lengths: volatile_period, days or EMA
+                         periods. E.g., range(5, 200)
+            output (str): Output column to return, e.g. "BB_lower". Default
+                          to the first one ("BB_upper" for Bollinger Bands).
+
+        Returns:
+            pd.DataFrame: days x dates Pandas DataFrame, newest date first
+                          (with assume_sorted, in df order). Dates without
+                          a full window hold NaN.
+        """
+        days = list(days)
+        data = self.df if self.assume_sorted else self.__ascending()
+        prices = data[self.price_col].to_numpy(dtype=float)
+        with instrumentation.timer(
+            "indicator.sweep",
+            indicator=name,
+            backend=self.backend or "default",
+        ):
+            outputs = get_backend(self.backend).sweep(name, prices, days)
+        output = output or next(iter(outputs))
+        if output not in outputs:
+            raise ValueError(
+                "Unknown output {!r}, choose from {}".format(
+                    output, ", ".join(outputs)
+                )
+            )
+        values = outputs[output]
+        dates = data[self.date_col].to_numpy()
+        if not self.assume_sorted:
+            values, dates = values[:, ::-1], dates[::-1]
+        return pd.DataFrame(
+            values.astype(self.float_dtype),
+            index=pd.Index(days, name="days"),
+            columns=pd.Index(dates, name=self.date_col),
+        )
+
+    def __ascending(self) -> pd.DataFrame:
+        with instrumentation.timer("indices.sort"):
+            return self.df.sort_values(by=self.date_col).reset_index(drop=True)
+
+    def __output(self, data: pd.DataFrame) -> pd.DataFrame:
+        options = (self.float_dtype, self.date_dtype, self.dtype_backend)
+        if not self.indicators_only and options == ("float64", None, None):
+            return data
+        indicators = [c for c in data.columns if c not in self.df.columns]
+        if self.indicators_only:
+            data = data[[self.date_col] + indicators]
+        return format_frame(
+            data,
+            indicators,
+            self.date_col,
+            self.float_dtype,
+            self.date_dtype,
+            self.dtype_backend,
+        )
+
+    def __sorted(self, name: str, dropna: bool, **params) -> pd.DataFrame:
+        # assume_sorted path: new columns on a shallow copy of df, and a
+        # slice past the leading rows which a get_* method would drop.
+        outputs = self.__calculate(name, self.df, **params)
+        data = self.df.copy(deep=False)
+        for column, values in outputs.items():
+            data[column] = values
+        if dropna and len(data):
+            valid = ~np.isnan(np.column_stack(list(outputs.values())))
+            valid = valid.all(axis=1)
+            start = int(np.argmax(valid)) if valid.any() else len(data)
+            data = data.iloc[start:]
+        return data
+
+    def __calculate(
+        self, name: str, data: pd.DataFrame, **params
+    ) -> Dict[str, np.ndarray]:
+        prices = data[self.price_col].to_numpy(dtype=float)
+        return self.__calculate_prices(name, prices, params)
+
+    def __calculate_prices(
+        self, name: str, prices: np.ndarray, params: dict
+    ) -> Dict[str, np.ndarray]:
+        with instrumentation.timer(
+            "indicator.compute",
+            indicator=name,
+            backend=self.backend or "default",
+        ):
+            if self.cache is None:
+                return calculate(name, prices, params, self.backend)
+            return self.cache.calculate(name, prices, params, self.backend)
+
+    def __plot(
+        self,
+        kind: str,
+        data: pd.DataFrame,
+        plot_name: Optional[str],
+        show_plot: Optional[bool],
+    ) -> None:
+        rendering.render(
+            kind,
+            data,
+            self.plot_dir.joinpath(plot_name),  # type: ignore
+            self.date_col,
+            self.price_col,
+            show=bool(show_plot),
+        )
 
     def get_vola_index(
         self,
@@ -50,20 +297,24 @@ class Indices:
         Returns:
             pd.DataFrame: Pandas DataFrame
         """
-        data = self.df.copy()
-        data = data.sort_values(by=self.date_col).reset_index(drop=True)
-        v = np.log(data[self.price_col]).diff().rolling(
-            volatile_period
-        ).std() * np.sqrt(365)
-        df_bvol = pd.DataFrame(data={"BVOL_Index": v})
-        data = pd.concat([data, df_bvol], join="inner", axis=1)
-        data = data.dropna()
-        data = data.sort_values(by=self.date_col, ascending=False).reset_index(
-            drop=True
-        )
+        if self.assume_sorted:
+            data = self.__sorted(
+                "vola_index", True, volatile_period=volatile_period
+            )
+        else:
+            data = self.__ascending()
+            data = data.assign(
+                **self.__calculate(
+                    "vola_index", data, volatile_period=volatile_period
+                )
+            )
+            data = data.dropna()
+            data = data.sort_values(
+                by=self.date_col, ascending=False
+            ).reset_index(drop=True)
         if plot is True:
             self.get_vola_graph(data, plot_name, show_plot)
-        return data
+        return self.__output(data)
 
     def get_vola_graph(
         self,
@@ -79,38 +330,7 @@ class Indices:
             show_plot: True if you plot should be displayed.
         """
 
-        fig, ax = plt.subplots(figsize=(14, 12))
-        rect = fig.patch
-        rect.set_facecolor("yellow")
-        ax1 = plt.subplot(211)
-        ax1.plot(data["date"], data["price"], color="blue", label="Price")
-        plt.ylabel("Price", color="red", fontsize=20)
-        ax1.axes.get_xaxis().set_ticks([])
-        plt.legend()
-        ax1.tick_params(axis="y", colors="b")
-        ax1.grid(color="grey", linestyle="-", linewidth=0.25, alpha=0.5)
-
-        ax2 = plt.subplot(212)
-        ax2.plot(
-            data["date"], data["BVOL_Index"], color="b", label="BVOL Index"
-        )
-        plt.xlabel("Time", color="red", fontsize=20)
-        plt.ylabel("Volatility Index", color="r", fontsize=20)
-        plt.legend()
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=90)
-        ax2.grid(color="grey", linestyle="-", linewidth=0.25, alpha=0.5)
-
-        ax2.tick_params(axis="x", colors="b")
-        ax2.tick_params(axis="y", colors="b")
-
-        plt.suptitle("Price  and  Volatility Index", color="red", fontsize=24)
-        plt.savefig(
-            self.plot_dir.joinpath(plot_name),  # type: ignore
-            bbox_inches="tight",
-            facecolor="orange",
-        )
-        if show_plot:
-            plt.show()
+        self.__plot("vola_index", data, plot_name, show_plot)
 
     def get_rsi(
         self,
@@ -145,50 +365,18 @@ class Indices:
             pd.DataFrame: Pandas DataFrame with RSI values
 
         """
-        data = self.df.copy()
-        data = data.sort_values(by=self.date_col).reset_index(drop=True)
-        data["price_change"] = data[self.price_col] - data[
-            self.price_col
-        ].shift(1)
-        data.dropna(inplace=True)
-        data["gain"] = np.where(
-            data["price_change"] >= 0, data["price_change"], 0
-        )
-        data["loss"] = np.where(
-            data["price_change"] <= 0, abs(data["price_change"]), 0
-        )
-
-        data["gain_average"] = data["gain"].rolling(14).mean()
-        data["loss_average"] = data["loss"].rolling(14).mean()
-
-        data["RS"] = data["gain_average"] / data["loss_average"]
-
-        data["RSI_1"] = 100 * (1 - (1 / (1 + data["RS"])))
-
-        data["RS_Smooth"] = (
-            data["gain_average"].shift(1) * 13 + data["gain"]
-        ) / (data["loss_average"].shift(1) * 13 + data["loss"])
-
-        data["RSI_2"] = 100 * (1 - (1 / (1 + data["RS_Smooth"])))
-        data = data.fillna(0).reset_index(drop=True)
-        data.drop(
-            [
-                "gain",
-                "loss",
-                "price_change",
-                "gain_average",
-                "loss_average",
-                "RS",
-            ],
-            axis=1,
-            inplace=True,
-        )
-        data = data.sort_values(by=self.date_col, ascending=False).reset_index(
-            drop=True
-        )
+        if self.assume_sorted:
+            data = self.__sorted("rsi", True)
+        else:
+            data = self.__ascending()
+            data = data.assign(**self.__calculate("rsi", data))
+            data = data.dropna().reset_index(drop=True)
+            data = data.sort_values(
+                by=self.date_col, ascending=False
+            ).reset_index(drop=True)
         if plot is True:
             self.get_rsi_graph(data, plot_name, show_plot)
-        return data
+        return self.__output(data)
 
     def get_rsi_graph(
         self,
@@ -205,53 +393,7 @@ class Indices:
 
 
         """
-        fig, ax = plt.subplots(figsize=(14, 12))
-        rect = fig.patch
-        rect.set_facecolor("yellow")
-        ax1 = plt.subplot(211)
-        ax1.plot(data["date"], data["price"], color="blue", label="Price")
-        plt.ylabel("Price ($)", color="red", fontsize=20)
-        ax1.axes.get_xaxis().set_ticks([])
-        plt.legend()
-        ax1.tick_params(axis="y", colors="b")
-
-        ax2 = plt.subplot(212)
-        ax2.plot(data["date"], data["RSI_2"], color="b", label="RSI")
-        plt.xlabel("Time", color="red", fontsize=20)
-        plt.ylabel("Relative Strength Index (RSI)", color="r", fontsize=20)
-        plt.text(
-            data["date"][int(len(data) / 2)],
-            80,
-            ">70 OverBought",
-            fontsize=20,
-            color="black",
-        )
-        plt.text(
-            data["date"][int(len(data) / 2)],
-            15,
-            "<30 OverSold",
-            fontsize=20,
-            color="black",
-        )
-        plt.legend()
-        plt.setp(ax2.xaxis.get_majorticklabels(), rotation=90)
-
-        ax2.tick_params(axis="x", colors="b")
-        ax2.tick_params(axis="y", colors="b")
-
-        ax2.axhline(y=70, color="r")
-        ax2.axhline(y=30, color="r")
-
-        plt.suptitle(
-            "Price  and  Relative  Strength Index", color="red", fontsize=24
-        )
-        plt.savefig(
-            self.plot_dir.joinpath(plot_name),  # type: ignore
-            bbox_inches="tight",
-            facecolor="orange",
-        )
-        if show_plot:
-            plt.show()
+        self.__plot("rsi", data, plot_name, show_plot)
 
     def get_bollinger_bands(
         self,
@@ -286,36 +428,19 @@ class Indices:
             pd.DataFrame: A pandas DataFrame and save a plot to given path.
 
         """
-        data = self.df.copy()
-        data = data.sort_values(by=self.date_col).reset_index(drop=True)
-        data["SMA"] = data[self.price_col].rolling(days).mean()
-        data["SD"] = data[self.price_col].rolling(days).std()
-        data["BB_upper"] = data["SMA"] + data["SD"] * 2
-        data["BB_lower"] = data["SMA"] - data["SMA"] * 2
-        data.drop(["SD", "SMA"], axis=1, inplace=True)
-        data = data.sort_values(by=self.date_col, ascending=False).reset_index(
-            drop=True
-        )
-        if plot:
-            fig, ax = plt.subplots(figsize=(16, 12))
-            plt.plot(data[self.date_col], data["BB_upper"], color="g")
-            plt.plot(data[self.date_col], data["BB_lower"], color="g")
-            plt.plot(data[self.date_col], data[self.price_col], color="orange")
-            plt.legend()
-            plt.xlabel("Time", color="b", fontsize=22)
-            plt.ylabel("Price", color="b", fontsize=22)
-            plt.title("Bollinger Bands", color="b", fontsize=27)
-            plt.tick_params(labelsize=17)
-            fig.set_facecolor("yellow")
-            plt.grid()
-            plt.savefig(
-                self.plot_dir.joinpath(plot_name),  # type: ignore
-                bbox_inches="tight",
-                facecolor="orange",
+        if self.assume_sorted:
+            data = self.__sorted("bollinger_bands", False, days=days)
+        else:
+            data = self.__ascending()
+            data = data.assign(
+                **self.__calculate("bollinger_bands", data, days=days)
             )
-            if show_plot:
-                plt.show()
-        return data
+            data = data.sort_values(
+                by=self.date_col, ascending=False
+            ).reset_index(drop=True)
+        if plot:
+            self.__plot("bollinger_bands", data, plot_name, show_plot)
+        return self.__output(data)
 
     def get_moving_average_convergence_divergence(
         self,
@@ -347,35 +472,15 @@ class Indices:
             pd.DataFrame: Pandas DataFrame with MACD values
 
         """
-        data = self.df.copy()
-        data["EMA_12"] = data[self.price_col].ewm(span=12, adjust=False).mean()
-        data["EMA_26"] = data[self.price_col].ewm(span=26, adjust=False).mean()
-        data["MACD"] = data["EMA_12"] - data["EMA_26"]
-        data.drop(["EMA_12", "EMA_26"], axis=1, inplace=True)
-        data = data.dropna()
+        if self.assume_sorted:
+            data = self.__sorted("macd", True)
+        else:
+            data = self.df.assign(**self.__calculate("macd", self.df))
+            data = data.dropna()
 
         if plot:
-            fig, ax = plt.subplots(figsize=(14, 9))
-            plt.plot(
-                data[self.date_col],
-                data[self.price_col],
-                color="r",
-                label="Price",
-            )
-            plt.plot(data[self.date_col], data["MACD"], color="b", label="MACD")
-            plt.legend()
-            plt.title("Price and MACD Plot", fontsize=28, color="b")
-            plt.xlabel("Time", color="b", fontsize=19)
-            plt.ylabel("Price", color="b", fontsize=19)
-            plt.savefig(
-                self.plot_dir.joinpath(plot_name),  # type: ignore
-                bbox_inches="tight",
-                facecolor="orange",
-            )
-            fig.set_facecolor("orange")
-            if show_plot:
-                plt.show()
-        return data
+            self.__plot("macd", data, plot_name, show_plot)
+        return self.__output(data)
 
     def get_simple_moving_average(
         self,
@@ -397,35 +502,18 @@ class Indices:
 
         """
 
-        data = self.df.copy()
-        data = data.sort_values(by=self.date_col).reset_index(drop=True)
-        data["SMA"] = data[self.price_col].rolling(days).mean()
-        data = data.dropna()
-        data = data.sort_values(by=self.date_col, ascending=False).reset_index(
-            drop=True
-        )
+        if self.assume_sorted:
+            data = self.__sorted("sma", True, days=days)
+        else:
+            data = self.__ascending()
+            data = data.assign(**self.__calculate("sma", data, days=days))
+            data = data.dropna()
+            data = data.sort_values(
+                by=self.date_col, ascending=False
+            ).reset_index(drop=True)
         if plot:
-            fig, ax = plt.subplots(figsize=(14, 9))
-            plt.plot(
-                data[self.date_col],
-                data[self.price_col],
-                color="r",
-                label="Price",
-            )
-            plt.plot(data[self.date_col], data["SMA"], color="b", label="SMA")
-            plt.legend()
-            plt.title("Price and SMA Plot", fontsize=28, color="b")
-            plt.xlabel("Time", color="b", fontsize=19)
-            plt.ylabel("Price", color="b", fontsize=19)
-            plt.savefig(
-                self.plot_dir.joinpath(plot_name),  # type: ignore
-                bbox_inches="tight",
-                facecolor="orange",
-            )
-            fig.set_facecolor("orange")
-            if show_plot:
-                plt.show()
-        return data
+            self.__plot("sma", data, plot_name, show_plot)
+        return self.__output(data)
 
     def get_exponential_moving_average(
         self,
@@ -454,35 +542,12 @@ class Indices:
         Returns:
             pd.DataFrame: Pandas DataFrame with EMA values
         """
-        data = self.df.copy()
-        for period in periods:
-            data["EMA_{}".format(period)] = (
-                data[self.price_col].ewm(span=period, adjust=False).mean()
+        if self.assume_sorted:
+            data = self.__sorted("ema", False, periods=periods)
+        else:
+            data = self.df.assign(
+                **self.__calculate("ema", self.df, periods=periods)
             )
         if plot is True:
-            fig, ax = plt.subplots(figsize=(14, 9))
-            plt.plot(
-                data[self.date_col],
-                data[self.price_col],
-                color="r",
-                label="Price",
-            )
-            for period in periods:
-                plt.plot(
-                    data[self.date_col],
-                    data["EMA_{}".format(period)],
-                    label="EMA_{}".format(period),
-                )
-            plt.legend()
-            plt.title("Price and EMA Plot", fontsize=28, color="b")
-            plt.xlabel("Time", color="b", fontsize=19)
-            plt.ylabel("Price/EMA", color="b", fontsize=19)
-            plt.savefig(
-                self.plot_dir.joinpath(plot_name),  # type: ignore
-                bbox_inches="tight",
-                facecolor="orange",
-            )
-            fig.set_facecolor("orange")
-            if show_plot is True:
-                plt.show()
-        return data
+            self.__plot("ema", data, plot_name, show_plot)
+        return self.__output(data)
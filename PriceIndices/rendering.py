@@ -0,0 +1,326 @@
+"""
+Headless rendering of the indicator charts.
+
+Charts are drawn with the object oriented matplotlib API on Agg canvases,
+without pyplot, on figures which are cleared and reused for the next chart,
+so rendering thousands of charts keeps a flat memory use. matplotlib is
+imported with the first chart.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+RenderJob = Tuple[str, pd.DataFrame, Union[str, Path]]
+
+
+def _draw_vola_index(
+    fig: "Figure", data: pd.DataFrame, date_col: str, price_col: str
+) -> None:
+    fig.patch.set_facecolor("yellow")
+    ax1 = fig.add_subplot(211)
+    ax1.plot(data[date_col], data[price_col], color="blue", label="Price")
+    ax1.set_ylabel("Price", color="red", fontsize=20)
+    ax1.get_xaxis().set_ticks([])
+    ax1.legend()
+    ax1.tick_params(axis="y", colors="b")
+    ax1.grid(color="grey", linestyle="-", linewidth=0.25, alpha=0.5)
+
+    ax2 = fig.add_subplot(212)
+    ax2.plot(data[date_col], data["BVOL_Index"], color="b", label="BVOL Index")
+    ax2.set_xlabel("Time", color="red", fontsize=20)
+    ax2.set_ylabel("Volatility Index", color="r", fontsize=20)
+    ax2.legend()
+    ax2.tick_params(axis="x", labelrotation=90, colors="b")
+    ax2.tick_params(axis="y", colors="b")
+    ax2.grid(color="grey", linestyle="-", linewidth=0.25, alpha=0.5)
+    fig.suptitle("Price  and  Volatility Index", color="red", fontsize=24)
+
+
+def _draw_rsi(
+    fig: "Figure", data: pd.DataFrame, date_col: str, price_col: str
+) -> None:
+    fig.patch.set_facecolor("yellow")
+    ax1 = fig.add_subplot(211)
+    ax1.plot(data[date_col], data[price_col], color="blue", label="Price")
+    ax1.set_ylabel("Price ($)", color="red", fontsize=20)
+    ax1.get_xaxis().set_ticks([])
+    ax1.legend()
+    ax1.tick_params(axis="y", colors="b")
+
+    ax2 = fig.add_subplot(212)
+    ax2.plot(data[date_col], data["RSI_2"], color="b", label="RSI")
+    ax2.set_xlabel("Time", color="red", fontsize=20)
+    ax2.set_ylabel("Relative Strength Index (RSI)", color="r", fontsize=20)
+    middle = data[date_col].iloc[int(len(data) / 2)]
+    ax2.text(middle, 80, ">70 OverBought", fontsize=20, color="black")
+    ax2.text(middle, 15, "<30 OverSold", fontsize=20, color="black")
+    ax2.legend()
+    ax2.tick_params(axis="x", labelrotation=90, colors="b")
+    ax2.tick_params(axis="y", colors="b")
+    ax2.axhline(y=70, color="r")
+    ax2.axhline(y=30, color="r")
+    fig.suptitle(
+        "Price  and  Relative  Strength Index", color="red", fontsize=24
+    )
+
+
+def _draw_bollinger_bands(
+    fig: "Figure", data: pd.DataFrame, date_col: str, price_col: str
+) -> None:
+    fig.set_facecolor("yellow")
+    ax = fig.add_subplot()
+    ax.plot(data[date_col], data["BB_upper"], color="g", label="BB_upper")
+    ax.plot(data[date_col], data["BB_lower"], color="g", label="BB_lower")
+    ax.plot(data[date_col], data[price_col], color="orange", label="Price")
+    ax.legend()
+    ax.set_xlabel("Time", color="b", fontsize=22)
+    ax.set_ylabel("Price", color="b", fontsize=22)
+    ax.set_title("Bollinger Bands", color="b", fontsize=27)
+    ax.tick_params(labelsize=17)
+    ax.grid()
+
+
+def _draw_lines(
+    fig: "Figure",
+    data: pd.DataFrame,
+    date_col: str,
+    price_col: str,
+    columns: List[str],
+    title: str,
+    ylabel: str,
+    colors: Optional[List[str]] = None,
+) -> None:
+    ax = fig.add_subplot()
+    ax.plot(data[date_col], data[price_col], color="r", label="Price")
+    for i, column in enumerate(columns):
+        color = colors[i] if colors else None
+        ax.plot(data[date_col], data[column], color=color, label=column)
+    ax.legend()
+    ax.set_title(title, fontsize=28, color="b")
+    ax.set_xlabel("Time", color="b", fontsize=19)
+    ax.set_ylabel(ylabel, color="b", fontsize=19)
+
+
+def _draw_macd(
+    fig: "Figure", data: pd.DataFrame, date_col: str, price_col: str
+) -> None:
+    _draw_lines(
+        fig,
+        data,
+        date_col,
+        price_col,
+        ["MACD"],
+        "Price and MACD Plot",
+        "Price",
+        colors=["b"],
+    )
+
+
+def _draw_sma(
+    fig: "Figure", data: pd.DataFrame, date_col: str, price_col: str
+) -> None:
+    _draw_lines(
+        fig,
+        data,
+        date_col,
+        price_col,
+        ["SMA"],
+        "Price and SMA Plot",
+        "Price",
+        colors=["b"],
+    )
+
+
+def _draw_ema(
+    fig: "Figure", data: pd.DataFrame, date_col: str, price_col: str
+) -> None:
+    columns = [c for c in data.columns if str(c).startswith("EMA_")]
+    _draw_lines(
+        fig,
+        data,
+        date_col,
+        price_col,
+        columns,
+        "Price and EMA Plot",
+        "Price/EMA",
+    )
+
+
+# Chart kind to (figure size, draw function).
+TEMPLATES: Dict[str, Tuple[Tuple[int, int], Callable]] = {
+    "vola_index": ((14, 12), _draw_vola_index),
+    "rsi": ((14, 12), _draw_rsi),
+    "bollinger_bands": ((16, 12), _draw_bollinger_bands),
+    "macd": ((14, 9), _draw_macd),
+    "sma": ((14, 9), _draw_sma),
+    "ema": ((14, 9), _draw_ema),
+}
+
+_figures: Dict[Tuple[int, int], "Figure"] = {}
+
+
+def _figure(figsize: Tuple[int, int]) -> "Figure":
+    # One reusable figure per size and process.
+    if figsize not in _figures:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _figures[figsize] = fig
+    return _figures[figsize]
+
+
+def downsample(
+    data: pd.DataFrame, column: str, max_points: Optional[int]
+) -> pd.DataFrame:
+    """
+    Reduce a long series to about max_points rows, keeping the minimum and
+    maximum of `column` in every bucket so that peaks stay visible.
+    Args:
+        data (pd.DataFrame): Rows to plot, in plotting order.
+        column (str): Column whose extremes are kept.
+        max_points (int): Maximum number of rows. None keeps all rows.
+
+    Returns:
+        pd.DataFrame: Subset of the rows of data
+    """
+    n = len(data)
+    if max_points is None or n <= max_points:
+        return data
+    buckets = max(max_points // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    values = data[column].to_numpy(dtype=float)
+    keep = [0, n - 1]
+    for start, stop in zip(edges[:-1], edges[1:]):
+        if stop > start:
+            chunk = values[start:stop]
+            if np.isnan(chunk).all():
+                keep.append(start)
+                continue
+            keep.extend(
+                (start + np.nanargmin(chunk), start + np.nanargmax(chunk))
+            )
+    return data.iloc[np.unique(keep)]
+
+
+def draw(
+    fig: "Figure",
+    kind: str,
+    data: pd.DataFrame,
+    date_col: str = "date",
+    price_col: str = "price",
+) -> None:
+    """
+    Draw a chart on a figure.
+    Args:
+        fig (Figure): matplotlib figure, from Figure() or pyplot.
+        kind (str): Chart kind, one of TEMPLATES.
+        data (pd.DataFrame): Output of the matching Indices.get_* method.
+        date_col (str): Date column name.
+        price_col (str): Price column name.
+    """
+    TEMPLATES[kind][1](fig, data, date_col, price_col)
+
+
+def render(
+    kind: str,
+    data: pd.DataFrame,
+    path: Union[str, Path],
+    date_col: str = "date",
+    price_col: str = "price",
+    max_points: Optional[int] = None,
+    show: bool = False,
+) -> None:
+    """
+    Render a chart to a PNG file on a recycled Agg figure.
+    Args:
+        kind (str): Chart kind, one of TEMPLATES.
+        data (pd.DataFrame): Output of the matching Indices.get_* method.
+        path (str): Output file path.
+        date_col (str): Date column name.
+        price_col (str): Price column name.
+        max_points (int): Downsample longer series to about this many
+                          points. Default to None (no downsampling).
+        show (bool): Also display the chart. This draws on a pyplot figure,
+                     which is closed once displayed.
+    """
+    figsize, _ = TEMPLATES[kind]
+    if show:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=figsize)
+        draw(
+            fig,
+            kind,
+            downsample(data, price_col, max_points),
+            date_col,
+            price_col,
+        )
+        fig.savefig(path, bbox_inches="tight", facecolor="orange")
+        plt.show()
+        plt.close(fig)
+        return
+    fig = _figure(figsize)
+    try:
+        draw(
+            fig,
+            kind,
+            downsample(data, price_col, max_points),
+            date_col,
+            price_col,
+        )
+        fig.savefig(path, bbox_inches="tight", facecolor="orange")
+    finally:
+        fig.clear()
+
+
+def _render_job(args: tuple) -> None:
+    render(*args)
+
+
+def render_many(
+    jobs: Iterable[RenderJob],
+    date_col: str = "date",
+    price_col: str = "price",
+    max_points: Optional[int] = None,
+    max_workers: Optional[int] = None,
+) -> None:
+    """
+    Render many charts on a pool of worker processes.
+    Args:
+        jobs (list): (kind, data, path) tuples.
+        date_col (str): Date column name.
+        price_col (str): Price column name.
+        max_points (int): See render.
+        max_workers (int): Number of worker processes. Default to the
+                           number of CPUs.
+    """
+    args = [
+        (kind, data, path, date_col, price_col, max_points)
+        for kind, data, path in jobs
+    ]
+    if max_workers == 1:
+        for arg in args:
+            _render_job(arg)
+        return
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(_render_job, args))
@@ -0,0 +1,203 @@
+"""
+Resampling of OHLCV bars to higher timeframes.
+
+Bars are bucketed on sorted datetime64 arrays: bucket boundaries are where
+the integer bucket number (time - origin) // width changes, and every
+column is reduced over the buckets in one ufunc.reduceat call: open is the
+first value, high the max, low the min, close the last and volume the sum.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "price": "last",
+    "volume": "sum",
+    "market_cap": "last",
+}
+
+# Weekly buckets start on Mondays, shorter ones at the epoch.
+_MONDAY = np.datetime64("1970-01-05", "ns")
+_EPOCH = np.datetime64("1970-01-01", "ns")
+
+
+def _width(rule: str) -> np.timedelta64:
+    # pandas reads "M" as minutes and "Y" as 365.2425 days, calendar months
+    # and years have no fixed width.
+    if re.fullmatch(r"[\d.\s]*(M|MS|Y|y)", rule):
+        raise ValueError(
+            "Unsupported rule {!r}, months and years have no fixed width, "
+            "use e.g. '1min' for minutes or '30D'".format(rule)
+        )
+    try:
+        width = pd.Timedelta(rule)
+    except ValueError:
+        raise ValueError(
+            "Unsupported rule {!r}, use a fixed width such as '4h', '1D' or "
+            "'1W'".format(rule)
+        )
+    if width <= pd.Timedelta(0):
+        raise ValueError("rule must be a positive duration")
+    out: np.timedelta64 = width.to_timedelta64()
+    return out
+
+
+def _reduce(how: str, values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    out: np.ndarray
+    if how == "first":
+        out = values[starts]
+    elif how == "last":
+        out = values[np.append(starts[1:], len(values)) - 1]
+    elif how == "max":
+        out = np.fmax.reduceat(values, starts)
+    elif how == "min":
+        out = np.fmin.reduceat(values, starts)
+    else:
+        out = np.add.reduceat(np.where(np.isnan(values), 0, values), starts)
+    return out
+
+
+def resample(
+    df: pd.DataFrame,
+    rule: str,
+    date_col: str = "date",
+    ascending: bool = False,
+) -> pd.DataFrame:
+    """
+    Build higher timeframe bars from OHLCV bars, e.g. the output of
+    MarketHistory.get_history.
+    Args:
+        df (pd.DataFrame): Bars with a date column and any of the columns of
+                           AGGREGATIONS. Other columns are dropped.
+        rule (str): Bar width: a fixed duration such as "4h", "1D" or "1W"
+                    (weeks start on Monday). Months and years ("1M",
+                    "1Y") have no fixed width and raise ValueError.
+        date_col (str): Date column name.
+        ascending (bool): Return bars oldest first instead of newest first.
+
+    Returns:
+        pd.DataFrame: One row per non empty bucket, dated by the start of
+                      the bucket.
+    """
+    width = _width(rule)
+    week = np.timedelta64(7, "D")
+    origin = _MONDAY if width % week == np.timedelta64(0) else _EPOCH
+    if not len(df):
+        names = [c for c in AGGREGATIONS if c in df.columns] + [date_col]
+        return pd.DataFrame(columns=names)
+    dates = pd.to_datetime(df[date_col]).to_numpy(dtype="M8[ns]")
+    order = None
+    if not (dates[1:] >= dates[:-1]).all():
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order]
+
+    keys = (dates - origin) // width
+    starts = np.flatnonzero(np.diff(keys, prepend=keys[:1] - 1))
+    columns: Dict[str, np.ndarray] = {}
+    for column, how in AGGREGATIONS.items():
+        if column not in df.columns:
+            continue
+        values = df[column].to_numpy(dtype=float)
+        if order is not None:
+            values = values[order]
+        columns[column] = _reduce(how, values, starts)
+    columns[date_col] = origin + keys[starts] * width
+
+    out = pd.DataFrame(columns)
+    if not ascending:
+        out = out.iloc[::-1].reset_index(drop=True)
+    return out
+
+
+class Resampler(object):
+    """
+    Incremental resampling of a growing series of bars to one timeframe.
+    Each update only reduces the new bars and merges them into the last,
+    still open, bar.
+
+        resampler = Resampler("4h")
+        resampler.update(history)       # full history once
+        resampler.update(new_bars)      # then only new bars
+        bars = resampler.bars()
+    """
+
+    def __init__(self, rule: str, date_col: str = "date") -> None:
+        """
+        Args:
+            rule (str): Bar width. See resample.
+            date_col (str): Date column name.
+        """
+        self.rule = rule
+        self.date_col = date_col
+        _width(rule)
+        self._frames: List[pd.DataFrame] = []
+        self._last: Optional[pd.DataFrame] = None
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add bars newer than (or in the same bucket as) the last bar seen.
+        Args:
+            df (pd.DataFrame): New bars, in any order.
+
+        Returns:
+            pd.DataFrame: The bars which changed, oldest first: the updated
+                          last bar and the new ones.
+        """
+        new = resample(df, self.rule, self.date_col, ascending=True)
+        if not len(new):
+            return new
+        last = self._last
+        if last is not None:
+            last_date = last[self.date_col].iloc[0]
+            first_date = new[self.date_col].iloc[0]
+            if first_date < last_date:
+                raise ValueError(
+                    "Bars must not be older than the last bucket {}".format(
+                        last_date
+                    )
+                )
+            if first_date == last_date:
+                merged: Dict[str, Any] = {self.date_col: [last_date]}
+                for column in new.columns.drop(self.date_col):
+                    values = np.array(
+                        [last[column].iloc[0], new[column].iloc[0]]
+                    )
+                    merged[column] = _reduce(
+                        AGGREGATIONS[column], values, np.array([0])
+                    )
+                new = pd.concat(
+                    [pd.DataFrame(merged, columns=new.columns), new.iloc[1:]],
+                    ignore_index=True,
+                )
+            else:
+                self._frames.append(last)
+        if len(new) > 1:
+            self._frames.append(new.iloc[:-1])
+        if len(self._frames) > 64:
+            self._frames = [pd.concat(self._frames, ignore_index=True)]
+        self._last = new.iloc[-1:]
+        return new
+
+    def bars(self, ascending: bool = False) -> pd.DataFrame:
+        """
+        All bars so far.
+        Args:
+            ascending (bool): Oldest first instead of newest first.
+
+        Returns:
+            pd.DataFrame: Pandas DataFrame
+        """
+        frames = self._frames + ([self._last] if self._last is not None else [])
+        if not frames:
+            return pd.DataFrame(columns=[self.date_col])
+        out = pd.concat(frames, ignore_index=True)
+        if not ascending:
+            out = out.iloc[::-1].reset_index(drop=True)
+        return out
@@ -0,0 +1,175 @@
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Mapping, Optional, Tuple
+
+INTERACTIVE = 0
+BATCH = 10
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Seconds to wait before the next request according to the rate limit
+    headers of a response: Retry-After (seconds or HTTP date), or an
+    exhausted X-RateLimit-Remaining / RateLimit-Remaining with its reset.
+    Args:
+        headers (dict): Response headers (case insensitive mapping).
+
+    Returns:
+        float: Seconds to wait, or None when the headers don't say.
+    """
+    value = headers.get("Retry-After")
+    if value:
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        try:
+            at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max((at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    for prefix in ("X-RateLimit-", "RateLimit-"):
+        remaining = headers.get(prefix + "Remaining")
+        reset = headers.get(prefix + "Reset")
+        if remaining is None or reset is None:
+            continue
+        try:
+            if float(remaining) > 0:
+                return None
+            reset_at = float(reset)
+        except ValueError:
+            return None
+        # Some providers send an epoch timestamp, others a delay.
+        if reset_at > 1e9:
+            reset_at -= time.time()
+        return max(reset_at, 0.0)
+    return None
+
+
+class RequestScheduler(object):
+    """
+    Admission control for the requests of a MarketHistory, shared by all its
+    threads:
+
+    * a token bucket of `rate` requests per second with `burst` tokens,
+    * an adaptive concurrency limit which is halved on 429 (or 503) and
+      grows back by one per limit's worth of successful requests,
+    * a pause honoring Retry-After and rate limit headers,
+    * a priority queue, so INTERACTIVE requests are let through before
+      BATCH ones waiting at the same time.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        max_concurrency: int = 16,
+        min_concurrency: int = 1,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 120.0,
+    ) -> None:
+        """
+        Args:
+            rate (float): Requests per second. None disables the token
+                          bucket.
+            burst (int): Tokens the bucket can hold.
+            max_concurrency (int): Upper bound of requests in flight.
+            min_concurrency (int): Lower bound the limit backs off to.
+            max_retries (int): Retries of a throttled (429) request.
+            backoff_factor (float): Pause after a throttled response without
+                                    rate limit headers is
+                                    backoff_factor * 2 ** n for the n-th
+                                    throttled response in a row.
+            backoff_max (float): Longest pause, in seconds.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.limit = float(max_concurrency)
+        self.active = 0
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._throttled = 0
+        self._queue: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def __delay(self, now: float) -> float:
+        delay = self._paused_until - now
+        if self.rate:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            delay = max(delay, (1.0 - self._tokens) / self.rate)
+        return delay
+
+    def acquire(self, priority: int = BATCH) -> None:
+        """
+        Block until a request of the given priority may be sent. Lower
+        values go first, ties in arrival order. Every acquire must be
+        followed by a release.
+        Args:
+            priority (int): INTERACTIVE, BATCH or any int.
+        """
+        entry = (priority, next(self._seq))
+        with self._cond:
+            heapq.heappush(self._queue, entry)
+            while True:
+                timeout = None
+                if self._queue[0] == entry and self.active < int(self.limit):
+                    timeout = self.__delay(time.monotonic())
+                    if timeout <= 0:
+                        break
+                self._cond.wait(timeout)
+            heapq.heappop(self._queue)
+            self.active += 1
+            if self.rate:
+                self._tokens -= 1.0
+            self._cond.notify_all()
+
+    def release(
+        self,
+        status: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> bool:
+        """
+        Report the outcome of an acquired request.
+        Args:
+            status (int): HTTP status code, None if no response came back.
+            headers (dict): Response headers.
+
+        Returns:
+            bool: True when the request was throttled and should be sent
+                  again.
+        """
+        throttled = status in (429, 503)
+        with self._cond:
+            self.active -= 1
+            pause = retry_after(headers) if headers is not None else None
+            if throttled:
+                self._throttled += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                if pause is None:
+                    pause = self.backoff_factor * 2 ** (self._throttled - 1)
+            elif status is not None and status < 400:
+                self._throttled = 0
+                self.limit = min(
+                    self.max_concurrency, self.limit + 1.0 / self.limit
+                )
+            if pause is not None:
+                pause = min(pause, self.backoff_max)
+                self._paused_until = max(
+                    self._paused_until, time.monotonic() + pause
+                )
+            self._cond.notify_all()
+        return throttled
@@ -0,0 +1,243 @@
+"""
+Signal screening of many coins at once.
+
+Rules are declarative conditions on indicator columns, evaluated as array
+operations over a dates x coins panel. Only the trailing rows which the
+rules look at, plus the warm-up rows of their indicators, are calculated.
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .indicator_cache import WARMUP, bind_params
+from .panel import PanelIndices
+from .price_indicators import calculate
+
+Operand = Union[float, str]
+
+COMPARISONS: Dict[str, Callable[..., np.ndarray]] = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+}
+CROSSES = ("crosses_above", "crosses_below", "sign_change")
+
+# Indicator of every output column, EMA_<n> columns aside.
+COLUMNS = {
+    "BVOL_Index": "vola_index",
+    "RSI_1": "rsi",
+    "RS_Smooth": "rsi",
+    "RSI_2": "rsi",
+    "BB_upper": "bollinger_bands",
+    "BB_lower": "bollinger_bands",
+    "MACD": "macd",
+    "SMA": "sma",
+}
+
+
+class Rule(object):
+    """
+    One screening condition, e.g.
+
+        Rule("overbought", "RSI_2", ">", 70)
+        Rule("breakout", "price", "crosses_above", "BB_upper")
+        Rule("macd_flip", "MACD", "sign_change")
+    """
+
+    def __init__(
+        self, name: str, column: str, op: str, other: Operand = 0.0
+    ) -> None:
+        """
+        Args:
+            name (str): Rule name reported with its matches.
+            column (str): "price" or an indicator output column, e.g.
+                          "RSI_2", "BB_upper" or "EMA_20".
+            op (str): ">", ">=", "<", "<=", "crosses_above",
+                      "crosses_below" or "sign_change" (other is ignored).
+            other (float or str): Threshold, or a column to compare with.
+        """
+        if op not in COMPARISONS and op not in CROSSES:
+            raise ValueError(
+                "Unknown operator {!r}, choose from {}".format(
+                    op, ", ".join(list(COMPARISONS) + list(CROSSES))
+                )
+            )
+        self.name = name
+        self.column = column
+        self.op = op
+        self.other = other
+
+    @property
+    def lookback(self) -> int:
+        """
+        Rows the rule reads for one screened date.
+        """
+        return 2 if self.op in CROSSES else 1
+
+    def columns(self) -> List[str]:
+        """
+        Columns the rule reads.
+        """
+        if isinstance(self.other, str) and self.op != "sign_change":
+            return [self.column, self.other]
+        return [self.column]
+
+    def evaluate(
+        self, arrays: Dict[str, np.ndarray], dates: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Evaluate the rule on the last rows of indicator arrays.
+        Args:
+            arrays (dict): Column name to a rows x coins array.
+            dates (int): Number of trailing dates to screen.
+
+        Returns:
+            tuple: dates x coins boolean mask of matches, and the values of
+                   column at those dates.
+        """
+        a = arrays[self.column][-(dates + self.lookback - 1) :]
+        b: Union[np.ndarray, float]
+        if not isinstance(self.other, str):
+            b = float(self.other)
+        elif self.op != "sign_change":
+            b = arrays[self.other][-len(a) :]
+        else:
+            b = 0.0
+        with np.errstate(invalid="ignore"):
+            if self.op in COMPARISONS:
+                mask = COMPARISONS[self.op](a, b)
+            elif self.op == "sign_change":
+                mask = np.sign(a[1:]) * np.sign(a[:-1]) < 0
+            else:
+                diff = a - b
+                if self.op == "crosses_below":
+                    diff = -diff
+                mask = (diff[:-1] <= 0) & (diff[1:] > 0)
+        return mask, a[-len(mask) :]
+
+
+class Screener(object):
+    """
+    Evaluate rules for every coin of a panel, on its last dates only.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Rule],
+        params: Optional[Dict[str, dict]] = None,
+        ema_warmup_spans: int = 10,
+        backend: Optional[str] = None,
+    ) -> None:
+        """
+        Args:
+            rules (list): Rules to evaluate.
+            params (dict): Indicator name to keyword arguments of its get_*
+                           method. E.g., {"bollinger_bands": {"days": 20}}
+            ema_warmup_spans (int): MACD and EMA start this many spans
+                                    before the screened dates, after which
+                                    the weight of earlier prices is below
+                                    exp(-2 * ema_warmup_spans).
+            backend (str): Compute backend, see Indices.
+        """
+        self.rules = list(rules)
+        self.ema_warmup_spans = ema_warmup_spans
+        self.backend = backend
+        self.specs: Dict[str, dict] = {}
+        params = params or {}
+        periods: Set[int] = set()
+        for rule in self.rules:
+            for column in rule.columns():
+                name, period = self.__indicator(column)
+                if name is None:
+                    continue
+                if name not in self.specs:
+                    self.specs[name] = bind_params(
+                        name, params.get(name), backend
+                    )
+                periods.update(period)
+        # The EMA periods are the ones of the EMA_<n> columns.
+        if "ema" in self.specs:
+            self.specs["ema"]["periods"] = sorted(periods)
+
+    @staticmethod
+    def __indicator(column: str) -> Tuple[Optional[str], List[int]]:
+        if column == "price":
+            return None, []
+        match = re.fullmatch(r"EMA_(\d+)", column)
+        if match:
+            return "ema", [int(match.group(1))]
+        if column not in COLUMNS:
+            raise ValueError("Unknown column {!r}".format(column))
+        return COLUMNS[column], []
+
+    def warmup(self, name: str, params: dict) -> int:
+        """
+        Rows before the first screened date which an indicator needs.
+        """
+        if name in WARMUP:
+            return int(WARMUP[name](params))
+        spans: List[int] = [26] if name == "macd" else params["periods"]
+        return self.ema_warmup_spans * max(spans)
+
+    def screen(
+        self,
+        panel: Union[PanelIndices, pd.DataFrame],
+        dates: int = 1,
+    ) -> pd.DataFrame:
+        """
+        Find the rules which match on the last dates of every coin.
+        Args:
+            panel (PanelIndices): Prices of all coins, or a wide DataFrame
+                                  of prices, one column per coin.
+            dates (int): Number of trailing dates to screen. At most the
+                         length of the panel is screened.
+
+        Returns:
+            pd.DataFrame: One row per match with "coin", "date", "rule" and
+                          "value" (of the rule's column), newest first.
+        """
+        if dates < 1:
+            raise ValueError("dates must be at least 1")
+        if not isinstance(panel, PanelIndices):
+            panel = PanelIndices(panel)
+        dates = min(dates, len(panel.prices))
+        lookback = max([rule.lookback for rule in self.rules] + [1])
+        warmup = max([self.warmup(n, p) for n, p in self.specs.items()] + [0])
+        rows = warmup + dates + lookback - 1
+        prices = panel.prices.iloc[-rows:]
+        matrix = prices.to_numpy()
+        missing = np.isnan(matrix)
+
+        arrays: Dict[str, np.ndarray] = {"price": matrix}
+        for name, params in self.specs.items():
+            outputs = calculate(name, matrix, params, self.backend)
+            for column, values in outputs.items():
+                arrays[column] = np.where(missing, np.nan, values)
+
+        index = prices.index[-dates:]
+        frames = []
+        for rule in self.rules:
+            mask, values = rule.evaluate(arrays, dates)
+            row, col = np.nonzero(mask)
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "coin": prices.columns[col],
+                        "date": index[row - len(mask) + len(index)],
+                        "rule": rule.name,
+                        "value": values[row, col],
+                    }
+                )
+            )
+        if not frames:
+            return pd.DataFrame(columns=["coin", "date", "rule", "value"])
+        result = pd.concat(frames, ignore_index=True)
+        return result.sort_values(
+            ["date", "coin", "rule"],
+            ascending=[False, True, True],
+            ignore_index=True,
+        )
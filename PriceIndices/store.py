@@ -0,0 +1,272 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from .crypto_history import QUOTE_COLUMNS
+from .history_cache import DateRange, _gaps, _merge, _today
+
+
+class PriceStore(object):
+    """
+    Local store of daily candles of many coins in one SQLite file, indexed
+    by (coin, date).
+
+    Writes are upserts, so candles fetched again replace the stored ones.
+    The file is in WAL mode and memory mapped: any number of processes can
+    read it while one writes, sharing its pages through the OS page cache.
+    Ranges follow the same semantics as HistoryCache, so a PriceStore can be
+    given to MarketHistory(store=...) to read through it.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path] = "prices.sqlite",
+        readonly: bool = False,
+        mmap_bytes: int = 1 << 30,
+    ) -> None:
+        """
+        Args:
+            path (str): SQLite file of the store.
+            readonly (bool): Open an existing store for reading only.
+            mmap_bytes (int): Bytes of the file to memory map per
+                              connection.
+        """
+        self.path = Path(path)
+        self.readonly = readonly
+        self.mmap_bytes = mmap_bytes
+        self._local = threading.local()
+        if not readonly:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            con = self.__connect()
+            columns = ", ".join(f'"{c}" REAL' for c in QUOTE_COLUMNS)
+            con.execute("PRAGMA journal_mode=WAL")
+            with con:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS candles ("
+                    f'"coin" TEXT, "date" TEXT, {columns}, '
+                    'PRIMARY KEY ("coin", "date")) WITHOUT ROWID'
+                )
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS coverage "
+                    '("coin" TEXT, "start" TEXT, "end" TEXT)'
+                )
+                con.execute(
+                    "CREATE INDEX IF NOT EXISTS coverage_coin "
+                    'ON coverage ("coin")'
+                )
+
+    def __connect(self) -> sqlite3.Connection:
+        # One connection per thread, kept open.
+        con = getattr(self._local, "con", None)
+        if con is None:
+            if self.readonly:
+                con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            else:
+                con = sqlite3.connect(self.path, timeout=60)
+            con.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self._local.con = con
+        return con
+
+    def close(self) -> None:
+        """
+        Close the connection of the calling thread.
+        """
+        con = getattr(self._local, "con", None)
+        if con is not None:
+            con.close()
+            self._local.con = None
+
+    def coins(self) -> List[str]:
+        """
+        Returns:
+            list: Coin names with stored candles.
+        """
+        rows = self.__connect().execute(
+            'SELECT DISTINCT "coin" FROM candles ORDER BY "coin"'
+        )
+        return [row[0] for row in rows]
+
+    def covered(self, coin_id: str) -> List[DateRange]:
+        """
+        Merged date ranges stored for a coin.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+        Returns:
+            list: Sorted, non overlapping (start_date, end_date) tuples
+        """
+        rows = self.__connect().execute(
+            'SELECT "start", "end" FROM coverage WHERE "coin" = ?', (coin_id,)
+        )
+        return _merge(rows.fetchall())
+
+    def missing(
+        self, coin_id: str, start_date: str, end_date: str
+    ) -> List[DateRange]:
+        """
+        Date ranges of a request which are not in the store yet.
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+        Returns:
+            list: (start_date, end_date) tuples to fetch
+        """
+        return _gaps(self.covered(coin_id), start_date, end_date)
+
+    def upsert(
+        self,
+        df: pd.DataFrame,
+        coin_id: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> None:
+        """
+        Insert or replace candles in one transaction.
+        Args:
+            df (pd.DataFrame): Candles with a "date" column, and a "coin"
+                               column unless coin_id is given. E.g., the
+                               output of HistoryBatch.to_frame.
+            coin_id (str): coin name of all rows of df.
+            start_date (str): With end_date, the fetched range df covers.
+                              The stored ranges are only extended when it is
+                              given.
+            end_date (str): End date of the fetched range.
+        """
+        if coin_id is not None:
+            df = df.assign(coin=coin_id)
+        dates = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+        columns = [c for c in QUOTE_COLUMNS if c in df.columns]
+        rows = pd.DataFrame({"coin": df["coin"], "date": dates})
+        for column in columns:
+            rows[column] = df[column].astype(float)
+        names = ", ".join(f'"{c}"' for c in rows.columns)
+        updates = ", ".join(f'"{c}" = excluded."{c}"' for c in columns)
+        sql = (
+            f"INSERT INTO candles ({names}) "
+            f"VALUES ({', '.join('?' * len(rows.columns))}) "
+            f'ON CONFLICT ("coin", "date") DO UPDATE SET {updates}'
+        )
+        con = self.__connect()
+        with con:
+            con.executemany(sql, rows.itertuples(index=False, name=None))
+            if start_date is not None and end_date is not None:
+                end_date = min(end_date, _today(-1))
+                coins = [coin_id] if coin_id else rows["coin"].unique()
+                if start_date < end_date:
+                    con.executemany(
+                        "INSERT INTO coverage VALUES (?, ?, ?)",
+                        [(c, start_date, end_date) for c in coins],
+                    )
+
+    def write(
+        self, coin_id: str, df: pd.DataFrame, start_date: str, end_date: str
+    ) -> None:
+        """
+        Merge freshly fetched candles of a coin into the store. Same as
+        HistoryCache.write, so MarketHistory can read through the store.
+        """
+        self.upsert(df, coin_id, start_date, end_date)
+
+    @contextmanager
+    def pinned(self, coin_id: str) -> Iterator[None]:
+        """
+        Same as HistoryCache.pinned. A store never evicts, so there is
+        nothing to do.
+        """
+        yield
+
+    def query(
+        self,
+        coin_ids: Union[str, Iterable[str]],
+        start_date: str,
+        end_date: str,
+        columns: Optional[List[str]] = None,
+        ascending: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Candles of one or more coins from an index range scan.
+        Args:
+            coin_ids (str or list): coin name, or names.
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+                              (exclusive, like MarketHistory).
+            end_date (str): End date in 'YYYY-MM-DD' format (inclusive).
+            columns (list): Quote columns to read. Default to all. Other
+                            names raise ValueError.
+            ascending (bool): Oldest first instead of newest first.
+        Returns:
+            pd.DataFrame: Pandas DataFrame with "date" strings, plus "coin"
+                          when several coins are asked for.
+        """
+        single = isinstance(coin_ids, str)
+        coins = [coin_ids] if single else list(dict.fromkeys(coin_ids))
+        columns = list(columns or QUOTE_COLUMNS)
+        unknown = [c for c in columns if c not in QUOTE_COLUMNS]
+        if unknown:
+            raise ValueError(
+                "Unknown columns {}, choose from {}".format(
+                    ", ".join(map(repr, unknown)), ", ".join(QUOTE_COLUMNS)
+                )
+            )
+        names = ", ".join(f'"{c}"' for c in ["coin", "date"] + columns)
+        order = "ASC" if ascending else "DESC"
+        frames = []
+        # One range scan per batch of coins, within the SQLite limit of
+        # bound parameters.
+        for start in range(0, len(coins), 900):
+            batch = coins[start : start + 900]
+            marks = ", ".join("?" * len(batch))
+            frames.append(
+                pd.read_sql(
+                    f'SELECT {names} FROM candles WHERE "coin" IN ({marks}) '
+                    'AND "date" > ? AND "date" <= ? '
+                    f'ORDER BY "coin", "date" {order}',
+                    self.__connect(),
+                    params=(*batch, start_date, end_date),
+                )
+            )
+        if not frames:
+            empty = {c: pd.Series(dtype=object) for c in ["coin", "date"]}
+            empty.update({c: pd.Series(dtype=float) for c in columns})
+            frames.append(pd.DataFrame(empty))
+        df = pd.concat(frames, ignore_index=True)
+        # Coins in the order asked for, each in date order.
+        position = {coin: i for i, coin in enumerate(coins)}
+        df = df.sort_values(
+            "coin", key=lambda c: c.map(position), kind="stable"
+        ).reset_index(drop=True)
+        if single:
+            df = df.drop(columns="coin")
+        return df[columns + ["date"] + ([] if single else ["coin"])]
+
+    def read(
+        self, coin_id: str, start_date: str, end_date: str
+    ) -> pd.DataFrame:
+        """
+        Stored candles of a coin, newest first. Same as HistoryCache.read.
+        """
+        return self.query(coin_id, start_date, end_date)
+
+    def prices(
+        self, coin_id: str, start_date: str, end_date: str
+    ) -> pd.DataFrame:
+        """
+        Closing prices of a coin, oldest first, ready for
+        Indices(df, assume_sorted=True).
+        Args:
+            coin_id (str): coin name. E.g., bitcoin
+            start_date (str): Starting date in 'YYYY-MM-DD' format
+            end_date (str): End date in 'YYYY-MM-DD' format
+        Returns:
+            pd.DataFrame: Pandas DataFrame with "date" (datetime64) and
+                          "price" columns
+        """
+        df = self.query(
+            coin_id, start_date, end_date, columns=["close"], ascending=True
+        )
+        return pd.DataFrame(
+            {"date": pd.to_datetime(df["date"]), "price": df["close"]}
+        )
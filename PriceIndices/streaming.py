@@ -0,0 +1,243 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+from .price_indicators import (
+    INDICATORS,
+    IndicatorSpec,
+    Indices,
+    _indicator_specs,
+)
+
+
+class _RollingMoments(object):
+    """
+    Running mean and sample standard deviation of the last `window` values.
+    Sums are shifted by the first value to limit cancellation and rebuilt
+    from the window every `window` updates so rounding errors can't pile up.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.window = window
+        self.values: Deque[float] = deque(maxlen=window)
+        self.shift: Optional[float] = None
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.updates = 0
+
+    def update(self, x: float) -> None:
+        if self.shift is None:
+            self.shift = x
+        if len(self.values) == self.window:
+            old = self.values[0] - self.shift
+            self.sum -= old
+            self.sum_sq -= old * old
+        self.values.append(x)
+        d = x - self.shift
+        self.sum += d
+        self.sum_sq += d * d
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.sum = sum(v - self.shift for v in self.values)
+            self.sum_sq = sum((v - self.shift) ** 2 for v in self.values)
+
+    @property
+    def full(self) -> bool:
+        return len(self.values) == self.window
+
+    @property
+    def mean(self) -> float:
+        if not self.full:
+            return math.nan
+        return self.shift + self.sum / self.window  # type: ignore
+
+    @property
+    def std(self) -> float:
+        if not self.full or self.window < 2:
+            return math.nan
+        n = self.window
+        var = (self.sum_sq - self.sum * self.sum / n) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class _Ema(object):
+    def __init__(self, span: int) -> None:
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = math.nan
+
+    def update(self, x: float) -> float:
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+
+def _ratio(a: float, b: float) -> float:
+    # Division with the pandas semantics the batch indicators rely on.
+    if b == 0:
+        return math.inf if a > 0 else math.nan
+    return a / b
+
+
+def _rsi_value(rs: float) -> float:
+    if math.isnan(rs):
+        return 0.0
+    return 100 * (1 - (1 / (1 + rs)))
+
+
+class _VolaIndex(object):
+    def __init__(self, volatile_period: int = 30) -> None:
+        self.returns = _RollingMoments(volatile_period)
+        self.last: Optional[float] = None
+
+    def update(self, x: float) -> Dict[str, float]:
+        if self.last is not None:
+            self.returns.update(math.log(x) - math.log(self.last))
+        self.last = x
+        return {"BVOL_Index": self.returns.std * math.sqrt(365)}
+
+
+class _Rsi(object):
+    def __init__(self) -> None:
+        self.gain = _RollingMoments(14)
+        self.loss = _RollingMoments(14)
+        self.last: Optional[float] = None
+
+    def update(self, x: float) -> Dict[str, float]:
+        if self.last is None:
+            self.last = x
+            return dict.fromkeys(["RSI_1", "RS_Smooth", "RSI_2"], math.nan)
+        change = x - self.last
+        self.last = x
+        gain, loss = max(change, 0.0), abs(min(change, 0.0))
+        gain_previous, loss_previous = self.gain.mean, self.loss.mean
+        self.gain.update(gain)
+        self.loss.update(loss)
+
+        rs = _ratio(self.gain.mean, self.loss.mean)
+        rs_smooth = _ratio(gain_previous * 13 + gain, loss_previous * 13 + loss)
+        return {
+            "RSI_1": _rsi_value(rs),
+            "RS_Smooth": 0.0 if math.isnan(rs_smooth) else rs_smooth,
+            "RSI_2": _rsi_value(rs_smooth),
+        }
+
+
+class _BollingerBands(object):
+    def __init__(self, days: int = 20) -> None:
+        self.price = _RollingMoments(days)
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.price.update(x)
+        sma, sd = self.price.mean, self.price.std
+        return {"BB_upper": sma + sd * 2, "BB_lower": sma - sma * 2}
+
+
+class _Macd(object):
+    def __init__(self) -> None:
+        self.ema_12 = _Ema(12)
+        self.ema_26 = _Ema(26)
+
+    def update(self, x: float) -> Dict[str, float]:
+        return {"MACD": self.ema_12.update(x) - self.ema_26.update(x)}
+
+
+class _Sma(object):
+    def __init__(self, days: int = 15) -> None:
+        self.price = _RollingMoments(days)
+
+    def update(self, x: float) -> Dict[str, float]:
+        self.price.update(x)
+        return {"SMA": self.price.mean}
+
+
+class _Emas(object):
+    def __init__(self, periods: Iterable[int] = (20,)) -> None:
+        self.emas = {"EMA_{}".format(p): _Ema(p) for p in periods}
+
+    def update(self, x: float) -> Dict[str, float]:
+        return {name: ema.update(x) for name, ema in self.emas.items()}
+
+
+STREAMS = {
+    "vola_index": _VolaIndex,
+    "rsi": _Rsi,
+    "bollinger_bands": _BollingerBands,
+    "macd": _Macd,
+    "sma": _Sma,
+    "ema": _Emas,
+}
+
+
+class IndicatorStream(object):
+    """
+    Incremental indicators for live prices. Each update costs O(1) per
+    indicator and gives the values Indices.compute would give for the
+    newest row of the whole series.
+    """
+
+    def __init__(
+        self, indicators: Iterable[IndicatorSpec] = tuple(INDICATORS)
+    ) -> None:
+        """
+        Args:
+            indicators (list): Indicator names, or (name, params) tuples,
+                               as taken by Indices.compute.
+        """
+        self.streams = [
+            STREAMS[name](**params)  # type: ignore
+            for name, params in _indicator_specs(indicators)
+        ]
+        self.values: Dict[str, float] = {}
+
+    def update(self, price: float) -> Dict[str, float]:
+        """
+        Add the next price, in date order.
+        Args:
+            price (float): Latest price.
+
+        Returns:
+            dict: Indicator column name to its latest value.
+        """
+        price = float(price)
+        values: Dict[str, float] = {}
+        for stream in self.streams:
+            values.update(stream.update(price))
+        self.values = values
+        return values
+
+    def seed(self, prices: Iterable[float]) -> Dict[str, float]:
+        """
+        Feed a price history, oldest first.
+        Args:
+            prices (list): Prices in date order.
+
+        Returns:
+            dict: Indicator values of the last price.
+        """
+        for price in prices:
+            self.update(price)
+        return self.values
+
+    @classmethod
+    def from_indices(
+        cls,
+        indices: Indices,
+        indicators: Iterable[IndicatorSpec] = tuple(INDICATORS),
+    ) -> "IndicatorStream":
+        """
+        Create a stream warmed up with the history of an Indices object.
+        Args:
+            indices (Indices): Indices with the price history.
+            indicators (list): See IndicatorStream.
+
+        Returns:
+            IndicatorStream: Stream ready for the next price.
+        """
+        stream = cls(indicators)
+        data = indices.df
+        if not indices.assume_sorted:
+            data = data.sort_values(by=indices.date_col)
+        stream.seed(data[indices.price_col].to_numpy(dtype=float))
+        return stream
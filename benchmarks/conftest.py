@@ -0,0 +1,86 @@
+"""
+Fixtures of the benchmark suite.
+
+    cd benchmarks
+    pytest                                   # 1k and 100k rows
+    pytest --bench-large                     # also 10M rows
+    pytest --benchmark-compare --benchmark-compare-fail=mean:10%
+
+Every run is saved (--benchmark-autosave) under benchmarks/.benchmarks, and
+--benchmark-compare compares with the last saved one. Timings depend on the
+machine, so saved runs are not committed: to check a change, run the suite
+on its base commit first, then with the change and --benchmark-compare.
+"""
+
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer
+from typing import Dict
+
+import pytest
+
+from benchmarks.helpers import FixtureHandler
+
+PEAK_MEMORY: Dict[str, int] = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--bench-large",
+        action="store_true",
+        help="Also run the 10M rows benchmarks.",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--bench-large"):
+        return
+    skip = pytest.mark.skip(reason="needs --bench-large")
+    for item in items:
+        if "large" in item.keywords:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not PEAK_MEMORY:
+        return
+    terminalreporter.section("peak memory (MiB)")
+    for name, peak in sorted(PEAK_MEMORY.items()):
+        terminalreporter.write_line(f"{peak / 2**20:10.3f}  {name}")
+
+
+@pytest.fixture(scope="session")
+def fixture_api():
+    """
+    Local server answering CoinMarketCap history requests with the recorded
+    fixture quotes. Yields the base url to pass to MarketHistory.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    path = "/v1/cryptocurrency/ohlcv/historical?convert=USD&slug="
+    yield f"http://{host}:{port}{path}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def measure(benchmark):
+    """
+    Benchmark a call, and record its peak traced memory in the extra_info
+    of the benchmark (peak_memory_mb) from one untimed run.
+    """
+
+    def run(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mb"] = round(peak / 2**20, 3)
+        PEAK_MEMORY[benchmark.fullname] = peak
+        return benchmark(func, *args, **kwargs)
+
+    return run
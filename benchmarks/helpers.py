@@ -0,0 +1,102 @@
+"""
+Data builders of the benchmark suite, shared by its modules.
+"""
+
+import json
+from datetime import datetime, timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import List
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+FIXTURES = Path(__file__).parent.joinpath("fixtures")
+LARGE = 10_000_000
+
+
+def rows_params(*rows):
+    """Row counts to parametrize over, marking 10M rows as large."""
+    return [
+        pytest.param(n, marks=pytest.mark.large) if n >= LARGE else n
+        for n in rows
+    ]
+
+
+@lru_cache(maxsize=6)
+def make_prices(rows: int, order: str = "sorted") -> pd.DataFrame:
+    """
+    Random walk prices, one row per minute.
+    Args:
+        rows (int): Number of rows.
+        order (str): "sorted" (oldest first), "newest" (newest first, as
+                     returned by MarketHistory) or "unsorted" (shuffled).
+    """
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2000-01-01", periods=rows, freq="min")
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 1e-3, rows)))
+    df = pd.DataFrame({"date": dates, "price": price})
+    if order == "newest":
+        return df.iloc[::-1].reset_index(drop=True)
+    if order == "unsorted":
+        return df.iloc[rng.permutation(rows)].reset_index(drop=True)
+    return df
+
+
+@lru_cache(maxsize=1)
+def recorded_quotes() -> list:
+    with open(FIXTURES.joinpath("bitcoin_365d.json"), "rb") as f:
+        quotes: list = json.load(f)["data"]["quotes"]
+    return quotes
+
+
+@lru_cache(maxsize=16)
+def make_payload(start_date: str, end_date: str) -> bytes:
+    """
+    CoinMarketCap response for the days after start_date up to end_date,
+    cycling through the recorded fixture quotes.
+    """
+    quotes = recorded_quotes()
+    day = datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=1)
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    out: List[dict] = []
+    while day <= end:
+        quote = quotes[len(out) % len(quotes)]
+        usd = dict(quote["quote"]["USD"])
+        usd["timestamp"] = day.strftime("%Y-%m-%dT23:59:59.999Z")
+        out.append(dict(quote, quote={"USD": usd}))
+        day += timedelta(days=1)
+    return json.dumps({"data": {"quotes": out}}).encode()
+
+
+def legacy_parse(raw: bytes) -> pd.DataFrame:
+    """
+    Row wise CoinMarketCap response parser of PriceIndices <= 1.4.0, the
+    reference of the parse_quotes benchmarks.
+    """
+    content = json.loads(raw)
+    d = content["data"]["quotes"]
+    df = pd.DataFrame([v["quote"]["USD"] for v in d])
+    df.sort_values("timestamp", ascending=False, inplace=True)
+    df.reset_index(drop=True, inplace=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["date"] = df["timestamp"].apply(lambda x: x.strftime("%Y-%m-%d"))
+    del df["timestamp"]
+    return df
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        query = parse_qs(urlparse(self.path).query)
+        body = make_payload(query["time_start"][0], query["time_end"][0])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
@@ -0,0 +1,42 @@
+"""
+Benchmarks of CoinMarketCap response parsing and of MarketHistory requests
+against a local server replaying the recorded fixture quotes.
+"""
+
+import pytest
+
+from benchmarks.helpers import legacy_parse, make_payload
+from PriceIndices import MarketHistory
+from PriceIndices.crypto_history import parse_quotes
+
+RANGES = {
+    "1y": ("2021-03-15", "2022-03-15"),
+    "10y": ("2012-03-15", "2022-03-15"),
+}
+
+
+@pytest.mark.parametrize("string_dates", [False, True])
+@pytest.mark.parametrize("span", list(RANGES))
+def test_parse_quotes(measure, span, string_dates):
+    payload = make_payload(*RANGES[span])
+    measure(parse_quotes, payload, string_dates)
+
+
+@pytest.mark.parametrize("span", list(RANGES))
+def test_parse_quotes_legacy(measure, span):
+    payload = make_payload(*RANGES[span])
+    measure(legacy_parse, payload)
+
+
+@pytest.mark.parametrize("span", list(RANGES))
+def test_get_history(measure, fixture_api, span):
+    history = MarketHistory(base_url=fixture_api)
+    make_payload(*RANGES[span])
+    measure(history.get_history, "bitcoin", *RANGES[span])
+
+
+@pytest.mark.parametrize("coins", [10, 50])
+def test_get_histories(measure, fixture_api, coins):
+    history = MarketHistory(base_url=fixture_api)
+    coin_ids = [f"coin-{i}" for i in range(coins)]
+    measure(history.get_histories, coin_ids, *RANGES["1y"])
@@ -0,0 +1,93 @@
+"""
+Benchmarks of every Indices.get_* method, Indices.compute and
+PanelIndices.compute.
+"""
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.helpers import make_prices, rows_params
+from PriceIndices import Indices, PanelIndices
+
+matplotlib.use("Agg")
+
+ROWS = rows_params(1_000, 100_000, 10_000_000)
+ORDERS = ["sorted", "newest", "unsorted", "assume_sorted"]
+COINS = 100
+
+METHODS = {
+    "get_vola_index": lambda indices: indices.get_vola_index(),
+    "get_rsi": lambda indices: indices.get_rsi(),
+    "get_bollinger_bands": lambda indices: indices.get_bollinger_bands(),
+    "get_moving_average_convergence_divergence": lambda indices: (
+        indices.get_moving_average_convergence_divergence()
+    ),
+    "get_simple_moving_average": lambda indices: (
+        indices.get_simple_moving_average()
+    ),
+    "get_exponential_moving_average": lambda indices: (
+        indices.get_exponential_moving_average([20, 70])
+    ),
+    "compute": lambda indices: indices.compute(),
+}
+
+
+GET_METHODS = [method for method in METHODS if method.startswith("get_")]
+
+
+def all_methods(indices: Indices) -> None:
+    # Every get_* method on its own, the reference of compute.
+    for method in GET_METHODS:
+        METHODS[method](indices)
+
+
+METHODS["all_get_methods"] = all_methods
+
+
+@pytest.mark.parametrize("rows", ROWS)
+@pytest.mark.parametrize("order", ORDERS)
+@pytest.mark.parametrize("method", list(METHODS))
+def test_indices(measure, method, order, rows):
+    if order == "assume_sorted":
+        indices = Indices(make_prices(rows), assume_sorted=True)
+    else:
+        indices = Indices(make_prices(rows, order))
+    measure(METHODS[method], indices)
+
+
+@pytest.mark.parametrize("rows", rows_params(1_000, 100_000))
+@pytest.mark.parametrize("method", ["get_vola_graph", "get_rsi_graph"])
+def test_graphs(measure, tmp_path, method, rows):
+    indices = Indices(make_prices(rows, "newest"), plot_dir=str(tmp_path))
+    if method == "get_vola_graph":
+        data = indices.get_vola_index()
+    else:
+        data = indices.get_rsi()
+    measure(getattr(indices, method), data, f"{method}.png")
+
+
+def make_panel(rows: int) -> pd.DataFrame:
+    # `rows` prices in total, spread over COINS columns.
+    dates = max(rows // COINS, 1)
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 1e-3, (dates, COINS))
+    return pd.DataFrame(
+        100 * np.exp(np.cumsum(returns, axis=0)),
+        index=pd.date_range("2000-01-01", periods=dates, freq="min"),
+        columns=[f"coin_{i}" for i in range(COINS)],
+    )
+
+
+@pytest.mark.parametrize("rows", ROWS)
+@pytest.mark.parametrize(
+    "indicator",
+    ["vola_index", "rsi", "bollinger_bands", "macd", "sma", "ema", "all"],
+)
+def test_panel(measure, indicator, rows):
+    panel = PanelIndices(make_panel(rows))
+    if indicator == "all":
+        measure(panel.compute)
+    else:
+        measure(panel.compute, [indicator])
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+
+def make_quotes(slug: str, start_date: str, end_date: str) -> list:
+    """
+    Synthetic CoinMarketCap quotes, one per day after start_date up to and
+    including end_date.
+    """
+    start = datetime.strptime(start_date, "%Y-%m-%d")
+    end = datetime.strptime(end_date, "%Y-%m-%d")
+    base = 100.0 + sum(map(ord, slug)) % 50
+    quotes = []
+    day = start + timedelta(days=1)
+    while day <= end:
+        i = (day - datetime(2010, 1, 1)).days
+        close = base + (i % 17) - (i % 5) * 0.5
+        quotes.append(
+            {
+                "quote": {
+                    "USD": {
+                        "open": close - 1,
+                        "high": close + 2,
+                        "low": close - 2,
+                        "close": close,
+                        "volume": 1000.0 + i,
+                        "market_cap": close * 1e6,
+                        "timestamp": day.strftime("%Y-%m-%dT23:59:59.999Z"),
+                    }
+                }
+            }
+        )
+        day += timedelta(days=1)
+    return quotes
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        query = parse_qs(urlparse(self.path).query)
+        slug = query["slug"][0]
+        self.server.requests.append(query)  # type: ignore
+        seen = self.server.requests.count(query)  # type: ignore
+        if slug.startswith("bad") or (slug.startswith("flaky") and seen == 1):
+            self.send_response(400)
+            self.end_headers()
+            return
+        if slug.startswith("busy") and seen == 1:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if slug.startswith("throttled") and seen == 1:
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if slug.startswith("slow"):
+            time.sleep(1)
+        quotes = make_quotes(slug, query["time_start"][0], query["time_end"][0])
+        body = json.dumps({"data": {"quotes": quotes}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def stub_api():
+    """
+    Local CoinMarketCap stand-in. Yields the base url to pass to
+    MarketHistory; received queries are kept in `stub_api.requests`.
+    Slugs starting with "bad" always fail, slugs starting with "flaky" fail
+    the first time a range is asked for, slugs starting with "busy" get a 503
+    the first time, slugs starting with "throttled" get a 429 with
+    Retry-After the first time and slugs starting with "slow" are answered
+    after 1s.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests = []  # type: ignore
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+
+    class Api(str):
+        requests = server.requests  # type: ignore
+
+    yield Api(
+        f"http://{host}:{port}/v1/cryptocurrency/ohlcv/historical"
+        "?convert=USD&slug="
+    )
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from PriceIndices import AsyncMarketHistory  # noqa: E402
+
+
+def run(coro_fn, *args, **kwargs):
+    async def main():
+        async with AsyncMarketHistory(*args, **kwargs) as history:
+            return await coro_fn(history)
+
+    return asyncio.run(main())
+
+
+def test_async_history(stub_api):
+    df = run(
+        lambda h: h.get_history("bitcoin", "2020-03-16", "2021-03-15"),
+        base_url=stub_api,
+    )
+    assert df.shape == (364, 7)
+
+    price = run(
+        lambda h: h.get_price(
+            "bitcoin", "2020-03-16", "2021-03-15", chunk_days=30
+        ),
+        base_url=stub_api,
+    )
+    assert price.shape == (364, 2)
+    assert price["date"].tolist() == df["date"].tolist()
+
+
+def test_async_histories_retry(stub_api):
+    batch = run(
+        lambda h: h.get_histories(
+            ["busy-bitcoin", "ethereum", "bad-coin"], "2020-03-16", "2021-03-15"
+        ),
+        base_url=stub_api,
+        max_concurrency=2,
+        backoff_factor=0,
+    )
+    assert sorted(batch) == ["busy-bitcoin", "ethereum"]
+    assert list(batch.errors) == ["bad-coin"]
+    # busy-bitcoin got a 503 first and was retried.
+    slugs = [q["slug"][0] for q in stub_api.requests]
+    assert slugs.count("busy-bitcoin") == 2
+
+
+def test_async_cancel(stub_api):
+    async def main():
+        async with AsyncMarketHistory(base_url=stub_api) as history:
+            task = asyncio.ensure_future(
+                history.get_history("slow-coin", "2020-03-16", "2021-03-15")
+            )
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(main())
+
+
+def test_async_history_outside_loop(stub_api):
+    history = AsyncMarketHistory(base_url=stub_api, max_concurrency=1)
+
+    async def main():
+        async with history:
+            empty = await history.get_history(
+                "bitcoin", "2021-03-15", "2021-03-15", chunk_days=30
+            )
+            batch = await history.get_histories(
+                ["bitcoin", "ethereum", "tether"], "2021-01-01", "2021-03-01"
+            )
+            return empty, batch
+
+    # Created before any event loop runs, and used from two loops.
+    for _ in range(2):
+        empty, batch = asyncio.run(main())
+        assert empty is not None and empty.empty
+        assert sorted(batch) == ["bitcoin", "ethereum", "tether"]
+        assert not batch.errors
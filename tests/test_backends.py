@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import backends
+from PriceIndices.backends import NumpyBackend, get_backend
+from PriceIndices.price_indicators import INDICATORS, calculate
+
+BACKENDS = ["numpy"]
+try:
+    get_backend("numba")
+    BACKENDS.append("numba")
+except ImportError:
+    pass
+
+
+def reference(name, price):
+    """Indicators as PriceIndices 1.4.0 computed them with pandas."""
+    if name == "vola_index":
+        v = np.log(price).diff().rolling(30).std() * np.sqrt(365)
+        return {"BVOL_Index": v}
+    if name == "rsi":
+        change = price.diff()
+        gain = pd.Series(np.where(change >= 0, change, 0)).where(change.notna())
+        loss = pd.Series(np.where(change <= 0, abs(change), 0)).where(
+            change.notna()
+        )
+        gain_average = gain.rolling(14).mean()
+        loss_average = loss.rolling(14).mean()
+        rs = gain_average / loss_average
+        rs_smooth = (gain_average.shift(1) * 13 + gain) / (
+            loss_average.shift(1) * 13 + loss
+        )
+        columns = {
+            "RSI_1": 100 * (1 - (1 / (1 + rs))),
+            "RS_Smooth": rs_smooth,
+            "RSI_2": 100 * (1 - (1 / (1 + rs_smooth))),
+        }
+        return {
+            k: v.fillna(0).where(change.notna()) for k, v in columns.items()
+        }
+    if name == "bollinger_bands":
+        sma = price.rolling(20).mean()
+        sd = price.rolling(20).std()
+        return {"BB_upper": sma + sd * 2, "BB_lower": sma - sma * 2}
+    if name == "macd":
+        ema_12 = price.ewm(span=12, adjust=False).mean()
+        ema_26 = price.ewm(span=26, adjust=False).mean()
+        return {"MACD": ema_12 - ema_26}
+    if name == "sma":
+        return {"SMA": price.rolling(15).mean()}
+    return {"EMA_20": price.ewm(span=20, adjust=False).mean()}
+
+
+@pytest.fixture
+def prices():
+    rng = np.random.default_rng(4)
+    data = 3e4 * np.exp(np.cumsum(rng.normal(0, 0.03, (600, 3)), axis=0))
+    data[:40, 1] = np.nan
+    data[:-1, 2] = np.round(data[:-1, 2], -3)
+    return data
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("name", INDICATORS)
+def test_backend_matches_pandas(backend, name, prices):
+    for column in range(prices.shape[1]):
+        series = prices[:, column]
+        expected = reference(name, pd.Series(series))
+        actual = calculate(name, series, backend=backend)
+        assert actual.keys() == expected.keys()
+        for key in expected:
+            np.testing.assert_allclose(
+                actual[key], expected[key], rtol=1e-9, atol=1e-9
+            )
+    matrix = calculate(name, prices, backend=backend)
+    for key, values in matrix.items():
+        assert values.shape == prices.shape
+        np.testing.assert_allclose(
+            values[:, 0], calculate(name, prices[:, 0], backend=backend)[key]
+        )
+
+
+def test_numpy_backend_blocks(prices):
+    backend = NumpyBackend()
+    backend.block = 50
+    mean, std = backend.rolling_moments(prices, 20)
+    expected = pd.DataFrame(prices).rolling(20)
+    np.testing.assert_allclose(mean, expected.mean(), rtol=1e-10)
+    np.testing.assert_allclose(std, expected.std(), rtol=1e-8)
+
+
+def test_numpy_sweep_blocks(prices):
+    backend = NumpyBackend()
+    backend.block = 50
+    windows = [3, 20, 120]
+    for column in prices.T:
+        mean, std = backend.rolling_moments_sweep(column, windows)
+        for k, window in enumerate(windows):
+            expected = pd.Series(column).rolling(window)
+            np.testing.assert_allclose(mean[k], expected.mean(), rtol=1e-10)
+            np.testing.assert_allclose(std[k], expected.std(), rtol=1e-8)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("fortran")
+
+
+def test_numba_backend_missing(monkeypatch):
+    monkeypatch.setattr(backends, "find_spec", lambda name: None)
+    monkeypatch.setattr(backends, "_instances", {})
+    with pytest.raises(ImportError, match=r"PriceIndices\[numba\]"):
+        get_backend("numba")
+    assert get_backend().name == "numpy"
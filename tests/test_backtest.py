@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import Backtest, Indices, PanelIndices
+from PriceIndices.backtest import (
+    band_reversion,
+    crossover,
+    evaluate,
+    thresholds,
+)
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(5)
+    dates = pd.date_range("2020-01-01", periods=400, freq="D")
+    coins = ["coin{}".format(i) for i in range(6)]
+    prices = 100 * np.exp(
+        np.cumsum(rng.normal(0, 0.03, (len(dates), len(coins))), axis=0)
+    )
+    return PanelIndices(pd.DataFrame(prices, index=dates, columns=coins))
+
+
+def loop_backtest(prices, positions, cost):
+    # Reference: one date at a time.
+    equity, peak, drawdown, turnover, held = 1.0, 1.0, 0.0, 0.0, 0.0
+    for t in range(len(prices)):
+        ret = prices[t] / prices[t - 1] - 1 if t else 0.0
+        trade = abs(positions[t] - held)
+        equity *= 1 + held * ret - cost * trade
+        peak = max(peak, equity)
+        drawdown = min(drawdown, equity / peak - 1)
+        turnover += trade
+        held = positions[t]
+    return equity - 1, drawdown, turnover
+
+
+def test_evaluate_matches_loop():
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (300, 3)), axis=0))
+    positions = rng.integers(-1, 2, (4, 300, 3)).astype(float)
+    metrics = evaluate(prices, positions, cost=0.001).metrics()
+    for k in range(4):
+        for j in range(3):
+            total, drawdown, turnover = loop_backtest(
+                prices[:, j], positions[k, :, j], 0.001
+            )
+            assert metrics["total_return"][k, j] == pytest.approx(total)
+            assert metrics["max_drawdown"][k, j] == pytest.approx(drawdown)
+            assert metrics["turnover"][k, j] == turnover
+
+
+def test_signals():
+    assert crossover([1, 3, 2], [2, 2, 2], short=True).tolist() == [-1, 1, 0]
+    rsi = np.array([50, 25, 40, 75, 60, 20])
+    assert thresholds(rsi).tolist() == [0, 1, 1, 0, 0, 1]
+    assert thresholds(rsi, short=True).tolist() == [0, 1, 1, -1, -1, 1]
+    price = np.array([10, 7, 8, 11, 14, 9])
+    positions = band_reversion(price, 13, 8, 10, short=True)
+    assert positions.tolist() == [0, 1, 1, 0, -1, 0]
+
+
+def test_ema_crossover_grid_matches_indices(panel):
+    params = [(5, 20), (10, 30), (20, 70)]
+    backtest = Backtest(panel, cost=0.001, max_cells=1000)
+    result = backtest.ema_crossover(params)
+    assert result.index.names == ["fast", "slow", "coin"]
+    assert len(result) == len(params) * panel.prices.shape[1]
+    for coin in panel.prices.columns[:2]:
+        df = panel.prices[coin].rename("price").reset_index()
+        df.columns = ["date", "price"]
+        for fast, slow in params:
+            wide = Indices(df, assume_sorted=True).compute(
+                [("ema", {"periods": [fast, slow]})]
+            )
+            positions = crossover(
+                wide["EMA_{}".format(fast)], wide["EMA_{}".format(slow)]
+            )
+            expected = evaluate(wide["price"], positions, 0.001).metrics()
+            row = result.loc[(fast, slow, coin)]
+            for name, value in expected.items():
+                assert row[name] == pytest.approx(value)
+
+
+def test_rsi_and_bollinger_grids(panel):
+    backtest = Backtest(panel.prices)
+    rsi = backtest.rsi([(30, 70), (20, 80)])
+    bollinger = backtest.bollinger([(20, 2.0), (20, 1.0)], short=True)
+    for result in (rsi, bollinger):
+        assert list(result.columns) == [
+            "total_return",
+            "sharpe",
+            "max_drawdown",
+            "turnover",
+        ]
+        assert (result["max_drawdown"] <= 0).all()
+    # Narrower bands trade more.
+    turnover = bollinger["turnover"].groupby(level="width").sum()
+    assert turnover[1.0] > turnover[2.0]
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import BatchRunner, Indices
+
+
+def make_frames(coins, rows=120):
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2021-01-01", periods=rows, freq="D")
+    return {
+        coin: pd.DataFrame(
+            {
+                "date": dates,
+                "price": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows))),
+            }
+        ).iloc[::-1]
+        for coin in coins
+    }
+
+
+def test_batch_runner():
+    frames = make_frames(["bitcoin", "ethereum", "tether"])
+    indicators = ["rsi", ("sma", {"days": 10}), ("sma", {"days": 30})]
+    results = BatchRunner(max_workers=2, chunksize=2).run(frames, indicators)
+
+    assert [(coin, name, params) for coin, name, params, _ in results] == [
+        (coin, name, params)
+        for coin in frames
+        for name, params in [
+            ("rsi", {}),
+            ("sma", {"days": 10}),
+            ("sma", {"days": 30}),
+        ]
+    ]
+    for coin, name, params, df in results:
+        expected = Indices(frames[coin]).compute([(name, params)])
+        pd.testing.assert_frame_equal(df, expected)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "numba"])
+def test_batch_runner_empty_frame(backend):
+    if backend == "numba":
+        pytest.importorskip("numba")
+    frames = make_frames(["bitcoin"])
+    frames["empty"] = frames["bitcoin"].iloc[:0]
+    runner = BatchRunner(max_workers=1, backend=backend)
+    results = runner.run(frames, ["rsi", "macd"])
+    for coin, name, _, df in results:
+        assert len(df) == len(frames[coin])
+        assert name != "rsi" or "RSI_2" in df
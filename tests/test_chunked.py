@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import ChunkedIndices, Indices, formats
+
+INDICATORS = [
+    "vola_index",
+    "rsi",
+    ("bollinger_bands", {"days": 20}),
+    "macd",
+    ("sma", {"days": 15}),
+    ("ema", {"periods": [10, 50]}),
+]
+
+
+@pytest.fixture
+def price_data():
+    rng = np.random.default_rng(5)
+    n = 500
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    price[[0, 120, 199, 200, 201, 333]] = np.nan
+    return pd.DataFrame(
+        {"date": pd.date_range("2020-01-01", periods=n), "price": price}
+    )
+
+
+def expected(df):
+    return Indices(df, assume_sorted=True).compute(INDICATORS)
+
+
+@pytest.mark.parametrize("size", [7, 100, 200, 1000])
+def test_process_matches_compute(price_data, size):
+    chunks = [
+        price_data.iloc[i : i + size] for i in range(0, len(price_data), size)
+    ]
+    result = pd.concat(ChunkedIndices(INDICATORS).process(chunks))
+    pd.testing.assert_frame_equal(
+        result, expected(price_data), check_exact=False, rtol=1e-9
+    )
+
+
+def test_process_checks_order(price_data):
+    chunks = [price_data.iloc[100:200], price_data.iloc[:100]]
+    with pytest.raises(ValueError):
+        list(ChunkedIndices(INDICATORS).process(chunks))
+
+
+def test_run_csv_partitions(tmp_path, price_data):
+    source = tmp_path.joinpath("prices")
+    source.mkdir()
+    for i, start in enumerate(range(0, len(price_data), 150)):
+        part = price_data.iloc[start : start + 150]
+        part.to_csv(source.joinpath(f"part-{i:04d}.csv"), index=False)
+
+    dest = tmp_path.joinpath("indicators.csv")
+    rows = ChunkedIndices(INDICATORS).run(source, dest, chunksize=64)
+    assert rows == len(price_data)
+    result = pd.read_csv(dest, parse_dates=["date"])
+    pd.testing.assert_frame_equal(
+        result,
+        expected(price_data),
+        check_exact=False,
+        rtol=1e-9,
+        check_dtype=False,
+    )
+
+
+def test_run_parquet(tmp_path, price_data):
+    pytest.importorskip("pyarrow")
+    source = tmp_path.joinpath("prices.parquet")
+    price_data.to_parquet(source)
+    dest = tmp_path.joinpath("indicators.parquet")
+    ChunkedIndices(INDICATORS).run(source, dest, chunksize=64)
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(dest),
+        expected(price_data),
+        check_exact=False,
+        rtol=1e-9,
+    )
+
+
+def test_run_parquet_needs_pyarrow(tmp_path, price_data, monkeypatch):
+    source = tmp_path.joinpath("prices.csv")
+    price_data.to_csv(source, index=False)
+    monkeypatch.setattr(formats, "find_spec", lambda name: None)
+    with pytest.raises(ImportError, match=r"PriceIndices\[pyarrow\]"):
+        ChunkedIndices(INDICATORS).run(source, tmp_path.joinpath("out.parquet"))
@@ -1,4 +1,10 @@
+import json
+
+import pandas as pd
+from conftest import make_quotes
+
 from PriceIndices import MarketHistory
+from PriceIndices.crypto_history import parse_quotes
 
 
 def test_history_market_data():
@@ -9,3 +15,67 @@ def test_history_market_data():
     price_data = history.get_price("bitcoin", "2020-03-16", "2021-03-15")
 
     assert price_data.shape == (364, 2)
+
+
+def test_get_histories(stub_api):
+    history = MarketHistory(base_url=stub_api, rate_limit=100)
+    batch = history.get_histories(
+        ["bitcoin", "ethereum", "bad-coin"],
+        "2020-03-16",
+        "2021-03-15",
+        max_workers=3,
+    )
+
+    assert sorted(batch) == ["bitcoin", "ethereum"]
+    assert batch["bitcoin"].shape == (364, 7)
+    assert list(batch.errors) == ["bad-coin"]
+
+    df = batch.to_frame()
+    assert df.shape == (728, 8)
+    assert set(df["coin"]) == {"bitcoin", "ethereum"}
+
+
+def test_chunked_history(stub_api):
+    history = MarketHistory(base_url=stub_api)
+    df = history.get_history("bitcoin", "2020-03-16", "2021-03-15")
+    df_chunked = history.get_history(
+        "flaky-bitcoin", "2020-03-16", "2021-03-15", chunk_days=30
+    )
+
+    assert df_chunked.shape == (364, 7)
+    assert df_chunked["date"].tolist() == df["date"].tolist()
+    # 13 windows, each failing once before being retried on its own.
+    assert len(stub_api.requests) == 1 + 13 * 2
+
+
+def test_parse_quotes():
+    raw = json.dumps(
+        {"data": {"quotes": make_quotes("bitcoin", "2020-12-31", "2021-03-15")}}
+    ).encode()
+    df = parse_quotes(raw)
+    assert df.shape == (74, 7)
+    assert pd.api.types.is_datetime64_dtype(df["date"])
+    assert df["date"].is_monotonic_decreasing
+    assert df["date"].iloc[0] == pd.Timestamp("2021-03-15")
+
+    df_str = parse_quotes(raw, string_dates=True)
+    assert df_str["date"].iloc[-1] == "2021-01-01"
+    assert df_str.drop(columns="date").equals(df.drop(columns="date"))
+
+
+def test_output_dtypes(stub_api):
+    history = MarketHistory(
+        base_url=stub_api, float_dtype="float32", date_dtype="category"
+    )
+    df = history.get_price("bitcoin", "2020-03-16", "2021-03-15")
+    assert df.shape == (364, 2)
+    assert df["price"].dtype == "float32"
+    assert isinstance(df["date"].dtype, pd.CategoricalDtype)
+
+
+def test_chunked_history_of_empty_range(stub_api):
+    history = MarketHistory(base_url=stub_api)
+    df = history.get_history("bitcoin", "2021-03-15", "2021-03-15", 30)
+    assert df is not None and df.empty
+    df = history.get_history("bitcoin", "2021-03-14", "2021-03-15", 30)
+    assert df.shape == (1, 7)
@@ -0,0 +1,89 @@
+import pandas as pd
+
+from PriceIndices import MarketHistory
+from PriceIndices.history_cache import HistoryCache
+
+
+def make_frame(dates):
+    return pd.DataFrame({"close": [1.0] * len(dates), "date": dates})
+
+
+def test_cache_fetches_only_missing_ranges(stub_api, tmp_path):
+    history = MarketHistory(base_url=stub_api, cache=HistoryCache(tmp_path))
+    first = history.get_history("bitcoin", "2020-03-16", "2021-01-15")
+    assert first.shape == (305, 7)
+
+    df = history.get_history("bitcoin", "2020-03-16", "2021-03-15")
+    assert df.shape == (364, 7)
+    assert df["date"].iloc[0] == pd.Timestamp("2021-03-15")
+    assert df["date"].is_unique
+    assert [
+        (q["time_start"][0], q["time_end"][0]) for q in stub_api.requests
+    ] == [
+        ("2020-03-16", "2021-01-15"),
+        ("2021-01-15", "2021-03-15"),
+    ]
+
+    price = history.get_price("bitcoin", "2020-06-01", "2020-07-01")
+    assert price.shape == (30, 2)
+    assert len(stub_api.requests) == 2
+
+
+def test_cache_refetches_open_day(tmp_path):
+    cache = HistoryCache(tmp_path)
+    assert cache.missing("bitcoin", "2020-01-01", "2020-02-01") == [
+        ("2020-01-01", "2020-02-01")
+    ]
+    cache.write(
+        "bitcoin",
+        make_frame(["2099-01-01"]),
+        "2020-01-01",
+        "2099-01-01",
+    )
+    gaps = cache.missing("bitcoin", "2020-01-01", "2099-01-01")
+    assert len(gaps) == 1 and gaps[0][1] == "2099-01-01"
+
+
+def test_cache_eviction(tmp_path):
+    cache = HistoryCache(tmp_path, max_bytes=1)
+    for coin_id in ["bitcoin", "ethereum"]:
+        cache.write(
+            coin_id, make_frame(["2020-01-02"]), "2020-01-01", "2020-01-02"
+        )
+    assert [f.stem for f in tmp_path.glob("*.sqlite")] == ["ethereum"]
+
+
+def test_cache_read_of_removed_file(tmp_path):
+    cache = HistoryCache(tmp_path)
+    cache.write(
+        "bitcoin", make_frame(["2020-01-02"]), "2020-01-01", "2020-01-02"
+    )
+    cache.path("bitcoin").unlink()
+    assert cache.read("bitcoin", "2020-01-01", "2020-01-02") is None
+    assert not cache.path("bitcoin").exists()
+
+
+def test_cache_keeps_all_chunked_windows(stub_api, tmp_path):
+    cache = HistoryCache(tmp_path)
+    history = MarketHistory(base_url=stub_api, cache=cache)
+    df = history.get_history(
+        "bitcoin", "2018-01-01", "2021-01-01", chunk_days=30
+    )
+    assert df.shape == (1096, 7)
+    assert len(cache.read("bitcoin", "2018-01-01", "2021-01-01")) == 1096
+    assert cache.missing("bitcoin", "2018-01-01", "2021-01-01") == []
+
+
+def test_bounded_cache_under_concurrent_histories(stub_api, tmp_path):
+    # Coin files are about 8kB, so writers keep evicting each other.
+    cache = HistoryCache(tmp_path, max_bytes=60_000)
+    history = MarketHistory(base_url=stub_api, cache=cache)
+    coins = ["coin{}".format(i) for i in range(40)]
+    batch = history.get_histories(
+        coins, "2020-03-16", "2021-03-15", max_workers=8
+    )
+    assert not batch.errors
+    assert sorted(batch) == sorted(coins)
+    assert all(df.shape == (364, 7) for df in batch.values())
+    cache.evict()
+    assert sum(f.stat().st_size for f in tmp_path.glob("*.sqlite")) <= 60_000
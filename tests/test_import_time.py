@@ -0,0 +1,45 @@
+import subprocess
+import sys
+
+HEAVY = [
+    "matplotlib",
+    "requests",
+    "urllib3",
+    "pandas",
+    "numpy",
+    "httpx",
+    "numba",
+]
+
+
+def imported_modules(statement):
+    code = (
+        "import sys\n{}\n"
+        "print(' '.join(m for m in {!r} if m in sys.modules))"
+    ).format(statement, HEAVY)
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return out.split()
+
+
+def test_import_is_lazy():
+    assert imported_modules("import PriceIndices") == []
+
+
+def test_indices_skip_plot_and_network_stack():
+    assert imported_modules("from PriceIndices import Indices") == [
+        "pandas",
+        "numpy",
+    ]
+
+
+def test_history_skips_matplotlib():
+    modules = imported_modules(
+        "from PriceIndices import MarketHistory\nMarketHistory()"
+    )
+    assert "requests" in modules
+    assert "matplotlib" not in modules
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import IndicatorCache, Indices
+from PriceIndices.price_indicators import INDICATORS, calculate
+
+SPECS = [
+    ("vola_index", {}),
+    ("rsi", {}),
+    ("bollinger_bands", {"days": 20}),
+    ("macd", {}),
+    ("sma", {"days": 15}),
+    ("ema", {"periods": [10, 50]}),
+]
+
+
+def make_prices(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+
+
+def assert_outputs(outputs, expected):
+    assert list(outputs) == list(expected)
+    for column in expected:
+        np.testing.assert_allclose(
+            outputs[column], expected[column], rtol=1e-10, atol=1e-12
+        )
+
+
+@pytest.mark.parametrize("name,params", SPECS)
+def test_hit_and_extend(name, params):
+    cache = IndicatorCache()
+    prices = make_prices()
+    assert_outputs(
+        cache.calculate(name, prices[:200], params),
+        calculate(name, prices[:200], params),
+    )
+    outputs = cache.calculate(name, prices[:200], params)
+    outputs[next(iter(outputs))][:] = 0
+    assert_outputs(
+        cache.calculate(name, prices[:200], params),
+        calculate(name, prices[:200], params),
+    )
+    assert (cache.misses, cache.hits) == (1, 2)
+
+    assert_outputs(
+        cache.calculate(name, prices, params), calculate(name, prices, params)
+    )
+    assert cache.extends == 1
+
+
+def test_changed_history_is_recomputed():
+    cache = IndicatorCache()
+    prices = make_prices()
+    cache.calculate("sma", prices[:200])
+    changed = prices.copy()
+    changed[10] += 1
+    assert_outputs(cache.calculate("sma", changed), calculate("sma", changed))
+    assert (cache.misses, cache.extends) == (2, 0)
+    # Default params share the entries of explicit ones.
+    cache.calculate("sma", changed, {"days": 15})
+    assert cache.hits == 1
+
+
+def test_ema_with_missing_prices_is_recomputed():
+    cache = IndicatorCache()
+    prices = make_prices()
+    prices[250] = np.nan
+    cache.calculate("ema", prices[:200])
+    assert_outputs(cache.calculate("ema", prices), calculate("ema", prices))
+    assert cache.extends == 0
+
+
+def test_eviction():
+    prices = make_prices(1000)
+    cache = IndicatorCache(max_bytes=3 * prices.nbytes)
+    for days in range(5, 10):
+        cache.calculate("sma", prices, {"days": days})
+    cache.calculate("sma", prices, {"days": 5})
+    cache.calculate("sma", prices, {"days": 9})
+    assert (cache.misses, cache.hits) == (6, 1)
+
+
+def test_disk_cache(tmp_path):
+    prices = make_prices()
+    IndicatorCache(cache_dir=str(tmp_path)).calculate("macd", prices[:200])
+    other = IndicatorCache(cache_dir=str(tmp_path))
+    assert_outputs(
+        other.calculate("macd", prices[:200]), calculate("macd", prices[:200])
+    )
+    assert_outputs(other.calculate("macd", prices), calculate("macd", prices))
+    assert (other.hits, other.extends, other.misses) == (1, 1, 0)
+    other.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_indices_cache():
+    prices = make_prices()
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2020-01-01", periods=len(prices)),
+            "price": prices,
+        }
+    )
+    cache = IndicatorCache()
+    cached = Indices(df, cache=cache)
+    plain = Indices(df)
+    pd.testing.assert_frame_equal(cached.compute(), plain.compute())
+    pd.testing.assert_frame_equal(
+        cached.get_bollinger_bands(days=20), plain.get_bollinger_bands(days=20)
+    )
+    pd.testing.assert_frame_equal(cached.compute(), plain.compute())
+    assert cache.misses == len(INDICATORS)
+    assert cache.hits == len(INDICATORS) + 1
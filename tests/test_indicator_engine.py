@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import Indices, formats
+
+
+@pytest.fixture
+def price_data():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2020-01-01", periods=400, freq="D")
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({"date": dates, "price": price})
+
+
+def assert_same_values(wide, df, columns):
+    merged = wide.merge(df, on="date", suffixes=("", "_method"))
+    assert len(merged) == len(df)
+    for column in columns:
+        np.testing.assert_allclose(
+            merged[column], merged[f"{column}_method"], rtol=1e-12
+        )
+
+
+def test_compute_matches_methods(price_data):
+    indices = Indices(price_data)
+    wide = indices.compute(
+        [
+            "vola_index",
+            "rsi",
+            ("bollinger_bands", {"days": 20}),
+            "macd",
+            ("sma", {"days": 20}),
+            ("ema", {"periods": [20, 70]}),
+        ]
+    )
+    assert wide.shape == (400, 12)
+    assert wide["date"].is_monotonic_decreasing
+
+    assert_same_values(wide, indices.get_vola_index(), ["BVOL_Index"])
+    assert_same_values(wide, indices.get_rsi(), ["RSI_1", "RS_Smooth", "RSI_2"])
+    assert_same_values(
+        wide, indices.get_bollinger_bands(days=20), ["BB_upper", "BB_lower"]
+    )
+    assert_same_values(
+        wide, indices.get_moving_average_convergence_divergence(), ["MACD"]
+    )
+    assert_same_values(wide, indices.get_simple_moving_average(20), ["SMA"])
+    assert_same_values(
+        wide,
+        indices.get_exponential_moving_average([20, 70]),
+        ["EMA_20", "EMA_70"],
+    )
+
+
+def test_compute_rejects_unknown_indicator(price_data):
+    with pytest.raises(ValueError):
+        Indices(price_data).compute(["adx"])
+
+
+def test_assume_sorted_matches_methods(price_data):
+    fast = Indices(price_data, assume_sorted=True)
+    indices = Indices(price_data)
+    calls = [
+        ("get_vola_index", ()),
+        ("get_rsi", ()),
+        ("get_bollinger_bands", (20,)),
+        ("get_moving_average_convergence_divergence", ()),
+        ("get_simple_moving_average", (20,)),
+        ("get_exponential_moving_average", ([20, 70],)),
+    ]
+    for method, args in calls:
+        result = getattr(fast, method)(*args)
+        expected = getattr(indices, method)(*args)
+        expected = expected.sort_values("date").reset_index(drop=True)
+        pd.testing.assert_frame_equal(
+            result.reset_index(drop=True), expected, check_exact=False
+        )
+        assert np.shares_memory(
+            result["price"].to_numpy(), price_data["price"].to_numpy()
+        )
+    assert list(price_data.columns) == ["date", "price"]
+
+    wide = fast.compute()
+    assert wide["date"].is_monotonic_increasing
+    pd.testing.assert_frame_equal(
+        wide, indices.compute().iloc[::-1].reset_index(drop=True)
+    )
+
+
+def test_assume_sorted_checks_order(price_data):
+    with pytest.raises(ValueError):
+        Indices(price_data.iloc[::-1], assume_sorted=True)
+
+
+def test_output_options(price_data):
+    indices = Indices(price_data)
+    small = Indices(
+        price_data,
+        float_dtype="float32",
+        date_dtype="category",
+        indicators_only=True,
+    )
+    expected = indices.get_bollinger_bands()
+    result = small.get_bollinger_bands()
+    assert list(result.columns) == ["date", "BB_upper", "BB_lower"]
+    assert (result.dtypes[["BB_upper", "BB_lower"]] == "float32").all()
+    assert isinstance(result["date"].dtype, pd.CategoricalDtype)
+    np.testing.assert_allclose(
+        result["BB_upper"], expected["BB_upper"], rtol=1e-6
+    )
+
+    wide = small.compute(["rsi", "sma"])
+    assert list(wide.columns) == ["date", "RSI_1", "RS_Smooth", "RSI_2", "SMA"]
+    with pytest.raises(ValueError):
+        Indices(price_data, float_dtype="float16")
+
+
+def test_arrow_output(price_data):
+    pytest.importorskip("pyarrow")
+    result = Indices(price_data, dtype_backend="pyarrow").compute(["macd"])
+    assert all(isinstance(t, pd.ArrowDtype) for t in result.dtypes)
+
+
+def test_arrow_output_needs_pyarrow(price_data, monkeypatch):
+    monkeypatch.setattr(formats, "find_spec", lambda name: None)
+    with pytest.raises(ImportError, match=r"PriceIndices\[pyarrow\]"):
+        Indices(price_data, dtype_backend="pyarrow")
+
+
+@pytest.mark.parametrize("backend", ["numpy", None])
+def test_sweep_matches_compute(price_data, backend):
+    indices = Indices(price_data, backend=backend)
+    days = [5, 20, 50]
+    specs = {
+        "vola_index": ("volatile_period", "BVOL_Index", "BVOL_Index"),
+        "sma": ("days", "SMA", "SMA"),
+        "bollinger_bands": ("days", "BB_upper", "BB_upper"),
+        "ema": ("periods", "EMA", "EMA_{}"),
+    }
+    for name, (param, output, column) in specs.items():
+        matrix = indices.sweep(name, days)
+        assert matrix.shape == (3, 400)
+        assert list(matrix.index) == days
+        assert matrix.columns[0] == price_data["date"].iloc[-1]
+        for d in days:
+            value = [d] if name == "ema" else d
+            wide = indices.compute([(name, {param: value})])
+            np.testing.assert_allclose(
+                matrix.loc[d].to_numpy(),
+                wide[column.format(d)].to_numpy(),
+                rtol=1e-9,
+            )
+    lower = indices.sweep("bollinger_bands", days, output="BB_lower")
+    np.testing.assert_allclose(
+        lower.loc[20].to_numpy(),
+        indices.compute([("bollinger_bands", {"days": 20})])["BB_lower"],
+        rtol=1e-9,
+    )
+    with pytest.raises(ValueError):
+        indices.sweep("rsi", days)
@@ -0,0 +1,95 @@
+import pytest
+
+from PriceIndices import IndicatorCache, Indices, MarketHistory, instrumentation
+from PriceIndices.instrumentation import (
+    MetricsRecorder,
+    OpenTelemetryHook,
+    PrometheusHook,
+)
+
+
+@pytest.fixture
+def recorder():
+    recorder = MetricsRecorder()
+    instrumentation.add_hook(recorder)
+    yield recorder
+    instrumentation.remove_hook(recorder)
+
+
+def test_disabled_timer_attrs():
+    assert not instrumentation.enabled()
+    with instrumentation.timer("a") as timer:
+        timer.attrs["status"] = 200
+    assert instrumentation.timer("b").attrs == {}
+
+
+def test_history_events(stub_api, recorder):
+    history = MarketHistory(base_url=stub_api)
+    price = history.get_price("bitcoin", "2020-03-16", "2021-03-15")
+    assert history.get_price("bad-coin", "2020-03-16", "2021-03-15") is None
+
+    assert recorder.count("http.request", status=200) == 1
+    assert recorder.count("http.request", status=400) == 1
+    assert recorder.total("http.bytes") > 0
+    assert recorder.count("parse.json_decode") == 1
+    assert recorder.count("parse.frame_build") == 1
+    assert recorder.count("history.error", error="HTTPError") == 1
+
+    indices = Indices(price, cache=IndicatorCache())
+    indices.get_rsi()
+    indices.get_rsi()
+    indices.get_simple_moving_average()
+    assert recorder.count("indices.sort") == 3
+    assert recorder.count("indicator.compute", indicator="rsi") == 2
+    assert recorder.count("indicator.compute", indicator="sma") == 1
+    assert recorder.total("cache.hit", cache="indicator") == 1
+    assert recorder.total("cache.miss", cache="indicator") == 2
+
+
+def test_prometheus_hook():
+    prometheus_client = pytest.importorskip("prometheus_client")
+    registry = prometheus_client.CollectorRegistry()
+    hook = PrometheusHook(registry)
+    hook("timing", "http.request", 0.5, {"status": 200})
+    # A failed request has no status, and is kept under an empty one.
+    hook("timing", "http.request", 0.25, {})
+    hook("count", "cache.hit", 1, {"cache": "history"})
+    hook("count", "cache.hit", 2, {"cache": "indicator"})
+
+    def value(name, **labels):
+        return registry.get_sample_value(name, labels)
+
+    assert value("priceindices_http_request_seconds_count", status="200") == 1
+    assert value("priceindices_http_request_seconds_sum", status="") == 0.25
+    assert value("priceindices_cache_hit_total", cache="history") == 1
+    assert value("priceindices_cache_hit_total", cache="indicator") == 2
+
+
+def test_opentelemetry_hook():
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+    reader = InMemoryMetricReader()
+    meter = MeterProvider(metric_readers=[reader]).get_meter("test")
+    hook = OpenTelemetryHook(meter)
+    hook("timing", "http.request", 0.5, {"status": 200})
+    hook("timing", "http.request", 0.25, {})
+    hook("count", "cache.hit", 1, {"cache": "history"})
+    hook("count", "cache.hit", 2, {"cache": "indicator"})
+
+    (resource,) = reader.get_metrics_data().resource_metrics
+    (scope,) = resource.scope_metrics
+    points = {
+        metric.name: {
+            tuple(point.attributes.items()): point
+            for point in metric.data.data_points
+        }
+        for metric in scope.metrics
+    }
+    requests = points["priceindices_http_request"]
+    assert requests[(("status", "200"),)].sum == 0.5
+    assert requests[()].sum == 0.25
+    hits = points["priceindices_cache_hit"]
+    assert hits[(("cache", "history"),)].value == 1
+    assert hits[(("cache", "indicator"),)].value == 2
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from PriceIndices import Indices, PanelIndices
+
+
+def make_long(coins, rows=250):
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("2020-01-01", periods=rows, freq="D")
+    frames = []
+    for i, coin in enumerate(coins):
+        price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+        # Later coins are listed later.
+        frames.append(
+            pd.DataFrame({"coin": coin, "date": dates, "price": price}).iloc[
+                i * 10 :
+            ]
+        )
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_panel_matches_single_coin():
+    df = make_long(["bitcoin", "ethereum", "tether"])
+    indicators = ["vola_index", "rsi", "bollinger_bands", "macd", "sma", "ema"]
+    panel = PanelIndices(df, symbol_col="coin")
+    result = panel.compute(indicators)
+    assert result.shape == (250, 9 * 3)
+
+    for coin, df_coin in df.groupby("coin"):
+        wide = Indices(df_coin).compute(indicators).set_index("date")
+        expected = wide.drop(columns=["coin", "price"])
+        actual = result.xs(coin, axis=1, level="coin").loc[expected.index]
+        np.testing.assert_allclose(actual[expected.columns], expected)
+        assert actual.drop(expected.index).isna().all().all()
+
+    long = panel.to_long(result)
+    assert long.shape == (750, 9)
+    assert long.loc[(pd.Timestamp("2020-06-01"), "ethereum"), "MACD"] == (
+        result.loc["2020-06-01", ("MACD", "ethereum")]
+    )
@@ -0,0 +1,112 @@
+import json
+import logging
+
+import pandas as pd
+import pytest
+
+from PriceIndices.cli import main
+from PriceIndices.pipeline import Pipeline, load_config
+
+
+def test_pipeline_resumes(stub_api, tmp_path, caplog):
+    def run(coins, **kwargs):
+        return Pipeline(
+            coins,
+            "2020-03-16",
+            "2021-03-15",
+            indicators=["rsi", ("ema", {"periods": [20, 70]})],
+            output_dir=str(tmp_path),
+            base_url=stub_api,
+            queue_size=1,
+            **kwargs,
+        ).run()
+
+    with caplog.at_level(logging.INFO, logger="PriceIndices.pipeline"):
+        status = run(["bitcoin", "bad-coin", "ethereum"])
+    assert "bitcoin: done" in caplog.messages
+    assert status == {
+        "bitcoin": "done",
+        "bad-coin": "failed",
+        "ethereum": "done",
+    }
+    df = pd.read_csv(tmp_path / "bitcoin.csv")
+    assert df.shape == (364, 7)
+    checkpoint = tmp_path / "checkpoints" / "bad-coin.json"
+    checkpoint = json.loads(checkpoint.read_text())
+    assert checkpoint["status"] == "failed"
+    assert "HTTPError" in checkpoint["error"]
+    assert len(stub_api.requests) == 3
+
+    status = run(["bitcoin", "bad-coin", "ethereum"])
+    assert status["bitcoin"] == "skipped"
+    assert status["bad-coin"] == "failed"
+    assert len(stub_api.requests) == 4
+
+    # Another config makes the outputs stale.
+    status = run(["bitcoin"], plots=["rsi"])
+    assert status == {"bitcoin": "done"}
+    assert (tmp_path / "plots/bitcoin_rsi.png").exists()
+
+
+def test_pipeline_bad_checkpoints(stub_api, tmp_path):
+    checkpoints = tmp_path / "checkpoints"
+    checkpoints.mkdir()
+    checkpoints.joinpath("bitcoin.json").write_text('{"status": "do')
+    # A directory in the way of the checkpoint file fails its write.
+    checkpoints.joinpath("ethereum.json").mkdir()
+    status = Pipeline(
+        ["bitcoin", "ethereum", "bad-coin"],
+        "2021-01-01",
+        "2021-03-01",
+        indicators=["rsi"],
+        output_dir=str(tmp_path),
+        base_url=stub_api,
+        compute_workers=1,
+        queue_size=1,
+    ).run()
+    assert status == {
+        "bitcoin": "done",
+        "ethereum": "failed",
+        "bad-coin": "failed",
+    }
+    assert json.loads(checkpoints.joinpath("bitcoin.json").read_text())
+
+
+def test_pipeline_checks_indicators(stub_api, tmp_path):
+    with pytest.raises(ValueError, match="adx"):
+        Pipeline(["bitcoin"], "2021-01-01", "2021-03-01", ["rsi", "adx"])
+    assert not stub_api.requests
+
+
+def test_pipeline_toml_config(tmp_path):
+    config = tmp_path / "pipeline.toml"
+    config.write_text(
+        'coins = ["bitcoin"]\n'
+        'indicators = ["rsi", {name = "sma", params = {days = 5}}]\n'
+    )
+    assert load_config(config) == {
+        "coins": ["bitcoin"],
+        "indicators": ["rsi", ("sma", {"days": 5})],
+    }
+
+
+def test_cli(stub_api, tmp_path):
+    config = tmp_path / "pipeline.json"
+    config.write_text(
+        json.dumps(
+            {
+                "coins": ["bitcoin"],
+                "start_date": "2021-01-01",
+                "end_date": "2021-03-01",
+                "indicators": ["macd", {"name": "sma", "params": {"days": 5}}],
+            }
+        )
+    )
+    argv = ["--config", str(config), "--output-dir", str(tmp_path / "out")]
+    assert main(argv + ["--base-url", stub_api]) == 0
+    df = pd.read_csv(tmp_path / "out/bitcoin.csv")
+    assert list(df.columns) == ["date", "price", "MACD", "SMA"]
+
+    assert main(argv + ["--base-url", stub_api, "--coins", "bad-coin"]) == 1
+    assert main(["--coins", "bitcoin"]) == 2
+    assert main(argv + ["--indicators", "rsi,adx"]) == 2
@@ -0,0 +1,60 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from PriceIndices import Indices, rendering
+
+KINDS = ["vola_index", "rsi", "bollinger_bands", "macd", "sma", "ema"]
+
+
+def make_prices(n=120):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame(
+        {
+            "date": pd.date_range("2021-01-01", periods=n)[::-1],
+            "price": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n))),
+        }
+    )
+
+
+def test_indices_plots(tmp_path):
+    indices = Indices(make_prices(), plot_dir=str(tmp_path))
+    indices.get_vola_graph(indices.get_vola_index(), "vola.png")
+    indices.get_rsi_graph(indices.get_rsi(), "rsi.png")
+    indices.get_bollinger_bands(plot=True, plot_name="bb.png")
+    indices.get_moving_average_convergence_divergence(
+        plot=True, plot_name="macd.png"
+    )
+    indices.get_simple_moving_average(plot=True, plot_name="sma.png")
+    indices.get_exponential_moving_average(
+        periods=[10, 20], plot=True, plot_name="ema.png"
+    )
+    for name in ["vola", "rsi", "bb", "macd", "sma", "ema"]:
+        assert (tmp_path / "{}.png".format(name)).stat().st_size > 0
+    # Charts are drawn on recycled Agg figures, not on pyplot figures.
+    assert plt.get_fignums() == []
+    assert len(rendering._figures) <= len(
+        {size for size, _ in rendering.TEMPLATES.values()}
+    )
+
+
+def test_render_many(tmp_path):
+    data = Indices(make_prices()).compute()
+    jobs = [
+        (kind, data, tmp_path / "{}_{}.png".format(kind, i))
+        for kind in KINDS
+        for i in range(2)
+    ]
+    rendering.render_many(jobs, max_points=50, max_workers=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        path.name for _, _, path in jobs
+    )
+
+
+def test_downsample_keeps_extremes():
+    data = make_prices(10000)
+    sample = rendering.downsample(data, "price", 500)
+    assert len(sample) <= 502
+    assert sample["price"].max() == data["price"].max()
+    assert sample["price"].min() == data["price"].min()
+    assert rendering.downsample(data, "price", None) is data
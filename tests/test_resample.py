@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices.resample import Resampler, resample
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2021-01-01", periods=24 * 30, freq="h")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+    df = pd.DataFrame(
+        {
+            "open": close * 0.999,
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.uniform(1, 10, len(dates)),
+            "date": dates,
+        }
+    )
+    # Newest first, like MarketHistory.get_history.
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("rule", ["4h", "1D", "1W"])
+def test_resample_matches_pandas(bars, rule):
+    out = resample(bars, rule)
+    assert out["date"].is_monotonic_decreasing
+
+    if rule == "1W":
+        # Weeks from Monday, dated by their Monday.
+        options = dict(rule="W-MON", label="left", closed="left")
+    else:
+        options = dict(rule=rule, origin="epoch")
+    expected = (
+        bars.set_index("date")
+        .sort_index()
+        .resample(**options)
+        .agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+            }
+        )
+        .dropna()
+        .iloc[::-1]
+    )
+    np.testing.assert_array_equal(out["date"], expected.index)
+    for column in expected.columns:
+        np.testing.assert_allclose(out[column], expected[column])
+
+
+def test_resampler_is_incremental(bars):
+    ascending = bars.iloc[::-1].reset_index(drop=True)
+    resampler = Resampler("1D")
+    resampler.update(ascending.iloc[:100])
+    changed = resampler.update(ascending.iloc[100:130])
+    assert changed["date"].iloc[0] == pd.Timestamp("2021-01-05")
+    for start in range(130, len(ascending), 7):
+        resampler.update(ascending.iloc[start : start + 7])
+
+    pd.testing.assert_frame_equal(resampler.bars(), resample(bars, "1D"))
+    with pytest.raises(ValueError):
+        resampler.update(ascending.iloc[:1])
+
+
+@pytest.mark.parametrize("rule", ["1M", "3M", "1Y", "1MS", "0h", "1 fortnight"])
+def test_resample_rejects_rule(bars, rule):
+    with pytest.raises(ValueError):
+        resample(bars, rule)
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from PriceIndices import MarketHistory
+from PriceIndices.scheduler import (
+    BATCH,
+    INTERACTIVE,
+    RequestScheduler,
+    retry_after,
+)
+
+
+def test_retry_after_headers():
+    assert retry_after({"Retry-After": "3"}) == 3.0
+    assert retry_after({}) is None
+    assert (
+        retry_after({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2"})
+        == 2.0
+    )
+    assert (
+        retry_after({"RateLimit-Remaining": "5", "RateLimit-Reset": "2"})
+        is None
+    )
+    assert retry_after({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}) == 0
+
+
+def test_adaptive_concurrency():
+    scheduler = RequestScheduler(max_concurrency=8)
+    scheduler.acquire()
+    assert scheduler.release(429, {"Retry-After": "0"})
+    assert scheduler.limit == 4
+    scheduler.acquire()
+    assert not scheduler.release(200, {})
+    assert scheduler.limit == 4.25
+    for _ in range(100):
+        scheduler.acquire()
+        scheduler.release(200, {})
+    assert scheduler.limit == 8
+
+
+def test_token_bucket():
+    scheduler = RequestScheduler(rate=20)
+    start = time.monotonic()
+    for _ in range(5):
+        scheduler.acquire()
+        scheduler.release(200, {})
+    assert time.monotonic() - start >= 0.15
+
+
+def test_interactive_first():
+    scheduler = RequestScheduler(max_concurrency=1)
+    scheduler.acquire()
+    order = []
+
+    def request(name, priority):
+        scheduler.acquire(priority)
+        order.append(name)
+        scheduler.release(200, {})
+
+    threads = [
+        threading.Thread(target=request, args=("batch", BATCH)),
+        threading.Thread(target=request, args=("interactive", INTERACTIVE)),
+    ]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    scheduler.release(200, {})
+    for thread in threads:
+        thread.join()
+    assert order == ["interactive", "batch"]
+
+
+def test_throttled_request_is_retried(stub_api):
+    history = MarketHistory(base_url=stub_api)
+    df = history.get_history("throttled-coin", "2020-03-16", "2021-03-15")
+    assert df.shape == (364, 7)
+    assert len(stub_api.requests) == 2
+    assert history.scheduler.limit == 8.125
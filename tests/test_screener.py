@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from PriceIndices import Indices, PanelIndices
+from PriceIndices.screener import Rule, Screener
+
+
+@pytest.fixture
+def panel():
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("2020-01-01", periods=600, freq="D")
+    coins = ["coin{}".format(i) for i in range(40)]
+    prices = 100 * np.exp(
+        np.cumsum(rng.normal(0, 0.03, (len(dates), len(coins))), axis=0)
+    )
+    return PanelIndices(pd.DataFrame(prices, index=dates, columns=coins))
+
+
+RULES = [
+    Rule("overbought", "RSI_2", ">", 70),
+    Rule("breakout", "price", "crosses_above", "BB_upper"),
+    Rule("macd_flip", "MACD", "sign_change"),
+    Rule("ema_cross", "EMA_10", "crosses_below", "EMA_30"),
+]
+
+
+def expected_matches(panel, dates):
+    rows = []
+    for coin in panel.prices.columns:
+        df = panel.prices[coin].rename("price").reset_index()
+        df.columns = ["date", "price"]
+        wide = Indices(df, assume_sorted=True).compute(
+            [
+                "rsi",
+                ("bollinger_bands", {"days": 20}),
+                "macd",
+                ("ema", {"periods": [10, 30]}),
+            ]
+        )
+        for rule in RULES:
+            a = wide[rule.column]
+            b = wide[rule.other] if isinstance(rule.other, str) else 0
+            if rule.op == ">":
+                mask = a > rule.other
+            elif rule.op == "sign_change":
+                mask = np.sign(a) * np.sign(a.shift()) < 0
+            else:
+                diff = a - b if rule.op == "crosses_above" else b - a
+                mask = (diff.shift() <= 0) & (diff > 0)
+            for date in wide["date"][mask].iloc[-dates:]:
+                if date >= wide["date"].iloc[-dates]:
+                    rows.append((coin, date, rule.name))
+    return sorted(rows)
+
+
+def test_screen_matches_full_history(panel):
+    screener = Screener(RULES, params={"bollinger_bands": {"days": 20}})
+    assert screener.specs["ema"]["periods"] == [10, 30]
+    result = screener.screen(panel, dates=5)
+    assert result["date"].is_monotonic_decreasing
+    assert len(result)
+    actual = sorted(zip(result["coin"], result["date"], result["rule"]))
+    assert actual == expected_matches(panel, 5)
+
+
+def test_rule_checks_operator():
+    with pytest.raises(ValueError):
+        Rule("bad", "RSI_2", "!=", 70)
+    with pytest.raises(ValueError):
+        Screener([Rule("bad", "ADX", ">", 20)])
+
+
+def test_screen_dates_beyond_panel(panel):
+    screener = Screener(RULES)
+    short = PanelIndices(panel.prices.iloc[:60])
+    result = screener.screen(short, dates=1000)
+    pd.testing.assert_frame_equal(result, screener.screen(short, dates=60))
+    assert result["date"].min() >= short.prices.index[0]
+    with pytest.raises(ValueError):
+        screener.screen(short, dates=0)
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from PriceIndices import Indices, MarketHistory, PriceStore
+
+
+def test_store_read_through(stub_api, tmp_path):
+    store = PriceStore(tmp_path / "prices.sqlite")
+    history = MarketHistory(base_url=stub_api, store=store)
+    df = history.get_history("bitcoin", "2020-03-16", "2021-01-15")
+    assert df.shape == (305, 7)
+
+    df = history.get_history("bitcoin", "2020-03-16", "2021-03-15")
+    assert df.shape == (364, 7)
+    assert df["date"].iloc[0] == pd.Timestamp("2021-03-15")
+    assert [q["time_start"][0] for q in stub_api.requests] == [
+        "2020-03-16",
+        "2021-01-15",
+    ]
+
+    reader = PriceStore(tmp_path / "prices.sqlite", readonly=True)
+    prices = reader.prices("bitcoin", "2020-06-01", "2020-07-01")
+    assert prices.shape == (30, 2)
+    assert prices["date"].is_monotonic_increasing
+    rsi = Indices(prices, assume_sorted=True).get_rsi()
+    assert 0 < len(rsi) < 30
+
+
+def test_store_upsert(tmp_path):
+    store = PriceStore(tmp_path / "prices.sqlite")
+    frame = pd.DataFrame(
+        {
+            "coin": ["bitcoin", "bitcoin", "ethereum"],
+            "date": ["2020-01-02", "2020-01-03", "2020-01-02"],
+            "close": [1.0, 2.0, 3.0],
+        }
+    )
+    store.upsert(frame, start_date="2020-01-01", end_date="2020-01-03")
+    store.upsert(
+        pd.DataFrame({"date": ["2020-01-03"], "close": [5.0]}), "bitcoin"
+    )
+
+    assert store.coins() == ["bitcoin", "ethereum"]
+    assert store.missing("ethereum", "2020-01-01", "2020-01-05") == [
+        ("2020-01-03", "2020-01-05")
+    ]
+    df = store.query(
+        ["bitcoin", "ethereum"], "2020-01-01", "2020-01-03", ["close"]
+    )
+    assert df.to_dict("list") == {
+        "close": [5.0, 1.0, 3.0],
+        "date": ["2020-01-03", "2020-01-02", "2020-01-02"],
+        "coin": ["bitcoin", "bitcoin", "ethereum"],
+    }
+
+
+def test_store_query_edge_cases(tmp_path):
+    store = PriceStore(tmp_path / "prices.sqlite")
+    store.upsert(
+        pd.DataFrame({"date": ["2020-01-02"], "close": [1.0]}), "bitcoin"
+    )
+    df = store.query([], "2020-01-01", "2020-01-03", ["close"])
+    assert df.empty and list(df.columns) == ["close", "date", "coin"]
+    df = store.query(["tether", "bitcoin"], "2020-01-01", "2020-01-03")
+    assert df["coin"].tolist() == ["bitcoin"]
+    with pytest.raises(ValueError, match="close; DROP"):
+        store.query("bitcoin", "2020-01-01", "2020-01-03", ["close; DROP"])
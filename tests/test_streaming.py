@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from PriceIndices import IndicatorStream, Indices
+
+
+def make_prices(rows):
+    rng = np.random.default_rng(1)
+    dates = pd.date_range("2020-01-01", periods=rows, freq="D")
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, rows)))
+    return pd.DataFrame({"date": dates, "price": price})
+
+
+def test_stream_matches_compute():
+    df = make_prices(300)
+    indicators = ["vola_index", "rsi", "bollinger_bands", "macd", "sma", "ema"]
+    wide = Indices(df).compute(indicators).iloc[::-1].reset_index(drop=True)
+
+    stream = IndicatorStream(indicators)
+    for i, price in enumerate(df["price"]):
+        values = stream.update(price)
+        for column, value in values.items():
+            np.testing.assert_allclose(
+                value, wide[column].iloc[i], rtol=1e-9, atol=1e-9
+            )
+
+
+def test_stream_from_indices():
+    df = make_prices(200)
+    stream = IndicatorStream.from_indices(
+        Indices(df.iloc[:-1].iloc[::-1]), [("ema", {"periods": [20, 70]})]
+    )
+    values = stream.update(df["price"].iloc[-1])
+
+    wide = Indices(df).compute([("ema", {"periods": [20, 70]})])
+    np.testing.assert_allclose(values["EMA_20"], wide["EMA_20"].iloc[0])
+    np.testing.assert_allclose(values["EMA_70"], wide["EMA_70"].iloc[0])